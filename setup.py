@@ -33,6 +33,9 @@ setup(
     zip_safe=True,
 
     install_requires=install_requirements,
+    extras_require={
+        'analytics': ['numpy'],
+    },
     tests_requires=test_requirements,
 
     package_dir={'': '.'},
@@ -41,6 +44,7 @@ setup(
     packages=[
         'swf',
         'swf.actors',
+        'swf.local',
         'swf.querysets',
         'swf.responses',
         'swf.models',
@@ -2,4 +2,6 @@
 
 from swf.actors.core import Actor
 from swf.actors.worker import ActivityWorker
-from swf.actors.decider import Decider
\ No newline at end of file
+from swf.actors.decider import Decider
+from swf.actors.asynchronous import AsyncDecider, AsyncActivityWorker
+from swf.actors.supervisor import Supervisor
\ No newline at end of file
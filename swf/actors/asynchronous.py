@@ -0,0 +1,125 @@
+# -*- coding:utf-8 -*-
+
+import threading
+from multiprocessing.pool import ThreadPool
+
+from swf.actors.core import Actor
+from swf.actors.decider import Decider
+from swf.actors.worker import ActivityWorker
+
+
+DEFAULT_MAX_CONCURRENCY = 100
+
+
+class AsyncActor(Actor):
+    """Non-blocking actor base class
+
+    Wraps a synchronous actor class: every call is run on a thread pool
+    and immediately returns a ``multiprocessing.pool.AsyncResult``. Its
+    ``get()`` method returns the call result or raises its exception,
+    and a ``callback`` keyword argument can be passed to be called with
+    the result.
+
+    Each thread of the pool runs its own instance of ``actor_class``,
+    hence its own SWF connection: many long polls, on many task lists,
+    can be outstanding at once.
+
+    :param  domain: Domain the Actor should interact with
+    :type   domain: swf.models.Domain
+
+    :param  task_list: task list the Actor should watch for tasks on
+    :type   task_list: string
+
+    :param  pool: thread pool to run calls on, can be shared by several
+                  actors. A pool of *max_concurrency* threads is created
+                  and owned by the actor if None.
+    :type   pool: multiprocessing.pool.ThreadPool
+
+    :param  max_concurrency: size of the pool owned by the actor
+    :type   max_concurrency: int
+
+    Other keyword arguments are passed to ``actor_class``.
+    """
+    actor_class = None
+
+    def __init__(self, domain, task_list, pool=None,
+                 max_concurrency=DEFAULT_MAX_CONCURRENCY, **kwargs):
+        super(AsyncActor, self).__init__(
+            domain, task_list, connection=kwargs.get('connection'))
+
+        self._actor_kwargs = kwargs
+        self._local = threading.local()
+
+        self._owns_pool = pool is None
+        self.pool = pool or ThreadPool(max_concurrency)
+
+    @property
+    def actor(self):
+        """Synchronous actor bound to the current thread"""
+        actor = getattr(self._local, 'actor', None)
+        if actor is None:
+            actor = self.actor_class(self.domain, self.task_list,
+                                     **self._actor_kwargs)
+            self._local.actor = actor
+
+        return actor
+
+    def _submit(self, method, *args, **kwargs):
+        callback = kwargs.pop('callback', None)
+
+        def call():
+            return getattr(self.actor, method)(*args, **kwargs)
+
+        return self.pool.apply_async(call, callback=callback)
+
+    def close(self):
+        """Waits for the pending calls and stops the pool if the actor
+        owns it"""
+        if self._owns_pool:
+            self.pool.close()
+            self.pool.join()
+
+
+class AsyncDecider(AsyncActor):
+    """Non-blocking ``swf.actors.Decider``
+
+    ``poll``, ``poll_for_task`` and ``complete`` take the same arguments
+    as their ``swf.actors.Decider`` counterparts, plus an optional
+    ``callback``, and return a ``multiprocessing.pool.AsyncResult``.
+    """
+    actor_class = Decider
+
+    def poll(self, *args, **kwargs):
+        return self._submit('poll', *args, **kwargs)
+
+    def poll_for_task(self, *args, **kwargs):
+        return self._submit('poll_for_task', *args, **kwargs)
+
+    def complete(self, *args, **kwargs):
+        return self._submit('complete', *args, **kwargs)
+
+
+class AsyncActivityWorker(AsyncActor):
+    """Non-blocking ``swf.actors.ActivityWorker``
+
+    ``poll``, ``complete``, ``fail``, ``heartbeat`` and ``cancel`` take
+    the same arguments as their ``swf.actors.ActivityWorker``
+    counterparts, plus an optional ``callback``, and return a
+    ``multiprocessing.pool.AsyncResult``.
+    """
+    actor_class = ActivityWorker
+
+    def poll(self, *args, **kwargs):
+        return self._submit('poll', *args, **kwargs)
+
+    def complete(self, *args, **kwargs):
+        return self._submit('complete', *args, **kwargs)
+
+    def fail(self, *args, **kwargs):
+        return self._submit('fail', *args, **kwargs)
+
+    def heartbeat(self, *args, **kwargs):
+        return self._submit('heartbeat', *args, **kwargs)
+
+    def cancel(self, *args, **kwargs):
+        return self._submit('cancel', *args, **kwargs)
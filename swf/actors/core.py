@@ -19,9 +19,12 @@ class Actor(ConnectedSWFObject):
 
     :param  task_list: task list the Actor should watch for tasks on
     :type   task_list: string
+
+    Other keyword arguments, as ``connection``, are passed to
+    ``swf.core.ConnectedSWFObject``.
     """
-    def __init__(self, domain, task_list):
-        super(Actor, self).__init__()
+    def __init__(self, domain, task_list, **kwargs):
+        super(Actor, self).__init__(**kwargs)
 
         self._set_domain(domain)
         self.task_list = task_list
@@ -1,7 +1,8 @@
 # -*- coding: utf-8 -*-
 import boto.exception
 
-from swf.models.history import History
+from swf.constants import KEEP_BOTH
+from swf.models.history import History, LazyHistory
 from swf.models.workflow import WorkflowExecution, WorkflowType
 from swf.actors.core import Actor
 from swf.exceptions import PollTimeout, ResponseError, DoesNotExistError
@@ -19,13 +20,27 @@ class Decider(Actor):
 
     :param  last_token: last seen task token
     :type   last_token: string
+
+    :param  history_cache: when set, histories are kept across decision
+                           tasks and only the events added since the
+                           last decision are fetched and parsed
+    :type   history_cache: swf.models.history.HistoryCache
+
+    :param  retention: retention policy of the histories events, see
+                       ``swf.models.event.EventFactory``
+    :type   retention: str
     """
-    def __init__(self, domain, task_list):
+    def __init__(self, domain, task_list, history_cache=None,
+                 retention=KEEP_BOTH, **kwargs):
         super(Decider, self).__init__(
             domain,
-            task_list
+            task_list,
+            **kwargs
         )
 
+        self.history_cache = history_cache
+        self.retention = retention
+
     def complete(self, task_token,
                  decisions=None, execution_context=None):
         """Responds to ``swf`` decisions have been made about
@@ -53,13 +68,94 @@ class Decider(Actor):
 
             raise ResponseError(e.body['message'])
 
+    def _poll_next_page(self, task_list, identity, next_page, **kwargs):
+        try:
+            task = self.connection.poll_for_decision_task(
+                self.domain.name,
+                task_list=task_list,
+                identity=identity,
+                next_page_token=next_page,
+                **kwargs
+            )
+        except boto.exception.SWFResponseError as e:
+            if e.error_code == 'UnknownResourceFault':
+                raise DoesNotExistError(
+                    "Unable to poll decision task.\n",
+                    e.body['message'],
+                )
+
+            raise ResponseError(e.body['message'])
+
+        token = task.get('taskToken')
+        if token is None:
+            raise PollTimeout("Decider poll timed out")
+
+        return task
+
+    def _iter_pages(self, task, task_list, identity, **kwargs):
+        """Yields the events of *task* then of every following page"""
+        yield task['events']
+
+        next_page = task.get('nextPageToken')
+        while next_page:
+            task = self._poll_next_page(task_list, identity, next_page,
+                                        **kwargs)
+            yield task['events']
+            next_page = task.get('nextPageToken')
+
+    def _fetch_history(self, task, task_list, identity, execution_key,
+                       **kwargs):
+        """Fetches every page of the decision *task* history
+
+        With a ``history_cache``, pages are in reverse order and paging
+        stops at the events the cached history already holds.
+
+        """
+        cache = self.history_cache
+
+        # previousStartedEventId is 0 on the first decision task of an
+        # execution: nothing can be reused then.
+        cached = None
+        if cache is not None and task.get('previousStartedEventId'):
+            cached = cache.get(execution_key)
+        last_id = cached.last.id if cached else 0
+
+        events = []
+        for page in self._iter_pages(task, task_list, identity, **kwargs):
+            events.extend(page)
+            if events and events[-1]['eventId'] <= last_id:
+                break
+
+        if cache is not None:
+            events = [event for event in reversed(events) if
+                      event['eventId'] > last_id]
+
+        if cached:
+            history = cached
+            history.extend(events)
+        else:
+            history = History.from_event_list(events, self.retention)
+
+        if cache is not None:
+            if history.finished:
+                cache.discard(execution_key)
+            else:
+                cache.set(execution_key, history)
+
+        return history
+
     def poll_for_task(self, task_list=None,
              identity=None,
+             lazy=False,
              **kwargs):
         """
         Polls a decision task and returns the token and the full history of the
         workflow's events.
 
+        With a ``history_cache``, pages are fetched in reverse order and
+        fetching stops as soon as it reaches the events of the cached
+        history, which is then extended in place.
+
         :param task_list: task list to poll for decision tasks from.
         :type task_list: string
 
@@ -68,12 +164,26 @@ class Decider(Actor):
         workflow history.
         :type identity: string
 
+        :param lazy: return a ``swf.models.history.LazyHistory`` that
+        fetches and parses the next pages only when their events are
+        accessed. Combined with ``reverse_order=True``, looking at the
+        most recent events only fetches the pages holding them. Cannot
+        be used with a ``history_cache``.
+        :type lazy: bool
+
         :returns: a Response object with history, token, and execution set
         :rtype: swf.responses.Response(token, history, execution)
 
         """
         task_list = task_list or self.task_list
 
+        cache = self.history_cache
+        if cache is not None:
+            if lazy:
+                raise ValueError('lazy history cannot be used with '
+                                 'a history cache')
+            kwargs['reverse_order'] = True
+
         task = self.connection.poll_for_decision_task(
             self.domain.name,
             task_list=task_list,
@@ -84,46 +194,31 @@ class Decider(Actor):
         if token is None:
             raise PollTimeout("Decider poll timed out")
 
-        events = task['events']
+        execution_key = (task['workflowExecution']['workflowId'],
+                         task['workflowExecution']['runId'])
 
-        next_page = task.get('nextPageToken')
-        while next_page:
-            try:
-                task = self.connection.poll_for_decision_task(
-                    self.domain.name,
-                    task_list=task_list,
-                    identity=identity,
-                    next_page_token=next_page,
-                    **kwargs
-                )
-            except boto.exception.SWFResponseError as e:
-                if e.error_code == 'UnknownResourceFault':
-                    raise DoesNotExistError(
-                        "Unable to poll decision task.\n",
-                        e.body['message'],
-                    )
-
-                raise ResponseError(e.body['message'])
-
-            token = task.get('taskToken')
-            if token is None:
-                raise PollTimeout("Decider poll timed out")
-
-            events.extend(task['events'])
-            next_page = task.get('nextPageToken')
-
-        history = History.from_event_list(events)
+        if lazy:
+            history = LazyHistory(
+                self._iter_pages(task, task_list, identity, **kwargs),
+                reverse_order=kwargs.get('reverse_order', False),
+                retention=self.retention,
+            )
+        else:
+            history = self._fetch_history(task, task_list, identity,
+                                          execution_key, **kwargs)
 
         workflow_type = WorkflowType(
             domain=self.domain,
             name=task['workflowType']['name'],
             version=task['workflowType']['version'],
+            connection=self.connection,
         )
         execution = WorkflowExecution(
             domain=self.domain,
             workflow_id=task['workflowExecution']['workflowId'],
             run_id=task['workflowExecution']['runId'],
             workflow_type=workflow_type,
+            connection=self.connection,
         )
 
         # TODO: move history into execution (needs refactoring on WorkflowExecution.history())
@@ -1,18 +1,78 @@
-from .helpers import Every, meanwhile
+import threading
+
+from swf.exceptions import ActivityTaskCanceledError
+
+from .helpers import Every, ProcessCall, is_cancel_requested, meanwhile
+
+
+_current = threading.local()
+
+
+def cancel_requested():
+    """Tells if a heartbeat of the activity running in the current thread,
+    through :class:`heartbeat_on`, was answered with ``cancelRequested``
+
+    :rtype: bool
+    """
+    every = getattr(_current, 'heartbeat', None)
+    return every is not None and every.cancel_requested.is_set()
+
+
+def raise_if_cancel_requested():
+    """Raises an :class:`swf.exceptions.ActivityTaskCanceledError` if
+    :func:`cancel_requested`
+
+    Long running activities should call it regularly to abort as soon as
+    the decider gives up on them.
+    """
+    if cancel_requested():
+        raise ActivityTaskCanceledError('activity task canceled')
 
 
 class heartbeat_on(object):
-    def __init__(self, heartbeat, interval):
+    """Calls *heartbeat* every *interval* seconds while the decorated
+    function runs, with the same arguments.
+
+    When *heartbeat* returns a response with ``cancelRequested`` set, the
+    function can see it through :func:`cancel_requested` or
+    :func:`raise_if_cancel_requested`.
+
+    With *in_process*, the decorated function runs in a child process so
+    that a CPU-bound function holding the GIL cannot delay heartbeats.
+    If a heartbeat response has ``cancelRequested`` set, an
+    :class:`swf.exceptions.ActivityTaskCanceledError` is then raised in
+    the function, and raised again to the caller.
+
+    """
+    def __init__(self, heartbeat, interval, in_process=False):
         self._heartbeat = heartbeat
         self._interval = interval
+        self._in_process = in_process
 
     def __call__(self, func):
         from functools import wraps
 
         @wraps(func)
         def with_heartbeat(*args, **kwargs):
-            return meanwhile(Every(self._interval,
-                                   self._heartbeat, *args, **kwargs),
-                             func, *args, **kwargs)
+            if self._in_process:
+                call = ProcessCall(func, *args, **kwargs)
+
+                def heartbeat(*args, **kwargs):
+                    response = self._heartbeat(*args, **kwargs)
+                    if is_cancel_requested(response):
+                        call.cancel()
+                    return response
+
+                return meanwhile(Every(self._interval,
+                                       heartbeat, *args, **kwargs),
+                                 call)
+
+            every = Every(self._interval, self._heartbeat, *args, **kwargs)
+            previous = getattr(_current, 'heartbeat', None)
+            _current.heartbeat = every
+            try:
+                return meanwhile(every, func, *args, **kwargs)
+            finally:
+                _current.heartbeat = previous
 
         return with_heartbeat
@@ -1,6 +1,199 @@
 # -*- coding:utf-8 -*-
 
+import logging
+import multiprocessing
+import os
+import Queue
+import signal
 import threading
+import time
+import traceback
+
+from swf.exceptions import ActivityTaskCanceledError
+
+
+logger = logging.getLogger(__name__)
+
+
+class _Timer(object):
+    __slots__ = [
+        'interval',
+        'rounds',
+        'cancelled',
+        'running',
+        'call',
+        'args',
+        'kwargs',
+    ]
+
+    def __init__(self, interval, call, args, kwargs):
+        self.interval = interval
+        self.rounds = 0
+        self.cancelled = False
+        self.running = False
+        self.call = call
+        self.args = args
+        self.kwargs = kwargs
+
+
+class Scheduler(object):
+    """Runs periodic calls from a few threads
+
+    Timers are stored in a hashed timer wheel of *nb_buckets* buckets,
+    each one covering *tick* seconds: scheduling and cancelling a timer
+    are O(1), and each tick only looks at the timers of one bucket.
+    The calls due on a tick are handed to *nb_workers* worker threads, so
+    that hundreds of heartbeats only need a few threads, and a slow call
+    does not delay the others. A timer whose previous call still runs
+    when it is due again skips that round.
+
+    Intervals are rounded up to the *tick* resolution. The threads are
+    started on the first schedule, and restarted in forked processes.
+
+    :param  tick: wheel resolution in seconds
+    :type   tick: float
+
+    :param  nb_buckets: wheel size
+    :type   nb_buckets: int
+
+    :param  nb_workers: count of threads making the calls
+    :type   nb_workers: int
+    """
+    def __init__(self, tick=0.1, nb_buckets=600, nb_workers=4):
+        self.tick = tick
+        self.nb_workers = nb_workers
+        self._buckets = [[] for _ in xrange(nb_buckets)]
+        self._cursor = 0
+        self._active = 0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._calls = None
+        self._thread = None
+        self._pid = None
+
+    def __len__(self):
+        return self._active
+
+    def _insert(self, timer):
+        nb_buckets = len(self._buckets)
+        offset = max(1, int(-(-timer.interval // self.tick)))
+
+        timer.rounds = (offset - 1) // nb_buckets
+        self._buckets[(self._cursor + offset) % nb_buckets].append(timer)
+
+    def schedule(self, interval, call, *args, **kwargs):
+        """Calls ``call(*args, **kwargs)`` every *interval* seconds,
+        starting in *interval* seconds
+
+        :returns: a handle to pass to ``cancel()``
+        """
+        timer = _Timer(interval, call, args, kwargs)
+
+        with self._lock:
+            self._insert(timer)
+            self._active += 1
+            self._ensure_thread()
+
+        self._wakeup.set()
+        return timer
+
+    def cancel(self, timer):
+        """Stops calling *timer*"""
+        with self._lock:
+            if not timer.cancelled:
+                timer.cancelled = True
+                self._active -= 1
+
+    def _ensure_thread(self):
+        pid = os.getpid()
+        if self._pid == pid and self._thread.is_alive():
+            return
+
+        self._pid = pid
+        self._calls = Queue.Queue()
+        for _ in xrange(self.nb_workers):
+            worker = threading.Thread(target=self._work, args=(self._calls,))
+            worker.daemon = True
+            worker.start()
+
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _advance(self):
+        """Moves the wheel by one tick and returns the due timers"""
+        with self._lock:
+            self._cursor = (self._cursor + 1) % len(self._buckets)
+            bucket = self._buckets[self._cursor]
+
+            due = []
+            pending = []
+            for timer in bucket:
+                if timer.cancelled:
+                    continue
+                if timer.rounds:
+                    timer.rounds -= 1
+                    pending.append(timer)
+                else:
+                    due.append(timer)
+            self._buckets[self._cursor] = pending
+
+            for timer in due:
+                self._insert(timer)
+
+        return due
+
+    def _run(self):
+        next_tick = time.time() + self.tick
+
+        while True:
+            if not self._active:
+                self._wakeup.clear()
+                if not self._active:
+                    self._wakeup.wait()
+                next_tick = time.time() + self.tick
+
+            delay = next_tick - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            next_tick += self.tick
+
+            for timer in self._advance():
+                if timer.cancelled or timer.running:
+                    continue
+                timer.running = True
+                self._calls.put(timer)
+
+    def _work(self, calls):
+        while True:
+            timer = calls.get()
+            try:
+                if not timer.cancelled:
+                    timer.call(*timer.args, **timer.kwargs)
+            except Exception:
+                logger.exception('periodic call to {} failed'.format(
+                                 timer.call))
+            finally:
+                timer.running = False
+
+
+default_scheduler = Scheduler()
+
+
+def is_cancel_requested(response):
+    """Tells if a ``record_activity_task_heartbeat`` *response* asks for
+    the activity task to be canceled
+
+    >>> is_cancel_requested({'cancelRequested': True})
+    True
+    >>> is_cancel_requested({'cancelRequested': False})
+    False
+    >>> is_cancel_requested(None)
+    False
+
+    """
+    return bool(isinstance(response, dict) and
+                response.get('cancelRequested'))
 
 
 class Every(object):
@@ -8,31 +201,108 @@ class Every(object):
         """
         Every *nseconds* call ``call(*args, **kwargs)``.
 
-        Execute *call* in a thread.
+        Calls are made by the threads of the shared
+        :data:`default_scheduler`.
+
+        If *call* returns a ``record_activity_task_heartbeat`` response
+        with ``cancelRequested`` set, the ``cancel_requested`` event is
+        set.
 
         """
         self.nseconds = nseconds
         self._call = call
         self._args = args
         self._kwargs = kwargs
-        self._is_stopped = threading.Event()
-        self._thread = None
+        self._timer = None
+        self.cancel_requested = threading.Event()
 
-    def __call__(self):
-        def repeat():
-            while not self._is_stopped.wait(self.nseconds):
-                if self._is_stopped.is_set():
-                    return
+    def _run_call(self):
+        response = self._call(*self._args, **self._kwargs)
+        if is_cancel_requested(response):
+            self.cancel_requested.set()
 
-                self._call(*self._args, **self._kwargs)
+        return response
 
-        self._thread = threading.Thread(target=repeat)
-        self._thread.daemon = True
-        self._thread.start()
+    def __call__(self):
+        self._timer = default_scheduler.schedule(
+            self.nseconds,
+            self._run_call,
+        )
         return self
 
     def stop(self):
-        self._is_stopped.set()
+        if self._timer is not None:
+            default_scheduler.cancel(self._timer)
+
+
+def _run_in_child(connection, call, args, kwargs):
+    def cancel(signum, frame):
+        raise ActivityTaskCanceledError('activity task canceled')
+
+    signal.signal(signal.SIGTERM, cancel)
+
+    try:
+        connection.send((True, call(*args, **kwargs)))
+    except BaseException as err:
+        logger.exception('call to {} failed'.format(call))
+        try:
+            connection.send((False, err))
+        except Exception:
+            # Unpicklable exception
+            connection.send((False, RuntimeError(traceback.format_exc())))
+    finally:
+        connection.close()
+
+
+class ProcessCall(object):
+    def __init__(self, call, *args, **kwargs):
+        """
+        Calls ``call(*args, **kwargs)`` in a child process and returns its
+        result, or raises its exception, when called.
+
+        The calling process stays free to run other threads, such as
+        heartbeats, even if *call* holds the GIL for long.
+
+        ``cancel()`` raises an :class:`ActivityTaskCanceledError` in the
+        child process, wherever *call* is.
+
+        """
+        self._call = call
+        self._args = args
+        self._kwargs = kwargs
+        self._process = None
+        self._canceled = False
+
+    def cancel(self):
+        self._canceled = True
+        if self._process is not None and self._process.is_alive():
+            self._process.terminate()
+
+    def __call__(self):
+        receiver, sender = multiprocessing.Pipe(duplex=False)
+        self._process = multiprocessing.Process(
+            target=_run_in_child,
+            args=(sender, self._call, self._args, self._kwargs),
+        )
+        self._process.start()
+        sender.close()
+
+        try:
+            succeeded, value = receiver.recv()
+        except EOFError:
+            if self._canceled:
+                raise ActivityTaskCanceledError('activity task canceled')
+            raise RuntimeError('process running {} exited with code '
+                               '{}'.format(self._call,
+                                           self._process.exitcode))
+        finally:
+            receiver.close()
+            self._process.join()
+
+        if not succeeded:
+            raise value
+
+        return value
 
 
 def meanwhile(calling_this, call_that, *args, **kwargs):
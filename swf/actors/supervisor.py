@@ -0,0 +1,200 @@
+# -*- coding:utf-8 -*-
+
+import logging
+import multiprocessing
+import signal
+import threading
+
+from swf.actors.worker import ActivityWorker
+from swf.exceptions import PollTimeout, ActivityTaskCanceledError
+
+
+logger = logging.getLogger(__name__)
+
+
+class Supervisor(object):
+    """Runs activity tasks on a fixed number of slots
+
+    Each slot is a thread or a process that polls for an activity task,
+    processes it with *process_task* and responds to ``swf``. A slot
+    only polls when it is idle: no more tasks are started than there are
+    slots to process them, the others stay in the task list.
+
+    *process_task* is called with the ``swf.models.ActivityTask`` and
+    its return value is sent as the task result. If it raises an
+    ``swf.exceptions.ActivityTaskCanceledError``, for instance through
+    ``swf.actors.heartbeat.raise_if_cancel_requested()``, the task is
+    canceled. If it raises anything else, the task is failed with the
+    exception as the reason.
+
+    On ``stop()`` (or SIGTERM when running through ``run()``), slots stop
+    polling and the supervisor waits for the tasks in progress, including
+    the ones returned by pending polls, to be processed.
+
+    :param  domain: Domain the slots should poll tasks from
+    :type   domain: swf.models.Domain
+
+    :param  task_list: task list the slots should poll tasks from
+    :type   task_list: string
+
+    :param  process_task: processes an activity task
+    :type   process_task: callable(swf.models.ActivityTask)
+
+    :param  nb_slots: number of slots, defaults to the number of CPUs
+    :type   nb_slots: int
+
+    :param  identity: identity of the workers
+    :type   identity: string
+
+    :param  use_processes: run slots as processes instead of threads.
+                           *process_task* must then be picklable if the
+                           platform cannot fork.
+    :type   use_processes: bool
+    """
+    def __init__(self, domain, task_list, process_task,
+                 nb_slots=None,
+                 identity=None,
+                 use_processes=False):
+        self.domain = domain
+        self.task_list = task_list
+        self.process_task = process_task
+        self.nb_slots = nb_slots or multiprocessing.cpu_count()
+        self.identity = identity
+        self.use_processes = use_processes
+
+        self._stopping = multiprocessing.Event()
+        self._busy = multiprocessing.Value('i', 0)
+        self._processed = multiprocessing.Value('i', 0)
+        self._failed = multiprocessing.Value('i', 0)
+        self._canceled = multiprocessing.Value('i', 0)
+        self._slots = []
+
+    @property
+    def busy_slots(self):
+        """Number of slots processing a task"""
+        return self._busy.value
+
+    @property
+    def utilization(self):
+        """Ratio of slots processing a task
+
+        :rtype: float
+        """
+        return float(self.busy_slots) / self.nb_slots
+
+    @property
+    def stats(self):
+        """Slots usage report
+
+        :rtype: dict
+        """
+        return {
+            'slots': self.nb_slots,
+            'busy': self.busy_slots,
+            'utilization': self.utilization,
+            'processed': self._processed.value,
+            'failed': self._failed.value,
+            'canceled': self._canceled.value,
+        }
+
+    @property
+    def is_stopping(self):
+        return self._stopping.is_set()
+
+    def _increment(self, counter, value=1):
+        with counter.get_lock():
+            counter.value += value
+
+    def _process(self, worker, token, task):
+        self._increment(self._busy)
+        try:
+            try:
+                result = self.process_task(task)
+            except ActivityTaskCanceledError as err:
+                logger.info('activity task {} canceled'.format(
+                            task.activity_id))
+                self._increment(self._canceled)
+                worker.cancel(token, details=str(err))
+            except Exception as err:
+                logger.exception('activity task {} failed'.format(
+                                 task.activity_id))
+                self._increment(self._failed)
+                worker.fail(token, reason=str(err))
+            else:
+                worker.complete(token, result)
+        finally:
+            self._increment(self._processed)
+            self._increment(self._busy, -1)
+
+    def _run_slot(self):
+        # Instantiated in the slot to check out its own connection.
+        worker = ActivityWorker(self.domain, self.task_list,
+                                identity=self.identity)
+
+        while not self._stopping.is_set():
+            try:
+                token, task = worker.poll()
+            except PollTimeout:
+                continue
+            except Exception:
+                logger.exception('cannot poll for activity tasks')
+                self._stopping.wait(1)
+                continue
+
+            # Processed even if stopping: it would time out otherwise.
+            try:
+                self._process(worker, token, task)
+            except Exception:
+                logger.exception('cannot respond to activity task {}'.format(
+                                 task.activity_id))
+
+    def start(self):
+        """Starts the slots"""
+        slot_class = (multiprocessing.Process if self.use_processes else
+                      threading.Thread)
+
+        for _ in xrange(self.nb_slots):
+            slot = slot_class(target=self._run_slot)
+            slot.daemon = True
+            slot.start()
+            self._slots.append(slot)
+
+    def stop(self):
+        """Stops polling, slots exit when their current task is processed"""
+        self._stopping.set()
+
+    def join(self, timeout=None):
+        """Waits for the slots to exit"""
+        for slot in self._slots:
+            slot.join(timeout)
+
+        self._slots = [slot for slot in self._slots if slot.is_alive()]
+
+    def run(self):
+        """Starts the slots and runs until SIGTERM or SIGINT, then drains
+        the tasks in progress
+
+        Must be called from the main thread.
+        """
+        def handle_signal(signum, frame):
+            logger.info('received signal {}, draining {} busy slots'.format(
+                        signum, self.busy_slots))
+            self.stop()
+
+        previous_handlers = {
+            signum: signal.signal(signum, handle_signal) for signum in
+            (signal.SIGTERM, signal.SIGINT)
+        }
+
+        try:
+            self.start()
+            # Wakes up regularly for signals to be handled.
+            while not self._stopping.wait(1):
+                pass
+            while self._slots:
+                self.join(1)
+        finally:
+            for signum, handler in previous_handlers.iteritems():
+                signal.signal(signum, handler)
+
+        logger.info('stopped: {}'.format(self.stats))
@@ -3,7 +3,13 @@
 import boto.exception
 from swf.actors import Actor
 from swf.models import ActivityTask
-from swf.exceptions import PollTimeout, ResponseError, DoesNotExistError
+from swf.actors.helpers import is_cancel_requested
+from swf.exceptions import (
+    PollTimeout,
+    ResponseError,
+    DoesNotExistError,
+    ActivityTaskCanceledError,
+)
 from swf import format
 
 
@@ -27,10 +33,11 @@ class ActivityWorker(Actor):
                       The form of this identity is user defined.
     :type   identity: string
     """
-    def __init__(self, domain, task_list, identity=None):
+    def __init__(self, domain, task_list, identity=None, **kwargs):
         super(ActivityWorker, self).__init__(
             domain,
-            task_list
+            task_list,
+            **kwargs
         )
 
         self._identity = identity
@@ -45,7 +52,10 @@ class ActivityWorker(Actor):
         :type   details: string
         """
         try:
-            return self.connection.respond_activity_task_canceled(task_token)
+            return self.connection.respond_activity_task_canceled(
+                task_token,
+                details=format.details(details),
+            )
         except boto.exception.SWFResponseError as e:
             if e.error_code == 'UnknownResourceFault':
                 raise DoesNotExistError(
@@ -53,7 +63,7 @@ class ActivityWorker(Actor):
                     e.body['message']
                 )
 
-                raise ResponseError(e.body['message'])
+            raise ResponseError(e.body['message'])
 
     def complete(self, task_token, result=None):
         """Responds to ``swf` that the activity task is completed
@@ -105,7 +115,7 @@ class ActivityWorker(Actor):
 
             raise ResponseError(e.body['message'])
 
-    def heartbeat(self, task_token, details=None):
+    def heartbeat(self, task_token, details=None, raise_on_cancel=False):
         """Records activity task heartbeat
 
         :param  task_token: canceled activity task token
@@ -113,9 +123,17 @@ class ActivityWorker(Actor):
 
         :param  details: provided details about cancel
         :type   details: string
+
+        :param  raise_on_cancel: raise an ActivityTaskCanceledError if a
+                                 cancellation was requested for the task
+        :type   raise_on_cancel: bool
+
+        :returns: the amazon response, its ``cancelRequested`` key tells
+                  if a cancellation was requested for the task
+        :rtype: dict
         """
         try:
-            return self.connection.record_activity_task_heartbeat(
+            response = self.connection.record_activity_task_heartbeat(
                 task_token,
                 details
             )
@@ -128,6 +146,12 @@ class ActivityWorker(Actor):
 
             raise ResponseError(e.body['message'])
 
+        if raise_on_cancel and is_cancel_requested(response):
+            raise ActivityTaskCanceledError(
+                "Activity task with token {} was canceled".format(task_token))
+
+        return response
+
     def poll(self, task_list=None, identity=None):
         """Polls for an activity task to process from current
         actor's instance defined ``task_list``
@@ -174,7 +198,8 @@ class ActivityWorker(Actor):
         activity_task = ActivityTask.from_poll(
             self.domain,
             self.task_list,
-            polled_activity_data
+            polled_activity_data,
+            connection=self.connection,
         )
         task_token = activity_task.task_token
 
@@ -12,3 +12,8 @@ MAX_REASON_LENGTH = 256
 MAX_DETAILS_LENGTH = 32768
 MAX_INPUT_LENGTH = 32000
 MAX_RESULT_LENGTH = 32000
+
+# What events keep of their json encoded input
+KEEP_RAW = 'KEEP_RAW'  # the encoded input, decoded on each access
+KEEP_PARSED = 'KEEP_PARSED'  # the decoded input, without the encoded one
+KEEP_BOTH = 'KEEP_BOTH'  # the encoded input, decoded once on access
@@ -5,13 +5,363 @@
 #
 # See the file LICENSE for copying permission.
 
+import json
+import logging
+import os
+import threading
+from timeit import default_timer
+from urlparse import urlparse
+
 import boto.swf
+from boto.exception import SWFResponseError
+from boto.regioninfo import RegionInfo, connect
 
+from . import retry
 from . import settings
+from . import throttling
+
 
+logger = logging.getLogger(__name__)
 
 SETTINGS = settings.get()
 
+if SETTINGS.get('rate_limits'):
+    throttling.LIMITER.update(throttling.parse_limits(
+        SETTINGS['rate_limits']))
+
+if SETTINGS.get('max_retry_time'):
+    retry.POLICY.max_elapsed = float(SETTINGS['max_retry_time'])
+
+
+class ConnectionPool(object):
+    """Process-wide store of SWF connections
+
+    Connections are keyed by region and credentials. boto connections
+    are not safe to share between threads, so each thread checks out its
+    own connection for a given key and keeps reusing it; the underlying
+    HTTP connections are then kept alive between calls.
+
+    Connections inherited through a ``fork()`` are dropped: the child
+    process opens its own.
+
+    Connections are wrapped, when given:
+
+    - *limiter*: to wait for it before each request, including for the
+      limits set after they were checked out, see ``swf.throttling``
+    - *retry_policy*: to send each request once, and retry those failing
+      transiently as the policy allows, see ``swf.retry``
+    - *instrumentation*: to call its hooks around each request, including
+      the hooks added after they were checked out
+
+    """
+    def __init__(self, limiter=None, retry_policy=None, instrumentation=None):
+        self._local = threading.local()
+        self.limiter = limiter
+        self.retry_policy = retry_policy
+        self.instrumentation = instrumentation
+
+    @property
+    def connection_cls(self):
+        """Class of the boto connections, sending each request once when
+        retried by *retry_policy*"""
+        if self.retry_policy is not None:
+            return retry.SingleAttemptLayer1
+        return boto.swf.layer1.Layer1
+
+    @property
+    def _connections(self):
+        local = self._local
+        pid = os.getpid()
+
+        if getattr(local, 'pid', None) != pid:
+            local.pid = pid
+            local.connections = {}
+
+        return local.connections
+
+    def get(self, region,
+            aws_access_key_id=None,
+            aws_secret_access_key=None,
+            endpoint=None,
+            record=None,
+            replay=None):
+        """Returns the current thread connection to *region*
+
+        :param  region: name of the AWS region
+        :type   region: str
+
+        :param  endpoint: URL of the SWF endpoint to connect to instead of
+                          the amazon one of *region*, as
+                          ``http://localhost:8642``
+        :type   endpoint: str
+
+        :param  record: path of a log to record the traffic to, see
+                        ``swf.local.recording``
+        :type   record: str
+
+        :param  replay: path of a log to replay the traffic from, instead
+                        of connecting to SWF
+        :type   replay: str
+
+        :rtype: boto.swf.layer1.Layer1
+
+        :raises: ValueError if *region* is not a valid SWF region
+
+        """
+        key = (region, aws_access_key_id, aws_secret_access_key, endpoint,
+               record, replay)
+        connections = self._connections
+
+        connection = connections.get(key)
+        if connection is None:
+            if replay:
+                from swf.local.recording import ReplayConnection
+                connection = ReplayConnection(replay)
+            elif endpoint:
+                connection = connect_to_endpoint(
+                    endpoint, region,
+                    connection_cls=self.connection_cls,
+                    aws_access_key_id=aws_access_key_id,
+                    aws_secret_access_key=aws_secret_access_key,
+                )
+            else:
+                connection = connect(
+                    'swf', region,
+                    connection_cls=self.connection_cls,
+                    aws_access_key_id=aws_access_key_id,
+                    aws_secret_access_key=aws_secret_access_key,
+                )
+            if connection is None:
+                raise ValueError('invalid region: {}'.format(region))
+            if getattr(connection, 'request_hook', None) is None:
+                connection.set_request_hook(ResponseSizeHook(connection))
+            if record:
+                from swf.local.recording import RecordingConnection
+                connection = RecordingConnection(connection, record)
+            if self.limiter is not None:
+                connection = throttling.ThrottledConnection(connection,
+                                                            self.limiter)
+            if self.retry_policy is not None:
+                connection = retry.RetryingConnection(connection,
+                                                      self.retry_policy)
+            if self.instrumentation is not None:
+                connection = InstrumentedConnection(connection,
+                                                    self.instrumentation)
+            connections[key] = connection
+
+        return connection
+
+    def clear(self):
+        """Drops the connections held for the current thread"""
+        self._connections.clear()
+
+
+def connect_to_endpoint(endpoint, region,
+                        connection_cls=boto.swf.layer1.Layer1, **kwargs):
+    """Returns a connection of *connection_cls* to the SWF endpoint at the
+    *endpoint* URL
+
+    :rtype: boto.swf.layer1.Layer1
+    """
+    url = urlparse(endpoint)
+
+    return connection_cls(
+        is_secure=url.scheme == 'https',
+        port=url.port,
+        region=RegionInfo(name=region, endpoint=url.hostname),
+        **kwargs
+    )
+
+
+class Call(object):
+    """Request to the SWF API, as seen by the instrumentation hooks
+
+    Before the request, hooks get:
+
+    - `action`: name of the SWF action, as ``PollForDecisionTask``
+    - `request_size`: size of the json request, in bytes
+    - `page`: number of the page requested, 1 unless the request holds the
+      ``nextPageToken`` of a previous response
+
+    After the request, they also get:
+
+    - `duration`: of the call, in seconds, waits of the rate limiter and
+      retries included
+    - `response_size`: size of the json response, in bytes, as received by
+      the connection, or None if unknown
+    - `error_code`: of the error raised, as ``ThrottlingException``, or
+      None if the call succeeded
+    - `has_next_page`: whether the response holds a ``nextPageToken``
+
+    """
+    __slots__ = [
+        'action',
+        'request_size',
+        'page',
+        'duration',
+        'response',
+        'response_size',
+        'error_code',
+    ]
+
+    def __init__(self, action, request_size, page=1):
+        self.action = action
+        self.request_size = request_size
+        self.page = page
+        self.duration = None
+        self.response = None
+        self.response_size = None
+        self.error_code = None
+
+    @property
+    def has_next_page(self):
+        return bool(isinstance(self.response, dict) and
+                    self.response.get('nextPageToken'))
+
+    def __repr__(self):
+        return '<Call {} page={} duration={} error_code={}>'.format(
+            self.action, self.page, self.duration, self.error_code)
+
+
+class ResponseSizeHook(object):
+    """boto request hook setting the ``response_size`` of *connection*:
+    the length of the body of its last response, before it is decoded
+
+    Connections that do not use HTTP, as ``swf.local.LocalConnection``,
+    set their ``response_size`` themselves.
+    """
+    def __init__(self, connection):
+        self.connection = connection
+
+    def handle_request_data(self, request, response, error=False):
+        length = response.getheader('content-length') if response else None
+        self.connection.response_size = int(length) if length else None
+
+
+def error_code(error):
+    """Returns the SWF fault name of *error*, or its class name"""
+    if isinstance(error, SWFResponseError):
+        return getattr(error, 'error_code', None) or str(error.status)
+    return error.__class__.__name__
+
+
+class Instrumentation(object):
+    """Hooks called with a :class:`Call` around each request
+
+    Hooks are callables. An error raised by a hook is logged, it does not
+    fail the call.
+
+    """
+    def __init__(self):
+        self.before = []
+        self.after = []
+
+    def __nonzero__(self):
+        return bool(self.before or self.after)
+
+    def add(self, before=None, after=None):
+        """Adds the *before* and *after* hooks"""
+        if before is not None:
+            self.before.append(before)
+        if after is not None:
+            self.after.append(after)
+
+    def remove(self, hook):
+        """Removes *hook* from the before and after hooks"""
+        for hooks in (self.before, self.after):
+            if hook in hooks:
+                hooks.remove(hook)
+
+    def clear(self):
+        del self.before[:]
+        del self.after[:]
+
+    def _call(self, hooks, call):
+        for hook in hooks:
+            try:
+                hook(call)
+            except Exception:
+                logger.exception('instrumentation hook {} failed'.format(
+                    hook))
+
+
+# Hooks of the connections of the process-wide pool, as
+#
+#     from swf.core import INSTRUMENTATION
+#     from swf.metrics import Metrics
+#
+#     metrics = Metrics()
+#     INSTRUMENTATION.add(after=metrics)
+INSTRUMENTATION = Instrumentation()
+
+
+class InstrumentedConnection(boto.swf.layer1.Layer1):
+    """Connection calling the *instrumentation* hooks around each request
+    sent to *connection*
+
+    :param  connection: connection to send requests to
+    :type   connection: boto.swf.layer1.Layer1
+
+    :param  instrumentation: hooks to call
+    :type   instrumentation: Instrumentation
+
+    """
+    # Count of the page tokens kept to number the pages
+    MAX_PAGE_TOKENS = 1000
+
+    def __init__(self, connection, instrumentation=INSTRUMENTATION):
+        # ``connection`` is taken by the http connection of
+        # ``AWSAuthConnection``.
+        self.wrapped = connection
+        self.region = connection.region
+        self.instrumentation = instrumentation
+        self._pages = {}  # next page token to the number of its page
+
+    def make_request(self, action, body='', object_hook=None):
+        instrumentation = self.instrumentation
+        if not instrumentation:
+            return self.wrapped.make_request(action, body, object_hook)
+
+        page = 1
+        if 'nextPageToken' in body:
+            token = json.loads(body).get('nextPageToken')
+            page = self._pages.pop(token, 2)
+
+        call = Call(action, len(body), page)
+        instrumentation._call(instrumentation.before, call)
+
+        start = default_timer()
+        try:
+            call.response = self.wrapped.make_request(action, body,
+                                                      object_hook)
+        except Exception as error:
+            call.error_code = error_code(error)
+            raise
+        else:
+            call.response_size = getattr(self.wrapped, 'response_size', None)
+        finally:
+            call.duration = default_timer() - start
+            instrumentation._call(instrumentation.after, call)
+
+        if call.has_next_page:
+            if len(self._pages) >= self.MAX_PAGE_TOKENS:
+                self._pages.clear()
+            self._pages[call.response['nextPageToken']] = page + 1
+
+        return call.response
+
+    def __getattr__(self, name):
+        # Credentials and settings are those of the wrapped connection.
+        if name == 'wrapped':
+            raise AttributeError(name)
+        return getattr(self.wrapped, name)
+
+    def close(self):
+        self.wrapped.close()
+
+
+POOL = ConnectionPool(throttling.LIMITER, retry.POLICY, INSTRUMENTATION)
+
 
 class ConnectedSWFObject(object):
     """Authenticated object interface
@@ -21,6 +371,13 @@ class ConnectedSWFObject(object):
     - `region`: name of the AWS region
     - `connection`: to the SWF endpoint (`boto.swf.layer1.Layer1` object):
 
+    Unless a `connection` keyword argument is given, the connection is
+    checked out from the process-wide :data:`POOL`, to the `endpoint`
+    setting if set, recording to or replaying from the `record` and
+    `replay` settings logs if set, rate limited by the `rate_limits`
+    setting, retrying transient failures for up to `max_retry_time`
+    seconds, and calling the :data:`INSTRUMENTATION` hooks.
+
     """
     __slots__ = [
         'region',
@@ -30,13 +387,14 @@ class ConnectedSWFObject(object):
     def __init__(self, *args, **kwargs):
         settings_ = {key: SETTINGS.get(key, kwargs.get(key)) for key in
                      ('aws_access_key_id',
-                      'aws_secret_access_key')}
+                      'aws_secret_access_key',
+                      'endpoint',
+                      'record',
+                      'replay')}
 
         self.region = (SETTINGS.get('region') or
                        kwargs.get('region') or
                        boto.swf.layer1.Layer1.DefaultRegionName)
 
         self.connection = (kwargs.pop('connection', None) or
-                           boto.swf.connect_to_region(self.region, **settings_))
-        if self.connection is None:
-            raise ValueError('invalid region: {}'.format(self.region))
+                           POOL.get(self.region, **settings_))
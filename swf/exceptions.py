@@ -107,6 +107,10 @@ class InvalidKeywordArgumentError(SWFError):
     pass
 
 
+class ActivityTaskCanceledError(SWFError):
+    pass
+
+
 def ignore(*args, **kwargs):
     return
 
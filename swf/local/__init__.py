@@ -0,0 +1 @@
+from simulator import SWFSimulator, LocalConnection
@@ -0,0 +1,258 @@
+# -*- coding:utf-8 -*-
+
+# Copyright (c) 2013, Theo Crevon
+# Copyright (c) 2013, Greg Leclercq
+#
+# See the file LICENSE for copying permission.
+
+"""Records SWF API traffic and replays it
+
+``RecordingConnection`` wraps a ``boto.swf.layer1.Layer1`` connection and
+appends each of its requests, with its response or error, to a traffic
+log. ``ReplayConnection`` answers requests with the responses of a log,
+without credentials or network.
+
+A log has a json list per line: ``[action, request, status, response,
+elapsed]``, where *status* is 200 or the HTTP status of an error response,
+and *elapsed* the duration of the call in seconds. Logs whose path ends
+with ``.gz`` are gzip compressed; they cannot be appended to by several
+processes at once.
+
+Connections of the process-wide pool record to, or replay, the log at the
+``record`` or ``replay`` setting, that can be set in the environment:
+
+.. code-block:: bash
+
+    $ SWF_RECORD=traffic.log python decider.py
+    $ SWF_REPLAY=traffic.log python -m timeit -s 'import bench' 'bench.run()'
+"""
+
+import collections
+import gzip
+import json
+import os
+import threading
+import time
+from timeit import default_timer
+
+import boto.swf.layer1
+from boto.exception import SWFResponseError
+from boto.regioninfo import RegionInfo
+
+
+class ReplayError(LookupError):
+    """Raised when a log holds no response for a request"""
+
+
+def open_log(path, mode='r'):
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 'b')
+    return open(path, mode)
+
+
+def request_key(action, request):
+    """Returns a hashable key of the *request* of *action*"""
+    return action, json.dumps(request, sort_keys=True)
+
+
+class Recorder(object):
+    """Appends records to the log at *path*
+
+    Records are written at once, so that a log can be appended to by
+    several threads, and by several processes if not compressed.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._stream = open_log(path, 'a')
+
+    def record(self, action, request, status, response, elapsed):
+        line = json.dumps([action, request, status, response, elapsed],
+                          separators=(',', ':')) + '\n'
+        with self._lock:
+            self._stream.write(line)
+            self._stream.flush()
+
+    def close(self):
+        with self._lock:
+            self._stream.close()
+
+
+_recorders = {}
+_recorders_lock = threading.Lock()
+
+
+def get_recorder(path):
+    """Returns the recorder of the current process to *path*
+
+    :rtype: Recorder
+    """
+    key = (os.getpid(), os.path.abspath(path))
+    with _recorders_lock:
+        recorder = _recorders.get(key)
+        if recorder is None:
+            recorder = _recorders[key] = Recorder(path)
+    return recorder
+
+
+class Replayer(object):
+    """Responses of the log at *path*, handed out once each
+
+    A request gets the first unused response recorded for the same
+    request. Otherwise, as requests often hold ids, tokens or timestamps
+    that change between runs, it gets the first unused response recorded
+    for the same action. Replaying the calls of a recording in the same
+    order then gives the same responses.
+
+    :param  path: path of the log
+    :type   path: str
+    """
+    def __init__(self, path):
+        self.path = path
+        self.records = []
+
+        with open_log(path) as stream:
+            for line in stream:
+                if line.strip():
+                    self.records.append(json.loads(line))
+
+        self._used = [False] * len(self.records)
+        self._by_request = collections.defaultdict(collections.deque)
+        self._by_action = collections.defaultdict(collections.deque)
+        for index, (action, request, _, _, _) in enumerate(self.records):
+            self._by_request[request_key(action, request)].append(index)
+            self._by_action[action].append(index)
+
+        self._lock = threading.Lock()
+
+    def _pop(self, queue):
+        while queue:
+            index = queue.popleft()
+            if not self._used[index]:
+                self._used[index] = True
+                return index
+        return None
+
+    def response(self, action, request):
+        """Returns the status, response and elapsed time recorded for the
+        *request* of *action*
+
+        :rtype: tuple
+
+        :raises: ReplayError
+        """
+        with self._lock:
+            index = self._pop(self._by_request[request_key(action,
+                                                           request)])
+            if index is None:
+                index = self._pop(self._by_action[action])
+        if index is None:
+            raise ReplayError('no {} response left in {}'.format(action,
+                                                                 self.path))
+
+        return tuple(self.records[index][2:])
+
+    @property
+    def remaining(self):
+        """Count of the responses not handed out yet"""
+        return self._used.count(False)
+
+
+_replayers = {}
+_replayers_lock = threading.Lock()
+
+
+def get_replayer(path):
+    """Returns the replayer of *path* shared by the current process
+
+    :rtype: Replayer
+    """
+    key = (os.getpid(), os.path.abspath(path))
+    with _replayers_lock:
+        replayer = _replayers.get(key)
+        if replayer is None:
+            replayer = _replayers[key] = Replayer(path)
+    return replayer
+
+
+class RecordingConnection(boto.swf.layer1.Layer1):
+    """Connection recording the traffic of *connection*
+
+    :param  connection: connection to send requests to
+    :type   connection: boto.swf.layer1.Layer1
+
+    :param  recorder: recorder, or path of the log, to record to
+    :type   recorder: Recorder or str
+    """
+    def __init__(self, connection, recorder):
+        # Requests are sent by the wrapped connection: ``connection`` is taken
+        # by the http connection of ``AWSAuthConnection``.
+        self.wrapped = connection
+        self.region = connection.region
+        if isinstance(recorder, basestring):
+            recorder = get_recorder(recorder)
+        self.recorder = recorder
+
+    def make_request(self, action, body='', object_hook=None):
+        request = json.loads(body) if body else None
+
+        start = default_timer()
+        try:
+            response = self.wrapped.make_request(action, body,
+                                                    object_hook)
+        except SWFResponseError as error:
+            self.recorder.record(action, request, error.status, error.body,
+                                 default_timer() - start)
+            raise
+
+        self.recorder.record(action, request, 200, response,
+                             default_timer() - start)
+        return response
+
+    def __getattr__(self, name):
+        # Credentials and settings are those of the wrapped connection.
+        if name == 'wrapped':
+            raise AttributeError(name)
+        return getattr(self.wrapped, name)
+
+    def close(self):
+        self.wrapped.close()
+
+
+class ReplayConnection(boto.swf.layer1.Layer1):
+    """Connection answering requests from a log
+
+    :param  replayer: replayer, or path of the log, to answer from
+    :type   replayer: Replayer or str
+
+    :param  latency: wait for the recorded duration of each call
+    :type   latency: bool
+    """
+    def __init__(self, replayer, latency=False, region=None):
+        if isinstance(replayer, basestring):
+            replayer = get_replayer(replayer)
+        self.replayer = replayer
+        self.latency = latency
+        self.region = region or RegionInfo(name='replay', endpoint='replay')
+
+    def make_request(self, action, body='', object_hook=None):
+        request = json.loads(body) if body else None
+        status, response, elapsed = self.replayer.response(action, request)
+
+        if self.latency:
+            time.sleep(elapsed)
+
+        if status != 200:
+            exception_class = self._fault_excp.get(
+                (response or {}).get('__type'), self.ResponseError)
+            raise exception_class(status, 'Replayed', body=response)
+
+        if response is None:
+            self.response_size = 0
+            return None
+        body = json.dumps(response)
+        self.response_size = len(body)
+        return json.loads(body, object_hook=object_hook)
+
+    def close(self):
+        pass
@@ -0,0 +1,141 @@
+# -*- coding:utf-8 -*-
+
+# Copyright (c) 2013, Theo Crevon
+# Copyright (c) 2013, Greg Leclercq
+#
+# See the file LICENSE for copying permission.
+
+"""Local SWF endpoint
+
+Serves a simulator over HTTP with the SWF JSON protocol, so that it is
+shared by every process, or host, pointed at it. Requests are not
+authenticated: any credentials are accepted.
+
+.. code-block:: bash
+
+    $ python -m swf.local.server --port 8642 --database swf.db
+
+Clients use it by setting their endpoint, in the ``[defaults]`` section of
+``~/.swf`` or in the environment:
+
+.. code-block:: bash
+
+    $ export SWF_ENDPOINT=http://localhost:8642
+"""
+
+import argparse
+import json
+import logging
+import sys
+import traceback
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from SocketServer import ThreadingMixIn
+
+from swf.local.simulator import POLL_TIMEOUT, Fault, SWFSimulator
+from swf.local.store import PersistentSimulator
+
+
+logger = logging.getLogger(__name__)
+
+# Name of the service in the X-Amz-Target header of the requests, as
+# '<service>.<action>'
+SERVICE_NAME = 'SimpleWorkflowService'
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """Serves SWF JSON requests with the simulator of the server"""
+    protocol_version = 'HTTP/1.1'  # keeps connections alive
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        target = self.headers.get('X-Amz-Target', '')
+        service, _, action = target.rpartition('.')
+
+        if not service.endswith(SERVICE_NAME):
+            self._respond(400, Fault('UnknownOperationException',
+                                     'Unknown target: {}'.format(target)).body)
+            return
+
+        try:
+            response = self.server.simulator.request(
+                action, json.loads(body or '{}'))
+        except Fault as fault:
+            self._respond(400, fault.body)
+        except Exception as error:
+            logger.error(traceback.format_exc())
+            self._respond(500, {'__type': 'InternalFailure',
+                                'message': str(error)})
+        else:
+            self._respond(200, response)
+
+    def _respond(self, status, data):
+        body = '' if data is None else json.dumps(data)
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/x-amz-json-1.0')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+
+class SWFServer(ThreadingMixIn, HTTPServer):
+    """Threaded HTTP server of *simulator*
+
+    Each request is served by its own thread, so that long polls do not
+    block other requests.
+
+    :param  address: (host, port) to listen on
+    :type   address: tuple
+
+    :param  simulator: simulator serving the requests
+    :type   simulator: swf.local.simulator.SWFSimulator
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, simulator):
+        HTTPServer.__init__(self, address, RequestHandler)
+        self.simulator = simulator
+
+    @property
+    def endpoint(self):
+        """URL of the server, as set in the ``endpoint`` setting"""
+        host, port = self.server_address[:2]
+        return 'http://{}:{}'.format(host, port)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serves a local SWF.')
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=8642)
+    parser.add_argument('--database',
+                        help='SQLite database to persist to, in memory '
+                             'if not set')
+    parser.add_argument('--poll-timeout', type=float, default=POLL_TIMEOUT)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+
+    if args.database:
+        simulator = PersistentSimulator(args.database,
+                                        poll_timeout=args.poll_timeout)
+    else:
+        simulator = SWFSimulator(poll_timeout=args.poll_timeout)
+
+    server = SWFServer((args.host, args.port), simulator)
+    logger.info('serving SWF on %s', server.endpoint)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
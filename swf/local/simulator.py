@@ -0,0 +1,1362 @@
+# -*- coding:utf-8 -*-
+
+# Copyright (c) 2013, Theo Crevon
+# Copyright (c) 2013, Greg Leclercq
+#
+# See the file LICENSE for copying permission.
+
+"""In-process stand-in for the amazon SWF service
+
+``SWFSimulator`` keeps domains, types, workflow executions and their
+histories in memory and serves the actions of the SWF JSON API, as sent by
+``boto.swf.layer1.Layer1``. Decision and activity tasks are queued on their
+task lists and handed out by long polls, histories are paged, decisions are
+applied to the histories and timers fire on the simulator clock.
+
+``LocalConnection`` is a ``Layer1`` connection that sends its requests to a
+simulator instead of the network. It is given to models, querysets and
+actors through their ``connection`` keyword argument:
+
+.. code-block:: python
+
+    simulator = SWFSimulator(poll_timeout=1)
+    connection = LocalConnection(simulator)
+
+    domain = Domain('test-domain', connection=connection)
+    domain.save()
+    decider = Decider(domain, 'decisions', connection=connection)
+
+Task and execution timeouts are not enforced.
+"""
+
+import heapq
+import itertools
+import json
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+
+import boto.swf.layer1
+from boto.regioninfo import RegionInfo
+
+from swf.constants import REGISTERED, DEPRECATED
+from swf.utils import camel_to_underscore, decapitalize
+
+
+# Maximum, and default, size of the pages of events and of lists
+MAX_PAGE_SIZE = 1000
+
+# Seconds a poll waits for a task, as amazon does
+POLL_TIMEOUT = 60
+
+FAULT_PREFIX = 'com.amazonaws.swf.base.model#'
+VALIDATION_FAULT = 'com.amazon.coral.validate#ValidationException'
+
+# Actions served by the simulator
+ACTIONS = frozenset([
+    'RegisterDomain',
+    'DescribeDomain',
+    'DeprecateDomain',
+    'ListDomains',
+    'RegisterActivityType',
+    'DescribeActivityType',
+    'DeprecateActivityType',
+    'ListActivityTypes',
+    'RegisterWorkflowType',
+    'DescribeWorkflowType',
+    'DeprecateWorkflowType',
+    'ListWorkflowTypes',
+    'StartWorkflowExecution',
+    'DescribeWorkflowExecution',
+    'GetWorkflowExecutionHistory',
+    'ListOpenWorkflowExecutions',
+    'ListClosedWorkflowExecutions',
+    'CountOpenWorkflowExecutions',
+    'CountClosedWorkflowExecutions',
+    'SignalWorkflowExecution',
+    'RequestCancelWorkflowExecution',
+    'TerminateWorkflowExecution',
+    'PollForDecisionTask',
+    'RespondDecisionTaskCompleted',
+    'PollForActivityTask',
+    'RespondActivityTaskCompleted',
+    'RespondActivityTaskFailed',
+    'RespondActivityTaskCanceled',
+    'RecordActivityTaskHeartbeat',
+    'CountPendingDecisionTasks',
+    'CountPendingActivityTasks',
+])
+
+OPEN = 'OPEN'
+CLOSED = 'CLOSED'
+
+# Close status of the workflow executions closed by an event
+CLOSE_STATUSES = {
+    'WorkflowExecutionCompleted': 'COMPLETED',
+    'WorkflowExecutionFailed': 'FAILED',
+    'WorkflowExecutionCanceled': 'CANCELED',
+    'WorkflowExecutionTerminated': 'TERMINATED',
+    'WorkflowExecutionContinuedAsNew': 'CONTINUED_AS_NEW',
+    'WorkflowExecutionTimedOut': 'TIMED_OUT',
+}
+
+# Event recorded in the parent history when a child execution closes,
+# and the attributes of the closing event it carries
+CHILD_CLOSE_EVENTS = {
+    'COMPLETED': ('ChildWorkflowExecutionCompleted', ('result',)),
+    'FAILED': ('ChildWorkflowExecutionFailed', ('reason', 'details')),
+    'CANCELED': ('ChildWorkflowExecutionCanceled', ('details',)),
+    'TERMINATED': ('ChildWorkflowExecutionTerminated', ()),
+    'TIMED_OUT': ('ChildWorkflowExecutionTimedOut', ('timeoutType',)),
+}
+
+
+class Fault(Exception):
+    """Error response of the simulator
+
+    :param  name: name of the amazon fault, as ``UnknownResourceFault``,
+                  or its full type
+    :type   name: str
+
+    :param  message: description of the error
+    :type   message: str
+    """
+    def __init__(self, name, message):
+        Exception.__init__(self, message)
+        if '#' not in name:
+            name = FAULT_PREFIX + name
+        self.type = name
+        self.message = message
+
+    @property
+    def body(self):
+        """Amazon json body of the error response
+
+        :rtype: dict
+        """
+        return {'__type': self.type, 'message': self.message}
+
+
+def unknown(resource, message):
+    return Fault('UnknownResourceFault',
+                 'Unknown {}: {}'.format(resource, message))
+
+
+def validation_error(message):
+    return Fault(VALIDATION_FAULT, message)
+
+
+def described(data):
+    """Returns the description of the registration *data*, if any"""
+    if 'description' in data:
+        return {'description': data['description']}
+    return {}
+
+
+def paginate(items, data, key):
+    """Returns the page of *items* requested by *data*, under *key*, with
+    the token of the next page
+
+    >>> page = paginate(range(5), {'maximumPageSize': 2}, 'items')
+    >>> page['items'], page['nextPageToken']
+    ([0, 1], '2')
+    >>> paginate(range(5), {'nextPageToken': '4'}, 'items')
+    {'items': [4]}
+
+    :rtype: dict
+    """
+    try:
+        position = int(data.get('nextPageToken') or 0)
+    except ValueError:
+        raise validation_error('invalid next page token')
+
+    size = min(data.get('maximumPageSize') or MAX_PAGE_SIZE, MAX_PAGE_SIZE)
+    end = position + size
+
+    page = {key: items[position:end]}
+    if end < len(items):
+        page['nextPageToken'] = str(end)
+    return page
+
+
+class Execution(object):
+    """State of a workflow execution run
+
+    :param  domain: name of the domain of the execution
+    :type   domain: str
+
+    :param  workflow_id: user defined id of the execution
+    :type   workflow_id: str
+
+    :param  run_id: id of the run
+    :type   run_id: str
+
+    :param  configuration: workflow type, task list, child policy and
+                           timeouts of the execution
+    :type   configuration: dict
+    """
+    def __init__(self, domain, workflow_id, run_id, configuration,
+                 tag_list=None, parent=None):
+        self.domain = domain
+        self.workflow_id = workflow_id
+        self.run_id = run_id
+        self.configuration = configuration
+        self.tag_list = tag_list or []
+        self.parent = parent  # (parent execution, initiated event id)
+
+        self.events = []
+        self.status = OPEN
+        self.close_status = None
+        self.start_timestamp = None
+        self.close_timestamp = None
+        self.cancel_requested = False
+        self.latest_execution_context = None
+        self.latest_activity_task_timestamp = None
+
+        self.decision_scheduled_id = None
+        self.decision_started_id = None
+        self.decision_token = None
+        self.decision_needed = False
+        self.previous_started_id = 0
+
+        self.activities = {}  # activity id to its Activity
+        self.timers = {}  # timer id to its started event id
+        self.children = {}  # child run id to its initiated, started ids
+
+    @property
+    def workflow_type(self):
+        return self.configuration['workflowType']
+
+    @property
+    def task_list(self):
+        return self.configuration['taskList']['name']
+
+    @property
+    def reference(self):
+        return {'workflowId': self.workflow_id, 'runId': self.run_id}
+
+    @property
+    def is_open(self):
+        return self.status == OPEN
+
+    def info(self):
+        """Amazon description of the execution
+
+        :rtype: dict
+        """
+        info = {
+            'execution': self.reference,
+            'workflowType': self.workflow_type,
+            'startTimestamp': self.start_timestamp,
+            'executionStatus': self.status,
+            'cancelRequested': self.cancel_requested,
+            'tagList': self.tag_list,
+        }
+        if self.status == CLOSED:
+            info['closeStatus'] = self.close_status
+            info['closeTimestamp'] = self.close_timestamp
+        if self.parent:
+            info['parent'] = self.parent[0]
+        return info
+
+
+class Activity(object):
+    """State of an activity task of an execution"""
+    def __init__(self, activity_id, scheduled_id, activity_type):
+        self.activity_id = activity_id
+        self.scheduled_id = scheduled_id
+        self.activity_type = activity_type
+        self.started_id = None
+        self.cancel_requested_id = None
+        self.token = None
+
+
+class SWFSimulator(object):
+    """In-memory SWF service
+
+    Requests are served by the method named after their action, as
+    ``poll_for_decision_task`` for ``PollForDecisionTask``, which takes the
+    decoded request data and returns the response data. Requests can be
+    made from several threads.
+
+    :param  poll_timeout: seconds a poll waits for a task before returning
+                          an empty response
+    :type   poll_timeout: float
+
+    :param  clock: returns the current time, in seconds since the epoch
+    :type   clock: callable
+    """
+    def __init__(self, poll_timeout=POLL_TIMEOUT, clock=time.time):
+        self.poll_timeout = poll_timeout
+        self.clock = clock
+
+        self.domains = {}
+        self.activity_types = {}  # (domain, name, version) to description
+        self.workflow_types = {}
+        self.executions = {}  # run id to Execution
+        self.open_executions = {}  # (domain, workflow id) to Execution
+
+        self._decision_queues = defaultdict(deque)  # (domain, task list)
+        self._activity_queues = defaultdict(deque)
+        self._tokens = {}  # task token to (run id, activity id or None)
+        self._timers = []  # heap of (fire time, sequence, run id, timer id)
+        self._sequence = itertools.count()
+
+        self._condition = threading.Condition(threading.RLock())
+
+    def new_id(self):
+        """Returns a new run id or task token"""
+        return uuid.uuid4().hex
+
+    def request(self, action, data):
+        """Serves the *action* request
+
+        :param  action: amazon name of the action, as
+                        ``PollForDecisionTask``
+        :type   action: str
+
+        :param  data: decoded request body
+        :type   data: dict
+
+        :returns: the response data, that shares structures with the
+                  simulator state and must not be modified
+        :rtype: dict
+
+        :raises: Fault
+        """
+        if action not in ACTIONS:
+            raise Fault('UnknownOperationException',
+                        'Unknown action: {}'.format(action))
+        handler = getattr(self, camel_to_underscore(action))
+
+        with self._condition:
+            self._fire_timers()
+            return handler(data)
+
+    # Registrations
+
+    def _domain(self, name, registered=False):
+        domain = self.domains.get(name)
+        if domain is None:
+            raise unknown('domain', name)
+        if registered and domain['domainInfo']['status'] != REGISTERED:
+            raise Fault('DomainDeprecatedFault', name)
+        return domain
+
+    def register_domain(self, data):
+        name = data['name']
+        if name in self.domains:
+            raise Fault('DomainAlreadyExistsFault', name)
+
+        self.domains[name] = {
+            'domainInfo': dict(name=name, status=REGISTERED,
+                               **described(data)),
+            'configuration': {
+                'workflowExecutionRetentionPeriodInDays':
+                    data['workflowExecutionRetentionPeriodInDays'],
+            },
+        }
+
+    def describe_domain(self, data):
+        return self._domain(data['name'])
+
+    def deprecate_domain(self, data):
+        self._domain(data['name'], registered=True)['domainInfo'][
+            'status'] = DEPRECATED
+
+    def list_domains(self, data):
+        infos = sorted((domain['domainInfo'] for
+                        domain in self.domains.itervalues() if
+                        domain['domainInfo']['status'] ==
+                        data['registrationStatus']),
+                       key=lambda info: info['name'],
+                       reverse=bool(data.get('reverseOrder')))
+        return paginate(infos, data, 'domainInfos')
+
+    def _type(self, kind, data):
+        """Returns the registered type of *kind* described in *data*"""
+        types = getattr(self, camel_to_underscore(kind) + 's')
+        reference = data[decapitalize(kind)]
+        key = (data['domain'], reference['name'], reference['version'])
+
+        self._domain(data['domain'])
+        if key not in types:
+            raise unknown('type', '{}=[name={}, version={}]'.format(
+                kind, reference['name'], reference['version']))
+        return types[key]
+
+    def _register_type(self, kind, data, configuration):
+        types = getattr(self, camel_to_underscore(kind) + 's')
+        key = (data['domain'], data['name'], data['version'])
+
+        self._domain(data['domain'], registered=True)
+        if key in types:
+            raise Fault('TypeAlreadyExistsFault',
+                        '{}=[name={}, version={}]'.format(kind, *key[1:]))
+
+        types[key] = {
+            'typeInfo': dict({
+                decapitalize(kind): {'name': data['name'],
+                                     'version': data['version']},
+                'status': REGISTERED,
+                'creationDate': self.clock(),
+            }, **described(data)),
+            'configuration': dict(
+                (name, data[name]) for name in configuration if name in data
+            ),
+        }
+
+    def _deprecate_type(self, kind, data):
+        info = self._type(kind, data)['typeInfo']
+        if info['status'] != REGISTERED:
+            raise Fault('TypeDeprecatedFault', '{}=[name={}, version={}]'.format(
+                kind, info[decapitalize(kind)]['name'],
+                info[decapitalize(kind)]['version']))
+
+        info['status'] = DEPRECATED
+        info['deprecationDate'] = self.clock()
+
+    def _list_types(self, kind, data):
+        self._domain(data['domain'])
+        types = getattr(self, camel_to_underscore(kind) + 's')
+
+        infos = sorted((
+            description['typeInfo'] for
+            (domain, name, _), description in types.iteritems() if
+            domain == data['domain'] and
+            description['typeInfo']['status'] == data['registrationStatus'] and
+            data.get('name') in (None, name)
+        ), key=lambda info: (info[decapitalize(kind)]['name'],
+                             info[decapitalize(kind)]['version']),
+            reverse=bool(data.get('reverseOrder')))
+        return paginate(infos, data, 'typeInfos')
+
+    def register_activity_type(self, data):
+        self._register_type('ActivityType', data, (
+            'defaultTaskList',
+            'defaultTaskHeartbeatTimeout',
+            'defaultTaskScheduleToCloseTimeout',
+            'defaultTaskScheduleToStartTimeout',
+            'defaultTaskStartToCloseTimeout',
+        ))
+
+    def describe_activity_type(self, data):
+        return self._type('ActivityType', data)
+
+    def deprecate_activity_type(self, data):
+        self._deprecate_type('ActivityType', data)
+
+    def list_activity_types(self, data):
+        return self._list_types('ActivityType', data)
+
+    def register_workflow_type(self, data):
+        self._register_type('WorkflowType', data, (
+            'defaultTaskList',
+            'defaultChildPolicy',
+            'defaultExecutionStartToCloseTimeout',
+            'defaultTaskStartToCloseTimeout',
+        ))
+
+    def describe_workflow_type(self, data):
+        return self._type('WorkflowType', data)
+
+    def deprecate_workflow_type(self, data):
+        self._deprecate_type('WorkflowType', data)
+
+    def list_workflow_types(self, data):
+        return self._list_types('WorkflowType', data)
+
+    # Workflow executions
+
+    def _execution(self, data):
+        reference = data['execution']
+        execution = self.executions.get(reference.get('runId'))
+
+        if (execution is None or
+                execution.domain != data['domain'] or
+                execution.workflow_id != reference.get('workflowId')):
+            self._domain(data['domain'])
+            raise unknown('execution',
+                          'WorkflowExecution=[workflowId={}, runId={}]'.format(
+                              reference.get('workflowId'),
+                              reference.get('runId')))
+        return execution
+
+    def _open_execution(self, domain, workflow_id, run_id=None):
+        self._domain(domain)
+        execution = self.open_executions.get((domain, workflow_id))
+
+        if execution is None or run_id not in (None, execution.run_id):
+            raise unknown('execution',
+                          'WorkflowExecution=[workflowId={}, runId={}]'.format(
+                              workflow_id, run_id))
+        return execution
+
+    def _add_event(self, execution, event_type, **attributes):
+        """Appends an *event_type* event to the history of *execution*
+
+        :returns: the id of the event
+        :rtype: int
+        """
+        event_id = len(execution.events) + 1
+        execution.events.append({
+            'eventId': event_id,
+            'eventType': event_type,
+            'eventTimestamp': self.clock(),
+            decapitalize(event_type) + 'EventAttributes': dict(
+                (name, value) for name, value in attributes.iteritems() if
+                value is not None
+            ),
+        })
+        return event_id
+
+    def _start(self, domain, workflow_id, data, parent=None):
+        """Starts an execution of the workflow type of *data*
+
+        :returns: the started execution
+        :rtype: Execution
+
+        :raises: Fault
+        """
+        workflow_type = data['workflowType']
+        description = self._type('WorkflowType', {
+            'domain': domain,
+            'workflowType': workflow_type,
+        })
+        if description['typeInfo']['status'] != REGISTERED:
+            raise Fault('TypeDeprecatedFault',
+                        'WorkflowType=[name={}, version={}]'.format(
+                            workflow_type['name'], workflow_type['version']))
+        if (domain, workflow_id) in self.open_executions:
+            raise Fault('WorkflowExecutionAlreadyStartedFault', workflow_id)
+
+        defaults = description['configuration']
+        configuration = {
+            'workflowType': {'name': workflow_type['name'],
+                             'version': workflow_type['version']},
+            'taskList': data.get('taskList') or defaults.get(
+                'defaultTaskList'),
+            'childPolicy': data.get('childPolicy') or defaults.get(
+                'defaultChildPolicy'),
+            'executionStartToCloseTimeout': data.get(
+                'executionStartToCloseTimeout') or defaults.get(
+                'defaultExecutionStartToCloseTimeout'),
+            'taskStartToCloseTimeout': data.get(
+                'taskStartToCloseTimeout') or defaults.get(
+                'defaultTaskStartToCloseTimeout'),
+        }
+        for name, value in configuration.iteritems():
+            if value is None:
+                raise Fault('DefaultUndefinedFault', name)
+
+        execution = Execution(domain, workflow_id, self.new_id(),
+                              configuration, data.get('tagList'), parent)
+        execution.start_timestamp = self.clock()
+        self.executions[execution.run_id] = execution
+        self.open_executions[(domain, workflow_id)] = execution
+
+        parent_attributes = {}
+        if parent:
+            parent_attributes = {
+                'parentWorkflowExecution': parent[0],
+                'parentInitiatedEventId': parent[1],
+            }
+        self._add_event(
+            execution, 'WorkflowExecutionStarted',
+            input=data.get('input'),
+            tagList=data.get('tagList'),
+            continuedExecutionRunId=data.get('continuedExecutionRunId'),
+            **dict(configuration, **parent_attributes)
+        )
+        self._schedule_decision(execution)
+
+        return execution
+
+    def _close(self, execution, event_type, **attributes):
+        """Closes *execution* with an *event_type* event"""
+        self._add_event(execution, event_type, **attributes)
+
+        execution.status = CLOSED
+        execution.close_status = CLOSE_STATUSES[event_type]
+        execution.close_timestamp = self.clock()
+        del self.open_executions[(execution.domain, execution.workflow_id)]
+
+        for activity in execution.activities.itervalues():
+            self._tokens.pop(activity.token, None)
+        execution.activities.clear()
+        execution.timers.clear()
+
+        self._close_children(execution)
+        self._notify_parent(execution, attributes)
+
+    def _close_children(self, execution):
+        """Applies the child policy of *execution* to its open children"""
+        child_policy = execution.configuration['childPolicy']
+
+        for run_id in list(execution.children):
+            child = self.executions[run_id]
+            if not child.is_open:
+                continue
+            if child_policy == 'TERMINATE':
+                self._close(child, 'WorkflowExecutionTerminated',
+                            childPolicy=child.configuration['childPolicy'],
+                            cause='PARENT_TERMINATED')
+            elif child_policy == 'REQUEST_CANCEL':
+                self._request_cancel(child)
+
+    def _notify_parent(self, execution, attributes):
+        if not execution.parent:
+            return
+
+        parent = self.executions[execution.parent[0]['runId']]
+        event_ids = parent.children.pop(execution.run_id, None)
+        if not parent.is_open or event_ids is None:
+            return
+
+        if execution.close_status == 'CONTINUED_AS_NEW':
+            # The new run takes the place of the closed one
+            parent.children[attributes['newExecutionRunId']] = event_ids
+            return
+
+        event_type, names = CHILD_CLOSE_EVENTS[execution.close_status]
+        self._add_event(
+            parent, event_type,
+            workflowExecution=execution.reference,
+            workflowType=execution.workflow_type,
+            initiatedEventId=event_ids[0],
+            startedEventId=event_ids[1],
+            **dict((name, attributes.get(name)) for name in names)
+        )
+        self._schedule_decision(parent)
+
+    def _request_cancel(self, execution, **attributes):
+        execution.cancel_requested = True
+        self._add_event(execution, 'WorkflowExecutionCancelRequested',
+                        **attributes)
+        self._schedule_decision(execution)
+
+    def start_workflow_execution(self, data):
+        self._domain(data['domain'], registered=True)
+        execution = self._start(data['domain'], data['workflowId'], data)
+        self._condition.notify_all()
+
+        return {'runId': execution.run_id}
+
+    def describe_workflow_execution(self, data):
+        execution = self._execution(data)
+
+        description = {
+            'executionInfo': execution.info(),
+            'executionConfiguration': dict(
+                (name, value) for name, value in
+                execution.configuration.iteritems() if name != 'workflowType'
+            ),
+            'openCounts': {
+                'openActivityTasks': len(execution.activities),
+                'openDecisionTasks': int(
+                    execution.decision_scheduled_id is not None),
+                'openTimers': len(execution.timers),
+                'openChildWorkflowExecutions': len(execution.children),
+            },
+        }
+        if execution.latest_execution_context is not None:
+            description['latestExecutionContext'] = \
+                execution.latest_execution_context
+        if execution.latest_activity_task_timestamp is not None:
+            description['latestActivityTaskTimestamp'] = \
+                execution.latest_activity_task_timestamp
+
+        return description
+
+    def get_workflow_execution_history(self, data):
+        events = self._execution(data).events
+        if data.get('reverseOrder'):
+            events = events[::-1]
+
+        return paginate(events, data, 'events')
+
+    def _filter_executions(self, data, status):
+        self._domain(data['domain'])
+
+        def timestamp_in(timestamp, time_filter):
+            if not time_filter:
+                return True
+            return (timestamp is not None and
+                    time_filter.get('oldestDate', timestamp) <= timestamp <=
+                    time_filter.get('latestDate', timestamp))
+
+        type_filter = data.get('typeFilter', {})
+        workflow_id = data.get('executionFilter', {}).get('workflowId')
+        tag = data.get('tagFilter', {}).get('tag')
+        close_status = data.get('closeStatusFilter', {}).get('status')
+
+        return [
+            execution for execution in self.executions.itervalues() if
+            execution.domain == data['domain'] and
+            execution.status == status and
+            timestamp_in(execution.start_timestamp,
+                         data.get('startTimeFilter')) and
+            timestamp_in(execution.close_timestamp,
+                         data.get('closeTimeFilter')) and
+            type_filter.get('name') in (None,
+                                        execution.workflow_type['name']) and
+            type_filter.get('version') in (
+                None, execution.workflow_type['version']) and
+            workflow_id in (None, execution.workflow_id) and
+            (tag is None or tag in execution.tag_list) and
+            close_status in (None, execution.close_status)
+        ]
+
+    def _list_executions(self, data, status):
+        if 'closeTimeFilter' in data:
+            key = lambda execution: execution.close_timestamp
+        else:
+            key = lambda execution: execution.start_timestamp
+
+        executions = sorted(self._filter_executions(data, status), key=key,
+                            reverse=not data.get('reverseOrder'))
+        return paginate([execution.info() for execution in executions],
+                        data, 'executionInfos')
+
+    def list_open_workflow_executions(self, data):
+        return self._list_executions(data, OPEN)
+
+    def list_closed_workflow_executions(self, data):
+        return self._list_executions(data, CLOSED)
+
+    def count_open_workflow_executions(self, data):
+        return {'count': len(self._filter_executions(data, OPEN)),
+                'truncated': False}
+
+    def count_closed_workflow_executions(self, data):
+        return {'count': len(self._filter_executions(data, CLOSED)),
+                'truncated': False}
+
+    def signal_workflow_execution(self, data):
+        execution = self._open_execution(data['domain'], data['workflowId'],
+                                         data.get('runId'))
+        self._add_event(execution, 'WorkflowExecutionSignaled',
+                        signalName=data['signalName'],
+                        input=data.get('input'))
+        self._schedule_decision(execution)
+        self._condition.notify_all()
+
+    def request_cancel_workflow_execution(self, data):
+        execution = self._open_execution(data['domain'], data['workflowId'],
+                                         data.get('runId'))
+        self._request_cancel(execution)
+        self._condition.notify_all()
+
+    def terminate_workflow_execution(self, data):
+        execution = self._open_execution(data['domain'], data['workflowId'],
+                                         data.get('runId'))
+        self._close(execution, 'WorkflowExecutionTerminated',
+                    reason=data.get('reason'),
+                    details=data.get('details'),
+                    childPolicy=(data.get('childPolicy') or
+                                 execution.configuration['childPolicy']))
+        self._condition.notify_all()
+
+    # Tasks
+
+    def _wait(self, take):
+        """Calls *take* until it returns a task, or until the poll times
+        out
+
+        :returns: the task, or None
+        """
+        deadline = self.clock() + self.poll_timeout
+        while True:
+            task = take()
+            if task is not None:
+                return task
+
+            now = self.clock()
+            if now >= deadline:
+                return None
+
+            timeout = deadline - now
+            if self._timers:
+                timeout = max(min(timeout, self._timers[0][0] - now), 0)
+            self._condition.wait(timeout)
+            self._fire_timers()
+
+    def _schedule_decision(self, execution):
+        """Schedules a decision task, unless one is already scheduled"""
+        if not execution.is_open:
+            return
+        if execution.decision_started_id is not None:
+            execution.decision_needed = True
+            return
+        if execution.decision_scheduled_id is not None:
+            return
+
+        execution.decision_scheduled_id = self._add_event(
+            execution, 'DecisionTaskScheduled',
+            taskList=execution.configuration['taskList'],
+            startToCloseTimeout=execution.configuration[
+                'taskStartToCloseTimeout'],
+        )
+        self._decision_queues[(execution.domain,
+                               execution.task_list)].append(execution.run_id)
+
+    def _decision_page(self, execution, token, count, data):
+        """Returns the page of the first *count* events of *execution*
+        requested by *data*"""
+        events = execution.events[:count]
+        if data.get('reverseOrder'):
+            events = events[::-1]
+
+        page = paginate(events, data, 'events')
+        if 'nextPageToken' in page:
+            page['nextPageToken'] = '{}:{}:{}'.format(
+                token, count, page['nextPageToken'])
+
+        page.update({
+            'taskToken': token,
+            'workflowExecution': execution.reference,
+            'workflowType': execution.workflow_type,
+            'startedEventId': execution.decision_started_id,
+            'previousStartedEventId': execution.previous_started_id,
+        })
+        return page
+
+    def poll_for_decision_task(self, data):
+        self._domain(data['domain'])
+
+        if data.get('nextPageToken'):
+            try:
+                token, count, position = data['nextPageToken'].split(':')
+                run_id, _ = self._tokens[token]
+                count = int(count)
+            except (ValueError, KeyError):
+                raise validation_error('invalid next page token')
+            return self._decision_page(self.executions[run_id], token, count,
+                                       dict(data, nextPageToken=position))
+
+        queue = self._decision_queues[(data['domain'],
+                                       data['taskList']['name'])]
+
+        def take():
+            while queue:
+                execution = self.executions[queue.popleft()]
+                if (execution.is_open and
+                        execution.decision_scheduled_id is not None):
+                    return execution
+
+        execution = self._wait(take)
+        if execution is None:
+            return {'previousStartedEventId': 0, 'startedEventId': 0}
+
+        execution.decision_started_id = self._add_event(
+            execution, 'DecisionTaskStarted',
+            scheduledEventId=execution.decision_scheduled_id,
+            identity=data.get('identity'),
+        )
+        token = execution.decision_token = self.new_id()
+        self._tokens[token] = (execution.run_id, None)
+
+        return self._decision_page(execution, token, len(execution.events),
+                                   data)
+
+    def _task(self, token, activity=False):
+        """Returns the execution, and the activity if *activity*, of the
+        task with *token*"""
+        run_id, activity_id = self._tokens.get(token, (None, None))
+        execution = self.executions.get(run_id)
+
+        if (execution is None or not execution.is_open or
+                (activity_id is None) == activity):
+            raise unknown('task token', token)
+        if activity:
+            return execution, execution.activities[activity_id]
+        return execution
+
+    def respond_decision_task_completed(self, data):
+        token = data['taskToken']
+        execution = self._task(token)
+
+        decisions = data.get('decisions') or ()
+        for decision in decisions:
+            if not hasattr(self, '_decide_' + camel_to_underscore(
+                    decision['decisionType'])):
+                raise validation_error('invalid decision type: {}'.format(
+                    decision['decisionType']))
+        del self._tokens[token]
+
+        started_id = execution.decision_started_id
+        completed_id = self._add_event(
+            execution, 'DecisionTaskCompleted',
+            scheduledEventId=execution.decision_scheduled_id,
+            startedEventId=started_id,
+            executionContext=data.get('executionContext'),
+        )
+        execution.decision_scheduled_id = None
+        execution.decision_started_id = None
+        execution.decision_token = None
+        execution.previous_started_id = started_id
+        if data.get('executionContext') is not None:
+            execution.latest_execution_context = data['executionContext']
+
+        for decision in decisions:
+            if not execution.is_open:
+                break
+            decision_type = decision['decisionType']
+            handler = getattr(self, '_decide_' + camel_to_underscore(
+                decision_type))
+            handler(execution, completed_id, decision.get(
+                decapitalize(decision_type) + 'DecisionAttributes') or {})
+
+        if execution.decision_needed:
+            execution.decision_needed = False
+            self._schedule_decision(execution)
+        self._condition.notify_all()
+
+    def poll_for_activity_task(self, data):
+        self._domain(data['domain'])
+        queue = self._activity_queues[(data['domain'],
+                                       data['taskList']['name'])]
+
+        def take():
+            while queue:
+                run_id, activity_id, scheduled_id = queue.popleft()
+                activity = self.executions[run_id].activities.get(
+                    activity_id)
+                if (activity is not None and
+                        activity.scheduled_id == scheduled_id):
+                    return self.executions[run_id], activity
+
+        task = self._wait(take)
+        if task is None:
+            return {'startedEventId': 0}
+
+        execution, activity = task
+        activity.started_id = self._add_event(
+            execution, 'ActivityTaskStarted',
+            scheduledEventId=activity.scheduled_id,
+            identity=data.get('identity'),
+        )
+        activity.token = self.new_id()
+        self._tokens[activity.token] = (execution.run_id,
+                                        activity.activity_id)
+        execution.latest_activity_task_timestamp = self.clock()
+
+        scheduled = execution.events[activity.scheduled_id - 1][
+            'activityTaskScheduledEventAttributes']
+        task = {
+            'taskToken': activity.token,
+            'activityId': activity.activity_id,
+            'activityType': activity.activity_type,
+            'startedEventId': activity.started_id,
+            'workflowExecution': execution.reference,
+        }
+        if 'input' in scheduled:
+            task['input'] = scheduled['input']
+        return task
+
+    def _close_activity(self, data, event_type, **attributes):
+        token = data['taskToken']
+        execution, activity = self._task(token, activity=True)
+        del self._tokens[token]
+        del execution.activities[activity.activity_id]
+
+        self._add_event(execution, event_type,
+                        scheduledEventId=activity.scheduled_id,
+                        startedEventId=activity.started_id,
+                        **attributes)
+        self._schedule_decision(execution)
+        self._condition.notify_all()
+
+        return activity
+
+    def respond_activity_task_completed(self, data):
+        self._close_activity(data, 'ActivityTaskCompleted',
+                             result=data.get('result'))
+
+    def respond_activity_task_failed(self, data):
+        self._close_activity(data, 'ActivityTaskFailed',
+                             reason=data.get('reason'),
+                             details=data.get('details'))
+
+    def respond_activity_task_canceled(self, data):
+        execution, activity = self._task(data['taskToken'], activity=True)
+        self._close_activity(
+            data, 'ActivityTaskCanceled',
+            details=data.get('details'),
+            latestCancelRequestedEventId=activity.cancel_requested_id,
+        )
+
+    def record_activity_task_heartbeat(self, data):
+        execution, activity = self._task(data['taskToken'], activity=True)
+        execution.latest_activity_task_timestamp = self.clock()
+
+        return {'cancelRequested': activity.cancel_requested_id is not None}
+
+    def count_pending_decision_tasks(self, data):
+        self._domain(data['domain'])
+        queue = self._decision_queues[(data['domain'],
+                                       data['taskList']['name'])]
+        return {'count': sum(1 for run_id in queue if
+                             self.executions[run_id].is_open),
+                'truncated': False}
+
+    def count_pending_activity_tasks(self, data):
+        self._domain(data['domain'])
+        queue = self._activity_queues[(data['domain'],
+                                       data['taskList']['name'])]
+        activities = (self.executions[run_id].activities.get(activity_id) for
+                      run_id, activity_id, _ in queue)
+        return {'count': sum(1 for activity in activities if
+                             activity and activity.started_id is None),
+                'truncated': False}
+
+    # Timers
+
+    def _add_timer(self, execution, timer_id, started_id):
+        """Fires the timer started by the *started_id* event when due"""
+        started = execution.events[started_id - 1]
+        fire_at = started['eventTimestamp'] + float(
+            started['timerStartedEventAttributes']['startToFireTimeout'])
+
+        heapq.heappush(self._timers, (fire_at, next(self._sequence),
+                                      execution.run_id, timer_id,
+                                      started_id))
+
+    def _fire_timers(self):
+        now = self.clock()
+        timers = self._timers
+        fired = False
+
+        while timers and timers[0][0] <= now:
+            _, _, run_id, timer_id, started_id = heapq.heappop(timers)
+            execution = self.executions[run_id]
+            if execution.timers.get(timer_id) != started_id:
+                continue  # canceled, or the execution is closed
+
+            del execution.timers[timer_id]
+            self._add_event(execution, 'TimerFired', timerId=timer_id,
+                            startedEventId=started_id)
+            self._schedule_decision(execution)
+            fired = True
+
+        if fired:
+            self._condition.notify_all()
+
+    # Decisions, applied by ``_decide_<decision type>`` methods
+
+    def _decide_schedule_activity_task(self, execution, completed_id,
+                                       attributes):
+        activity_id = attributes['activityId']
+        activity_type = attributes['activityType']
+
+        try:
+            description = self._type('ActivityType', {
+                'domain': execution.domain,
+                'activityType': activity_type,
+            })
+        except Fault:
+            cause = 'ACTIVITY_TYPE_DOES_NOT_EXIST'
+        else:
+            cause = None
+            if description['typeInfo']['status'] != REGISTERED:
+                cause = 'ACTIVITY_TYPE_DEPRECATED'
+            elif activity_id in execution.activities:
+                cause = 'ACTIVITY_ID_ALREADY_IN_USE'
+
+        if cause is not None:
+            self._add_event(execution, 'ScheduleActivityTaskFailed',
+                            activityId=activity_id,
+                            activityType=activity_type,
+                            cause=cause,
+                            decisionTaskCompletedEventId=completed_id)
+            self._schedule_decision(execution)
+            return
+
+        defaults = description['configuration']
+        task_list = (attributes.get('taskList') or
+                     defaults.get('defaultTaskList'))
+        scheduled_id = self._add_event(
+            execution, 'ActivityTaskScheduled',
+            activityId=activity_id,
+            activityType=activity_type,
+            input=attributes.get('input'),
+            control=attributes.get('control'),
+            taskList=task_list,
+            decisionTaskCompletedEventId=completed_id,
+            scheduleToStartTimeout=attributes.get(
+                'scheduleToStartTimeout') or defaults.get(
+                'defaultTaskScheduleToStartTimeout'),
+            scheduleToCloseTimeout=attributes.get(
+                'scheduleToCloseTimeout') or defaults.get(
+                'defaultTaskScheduleToCloseTimeout'),
+            startToCloseTimeout=attributes.get(
+                'startToCloseTimeout') or defaults.get(
+                'defaultTaskStartToCloseTimeout'),
+            heartbeatTimeout=attributes.get(
+                'heartbeatTimeout') or defaults.get(
+                'defaultTaskHeartbeatTimeout'),
+        )
+        execution.activities[activity_id] = Activity(
+            activity_id, scheduled_id, activity_type)
+        self._activity_queues[(execution.domain, task_list['name'])].append(
+            (execution.run_id, activity_id, scheduled_id))
+
+    def _decide_request_cancel_activity_task(self, execution, completed_id,
+                                             attributes):
+        activity_id = attributes['activityId']
+        activity = execution.activities.get(activity_id)
+
+        if activity is None:
+            self._add_event(execution, 'RequestCancelActivityTaskFailed',
+                            activityId=activity_id,
+                            cause='ACTIVITY_ID_UNKNOWN',
+                            decisionTaskCompletedEventId=completed_id)
+            self._schedule_decision(execution)
+            return
+
+        activity.cancel_requested_id = self._add_event(
+            execution, 'ActivityTaskCancelRequested',
+            activityId=activity_id,
+            decisionTaskCompletedEventId=completed_id)
+
+        if activity.started_id is None:
+            # Not handed out yet: canceled right away
+            del execution.activities[activity_id]
+            self._add_event(
+                execution, 'ActivityTaskCanceled',
+                scheduledEventId=activity.scheduled_id,
+                latestCancelRequestedEventId=activity.cancel_requested_id)
+            self._schedule_decision(execution)
+
+    def _decide_start_timer(self, execution, completed_id, attributes):
+        timer_id = attributes['timerId']
+
+        if timer_id in execution.timers:
+            self._add_event(execution, 'StartTimerFailed',
+                            timerId=timer_id,
+                            cause='TIMER_ID_ALREADY_IN_USE',
+                            decisionTaskCompletedEventId=completed_id)
+            self._schedule_decision(execution)
+            return
+
+        started_id = self._add_event(
+            execution, 'TimerStarted',
+            timerId=timer_id,
+            control=attributes.get('control'),
+            startToFireTimeout=attributes['startToFireTimeout'],
+            decisionTaskCompletedEventId=completed_id)
+        execution.timers[timer_id] = started_id
+
+        self._add_timer(execution, timer_id, started_id)
+
+    def _decide_cancel_timer(self, execution, completed_id, attributes):
+        timer_id = attributes['timerId']
+        started_id = execution.timers.pop(timer_id, None)
+
+        if started_id is None:
+            self._add_event(execution, 'CancelTimerFailed',
+                            timerId=timer_id,
+                            cause='TIMER_ID_UNKNOWN',
+                            decisionTaskCompletedEventId=completed_id)
+            self._schedule_decision(execution)
+            return
+
+        self._add_event(execution, 'TimerCanceled',
+                        timerId=timer_id,
+                        startedEventId=started_id,
+                        decisionTaskCompletedEventId=completed_id)
+
+    def _decide_record_marker(self, execution, completed_id, attributes):
+        self._add_event(execution, 'MarkerRecorded',
+                        markerName=attributes['markerName'],
+                        details=attributes.get('details'),
+                        decisionTaskCompletedEventId=completed_id)
+
+    def _decide_complete_workflow_execution(self, execution, completed_id,
+                                            attributes):
+        self._close(execution, 'WorkflowExecutionCompleted',
+                    result=attributes.get('result'),
+                    decisionTaskCompletedEventId=completed_id)
+
+    def _decide_fail_workflow_execution(self, execution, completed_id,
+                                        attributes):
+        self._close(execution, 'WorkflowExecutionFailed',
+                    reason=attributes.get('reason'),
+                    details=attributes.get('details'),
+                    decisionTaskCompletedEventId=completed_id)
+
+    def _decide_cancel_workflow_execution(self, execution, completed_id,
+                                          attributes):
+        self._close(execution, 'WorkflowExecutionCanceled',
+                    details=attributes.get('details'),
+                    decisionTaskCompletedEventId=completed_id)
+
+    def _decide_continue_as_new_workflow_execution(self, execution,
+                                                   completed_id, attributes):
+        data = dict(attributes, workflowType={
+            'name': execution.workflow_type['name'],
+            'version': (attributes.get('workflowTypeVersion') or
+                        execution.workflow_type['version']),
+        }, continuedExecutionRunId=execution.run_id)
+        for name in ('taskList', 'childPolicy', 'taskStartToCloseTimeout',
+                     'executionStartToCloseTimeout'):
+            data.setdefault(name, execution.configuration[name])
+        if isinstance(data['taskList'], basestring):
+            data['taskList'] = {'name': data['taskList']}
+
+        # The workflow id is released for the new run
+        del self.open_executions[(execution.domain, execution.workflow_id)]
+        try:
+            new_execution = self._start(execution.domain,
+                                        execution.workflow_id, data,
+                                        parent=execution.parent)
+        except Fault as fault:
+            self.open_executions[(execution.domain,
+                                  execution.workflow_id)] = execution
+            self._add_event(execution, 'ContinueAsNewWorkflowExecutionFailed',
+                            cause=fault.type.split('#')[-1],
+                            decisionTaskCompletedEventId=completed_id)
+            self._schedule_decision(execution)
+            return
+        self.open_executions[(execution.domain,
+                              execution.workflow_id)] = execution
+
+        self._close(execution, 'WorkflowExecutionContinuedAsNew',
+                    input=attributes.get('input'),
+                    newExecutionRunId=new_execution.run_id,
+                    tagList=attributes.get('tagList'),
+                    decisionTaskCompletedEventId=completed_id,
+                    **new_execution.configuration)
+        self.open_executions[(execution.domain,
+                              execution.workflow_id)] = new_execution
+
+    def _decide_start_child_workflow_execution(self, execution, completed_id,
+                                               attributes):
+        workflow_id = attributes['workflowId']
+        initiated_id = self._add_event(
+            execution, 'StartChildWorkflowExecutionInitiated',
+            decisionTaskCompletedEventId=completed_id,
+            **attributes)
+
+        try:
+            child = self._start(execution.domain, workflow_id, attributes,
+                                parent=(execution.reference, initiated_id))
+        except Fault as fault:
+            cause = {
+                'WorkflowExecutionAlreadyStartedFault':
+                    'WORKFLOW_ALREADY_RUNNING',
+                'UnknownResourceFault': 'WORKFLOW_TYPE_DOES_NOT_EXIST',
+                'TypeDeprecatedFault': 'WORKFLOW_TYPE_DEPRECATED',
+            }.get(fault.type.split('#')[-1], 'OPERATION_NOT_PERMITTED')
+            self._add_event(execution, 'StartChildWorkflowExecutionFailed',
+                            workflowId=workflow_id,
+                            workflowType=attributes['workflowType'],
+                            cause=cause,
+                            initiatedEventId=initiated_id,
+                            control=attributes.get('control'),
+                            decisionTaskCompletedEventId=completed_id)
+            self._schedule_decision(execution)
+            return
+
+        started_id = self._add_event(execution,
+                                     'ChildWorkflowExecutionStarted',
+                                     workflowExecution=child.reference,
+                                     workflowType=child.workflow_type,
+                                     initiatedEventId=initiated_id)
+        execution.children[child.run_id] = (initiated_id, started_id)
+        self._schedule_decision(execution)
+
+    def _external(self, execution, completed_id, attributes, kind):
+        """Records the initiation of a *kind* decision on an external
+        execution
+
+        :returns: the external execution, or None if it failed
+        """
+        initiated_id = self._add_event(
+            execution, '{}ExternalWorkflowExecutionInitiated'.format(kind),
+            decisionTaskCompletedEventId=completed_id,
+            **attributes)
+
+        target = self.open_executions.get((execution.domain,
+                                           attributes['workflowId']))
+        if target is None or attributes.get('runId') not in (
+                None, target.run_id):
+            self._add_event(execution,
+                            '{}ExternalWorkflowExecutionFailed'.format(kind),
+                            workflowId=attributes['workflowId'],
+                            runId=attributes.get('runId'),
+                            cause='UNKNOWN_EXTERNAL_WORKFLOW_EXECUTION',
+                            initiatedEventId=initiated_id,
+                            control=attributes.get('control'),
+                            decisionTaskCompletedEventId=completed_id)
+            self._schedule_decision(execution)
+            return None, initiated_id
+
+        return target, initiated_id
+
+    def _decide_signal_external_workflow_execution(self, execution,
+                                                   completed_id, attributes):
+        target, initiated_id = self._external(execution, completed_id,
+                                              attributes, 'Signal')
+        if target is None:
+            return
+
+        self._add_event(target, 'WorkflowExecutionSignaled',
+                        signalName=attributes['signalName'],
+                        input=attributes.get('input'),
+                        externalWorkflowExecution=execution.reference,
+                        externalInitiatedEventId=initiated_id)
+        self._schedule_decision(target)
+        self._add_event(execution, 'ExternalWorkflowExecutionSignaled',
+                        workflowExecution=target.reference,
+                        initiatedEventId=initiated_id)
+        self._schedule_decision(execution)
+
+    def _decide_request_cancel_external_workflow_execution(
+            self, execution, completed_id, attributes):
+        target, initiated_id = self._external(execution, completed_id,
+                                              attributes, 'RequestCancel')
+        if target is None:
+            return
+
+        self._request_cancel(target,
+                             externalWorkflowExecution=execution.reference,
+                             externalInitiatedEventId=initiated_id)
+        self._add_event(execution, 'ExternalWorkflowExecutionCancelRequested',
+                        workflowExecution=target.reference,
+                        initiatedEventId=initiated_id)
+        self._schedule_decision(execution)
+
+
+class LocalConnection(boto.swf.layer1.Layer1):
+    """``boto.swf.layer1.Layer1`` connection to a ``SWFSimulator``
+
+    Requests and responses are json encoded as they would be on the
+    network, so callers never share structures with the simulator.
+
+    :param  simulator: simulator to send requests to, a new one if None
+    :type   simulator: SWFSimulator
+    """
+    def __init__(self, simulator=None, region=None):
+        # The network connection set up by Layer1 is not needed.
+        self.simulator = simulator or SWFSimulator()
+        self.region = region or RegionInfo(name='local', endpoint='local')
+
+    def make_request(self, action, body='', object_hook=None):
+        try:
+            response = self.simulator.request(action, json.loads(body))
+        except Fault as fault:
+            exception_class = self._fault_excp.get(fault.type,
+                                                   self.ResponseError)
+            raise exception_class(400, 'Bad Request', body=fault.body)
+
+        if response is None:
+            self.response_size = 0
+            return None
+        body = json.dumps(response)
+        self.response_size = len(body)
+        return json.loads(body, object_hook=object_hook)
+
+    def close(self):
+        pass
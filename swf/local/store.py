@@ -0,0 +1,234 @@
+# -*- coding:utf-8 -*-
+
+# Copyright (c) 2013, Theo Crevon
+# Copyright (c) 2013, Greg Leclercq
+#
+# See the file LICENSE for copying permission.
+
+"""SWF simulator persisted to a SQLite database
+
+The state changed by each request is written to the database before the
+response is returned: registrations, workflow executions, their open
+tasks and timers, and the events appended to their histories. A simulator
+opened on an existing database resumes from it, task lists and timers
+included.
+
+The database is in WAL mode: it can be read by other processes while the
+simulator runs, but only one simulator should write to it.
+"""
+
+import json
+import sqlite3
+
+from swf.local.simulator import Activity, Execution, SWFSimulator
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS registrations (
+    registry TEXT NOT NULL,
+    key TEXT NOT NULL,
+    description TEXT NOT NULL,
+    PRIMARY KEY (registry, key)
+);
+CREATE TABLE IF NOT EXISTS executions (
+    run_id TEXT PRIMARY KEY,
+    domain TEXT NOT NULL,
+    workflow_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    state TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS events (
+    run_id TEXT NOT NULL,
+    event_id INTEGER NOT NULL,
+    event TEXT NOT NULL,
+    PRIMARY KEY (run_id, event_id)
+);
+"""
+
+# Simulator attributes holding registrations, by the actions changing them
+REGISTRIES = {
+    'RegisterDomain': 'domains',
+    'DeprecateDomain': 'domains',
+    'RegisterActivityType': 'activity_types',
+    'DeprecateActivityType': 'activity_types',
+    'RegisterWorkflowType': 'workflow_types',
+    'DeprecateWorkflowType': 'workflow_types',
+}
+
+
+def dump_execution(execution):
+    """Returns the state of *execution*, but its events, as json
+
+    :rtype: str
+    """
+    state = dict(vars(execution))
+    del state['events']
+    state['activities'] = [vars(activity) for
+                           activity in execution.activities.itervalues()]
+    state['children'] = state['children'].items()
+
+    return json.dumps(state, separators=(',', ':'))
+
+
+def load_execution(state, events):
+    """Returns the execution of json *state* and *events*
+
+    :rtype: swf.local.simulator.Execution
+    """
+    state = json.loads(state)
+
+    activities = {}
+    for activity_state in state.pop('activities'):
+        activity = Activity.__new__(Activity)
+        vars(activity).update(activity_state)
+        activities[activity.activity_id] = activity
+
+    execution = Execution.__new__(Execution)
+    vars(execution).update(state)
+    execution.activities = activities
+    execution.children = dict((run_id, tuple(event_ids)) for
+                              run_id, event_ids in state['children'])
+    if execution.parent:
+        execution.parent = tuple(execution.parent)
+    execution.events = events
+
+    return execution
+
+
+class PersistentSimulator(SWFSimulator):
+    """``SWFSimulator`` persisted to the SQLite database at *path*
+
+    :param  path: path of the database, created if it does not exist
+    :type   path: str
+
+    Other arguments are passed to ``SWFSimulator``.
+    """
+    def __init__(self, path, *args, **kwargs):
+        super(PersistentSimulator, self).__init__(*args, **kwargs)
+
+        self.path = path
+        self._database = sqlite3.connect(path, check_same_thread=False)
+        self._database.execute('PRAGMA journal_mode=WAL')
+        self._database.execute('PRAGMA synchronous=NORMAL')
+        self._database.executescript(SCHEMA)
+
+        self._dirty = set()  # run ids of the executions changed
+        self._saved_events = {}  # run id to the count of events saved
+
+        self._load()
+
+    def request(self, action, data):
+        with self._condition:
+            try:
+                return super(PersistentSimulator, self).request(action, data)
+            finally:
+                self._save(REGISTRIES.get(action))
+
+    def close(self):
+        with self._condition:
+            self._database.close()
+
+    def _add_event(self, execution, event_type, **attributes):
+        self._dirty.add(execution.run_id)
+        return super(PersistentSimulator, self)._add_event(
+            execution, event_type, **attributes)
+
+    def record_activity_task_heartbeat(self, data):
+        response = super(PersistentSimulator,
+                         self).record_activity_task_heartbeat(data)
+        self._dirty.add(self._tokens[data['taskToken']][0])
+        return response
+
+    def _save(self, registry=None):
+        """Writes *registry* and the executions changed since the last
+        save"""
+        database = self._database
+
+        if registry is not None:
+            database.executemany(
+                'INSERT OR REPLACE INTO registrations VALUES (?, ?, ?)',
+                [(registry, json.dumps(key), json.dumps(description)) for
+                 key, description in getattr(self, registry).iteritems()])
+
+        for run_id in self._dirty:
+            execution = self.executions[run_id]
+            saved = self._saved_events.get(run_id, 0)
+
+            database.execute(
+                'INSERT OR REPLACE INTO executions VALUES (?, ?, ?, ?, ?)',
+                (run_id, execution.domain, execution.workflow_id,
+                 execution.status, dump_execution(execution)))
+            database.executemany(
+                'INSERT INTO events VALUES (?, ?, ?)',
+                [(run_id, event['eventId'], json.dumps(event)) for
+                 event in execution.events[saved:]])
+            self._saved_events[run_id] = len(execution.events)
+
+        self._dirty.clear()
+        database.commit()
+
+    def _load(self):
+        """Restores the state of the database, and rebuilds the task
+        lists, task tokens and timers of the open executions"""
+        database = self._database
+
+        for registry, key, description in database.execute(
+                'SELECT registry, key, description FROM registrations'):
+            key = json.loads(key)
+            if isinstance(key, list):
+                key = tuple(key)
+            getattr(self, registry)[key] = json.loads(description)
+
+        events = {}
+        for run_id, event in database.execute(
+                'SELECT run_id, event FROM events ORDER BY run_id, event_id'):
+            events.setdefault(run_id, []).append(json.loads(event))
+
+        for state, run_id in database.execute(
+                'SELECT state, run_id FROM executions'):
+            execution = load_execution(state, events.get(run_id, []))
+            self.executions[run_id] = execution
+            self._saved_events[run_id] = len(execution.events)
+            if execution.is_open:
+                self.open_executions[(execution.domain,
+                                      execution.workflow_id)] = execution
+
+        self._restore_tasks()
+
+    def _restore_tasks(self):
+        decisions = []
+        activities = []
+
+        for execution in self.open_executions.itervalues():
+            if execution.decision_token is not None:
+                self._tokens[execution.decision_token] = (execution.run_id,
+                                                          None)
+            elif execution.decision_scheduled_id is not None:
+                decisions.append((execution.decision_scheduled_id, execution))
+
+            for activity in execution.activities.itervalues():
+                if activity.token is not None:
+                    self._tokens[activity.token] = (execution.run_id,
+                                                    activity.activity_id)
+                else:
+                    activities.append((activity.scheduled_id, execution,
+                                       activity))
+
+            for timer_id, started_id in execution.timers.iteritems():
+                self._add_timer(execution, timer_id, started_id)
+
+        def scheduled_at(task):
+            scheduled_id, execution = task[:2]
+            return execution.events[scheduled_id - 1]['eventTimestamp']
+
+        for _, execution in sorted(decisions, key=scheduled_at):
+            self._decision_queues[(execution.domain,
+                                   execution.task_list)].append(
+                execution.run_id)
+
+        for scheduled_id, execution, activity in sorted(activities,
+                                                        key=scheduled_at):
+            task_list = execution.events[scheduled_id - 1][
+                'activityTaskScheduledEventAttributes']['taskList']['name']
+            self._activity_queues[(execution.domain, task_list)].append(
+                (execution.run_id, activity.activity_id, scheduled_id))
@@ -0,0 +1,201 @@
+# -*- coding:utf-8 -*-
+
+# Copyright (c) 2013, Theo Crevon
+# Copyright (c) 2013, Greg Leclercq
+#
+# See the file LICENSE for copying permission.
+
+"""Histograms of the SWF API calls
+
+:class:`Metrics` is an instrumentation hook collecting, by action, the
+durations, payload sizes, page counts and errors of the calls:
+
+.. code-block:: python
+
+    from swf.core import INSTRUMENTATION
+    from swf.metrics import Metrics
+
+    metrics = Metrics()
+    INSTRUMENTATION.add(after=metrics)
+    ...
+    print metrics.exposition()
+
+:meth:`Metrics.exposition` writes them in the Prometheus text format.
+"""
+
+import bisect
+import collections
+import threading
+
+
+# Upper bounds of the buckets of the durations, in seconds
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+                    5.0, 10.0, 30.0, 60.0)
+
+# Upper bounds of the buckets of the payload sizes, in bytes
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+# Upper bounds of the buckets of the count of pages of a listing
+PAGE_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+
+# Actions whose responses are paginated
+PAGINATED_ACTIONS = frozenset([
+    'GetWorkflowExecutionHistory',
+    'ListActivityTypes',
+    'ListClosedWorkflowExecutions',
+    'ListDomains',
+    'ListOpenWorkflowExecutions',
+    'ListWorkflowTypes',
+    'PollForDecisionTask',
+])
+
+
+def format_value(value):
+    """Returns *value* as written in the exposition format
+
+    >>> format_value(3)
+    '3'
+    >>> format_value(0.25)
+    '0.25'
+    >>> format_value(float('inf'))
+    '+Inf'
+
+    """
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return repr(value)
+
+
+class Histogram(object):
+    """Count of the values observed by bucket
+
+    :param  buckets: upper bounds of the buckets, a last bucket holds the
+                     values above them
+    :type   buckets: tuple
+
+    >>> histogram = Histogram((1, 10))
+    >>> for value in (0.5, 1, 5, 20):
+    ...     histogram.observe(value)
+    >>> histogram.cumulative()
+    [(1, 2), (10, 3), (inf, 4)]
+    >>> histogram.count, histogram.sum
+    (4, 26.5)
+
+    """
+    def __init__(self, buckets):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self):
+        """Returns the (upper bound, count of the values up to it) of the
+        buckets
+
+        :rtype: list
+
+        """
+        bounds = self.buckets + (float('inf'),)
+        total = 0
+        cumulative = []
+        for bound, count in zip(bounds, self.counts):
+            total += count
+            cumulative.append((bound, total))
+        return cumulative
+
+
+class ActionMetrics(object):
+    """Histograms of the calls to one action"""
+    def __init__(self):
+        self.durations = Histogram(DURATION_BUCKETS)
+        self.request_sizes = Histogram(SIZE_BUCKETS)
+        self.response_sizes = Histogram(SIZE_BUCKETS)
+        self.pages = Histogram(PAGE_BUCKETS)
+        self.errors = collections.Counter()
+
+
+class Metrics(object):
+    """Instrumentation hook collecting histograms of the calls by action
+
+    A listing is counted in ``pages`` on its last page, with the count of
+    pages it took. Failed calls are counted in ``errors`` by error code.
+
+    """
+    # Histograms of ActionMetrics, with their names and descriptions
+    HISTOGRAMS = (
+        ('durations', 'call_duration_seconds',
+         'Duration of the calls, waits and retries included'),
+        ('request_sizes', 'request_bytes', 'Size of the json requests'),
+        ('response_sizes', 'response_bytes', 'Size of the json responses'),
+        ('pages', 'pages', 'Count of pages of the paginated listings'),
+    )
+
+    def __init__(self, prefix='swf'):
+        self.prefix = prefix
+        self.actions = collections.defaultdict(ActionMetrics)
+        self._lock = threading.Lock()
+
+    def __call__(self, call):
+        """Collects *call*, a ``swf.core.Call`` that is over"""
+        with self._lock:
+            metrics = self.actions[call.action]
+            metrics.durations.observe(call.duration)
+            metrics.request_sizes.observe(call.request_size)
+            if call.error_code is not None:
+                metrics.errors[call.error_code] += 1
+                return
+
+            if call.response_size is not None:
+                metrics.response_sizes.observe(call.response_size)
+            if not call.has_next_page and (call.page > 1 or
+                                           call.action in PAGINATED_ACTIONS):
+                metrics.pages.observe(call.page)
+
+    def reset(self):
+        with self._lock:
+            self.actions.clear()
+
+    def exposition(self):
+        """Returns the metrics in the Prometheus text exposition format
+
+        :rtype: str
+
+        """
+        lines = []
+        with self._lock:
+            actions = sorted(self.actions.iteritems())
+
+            for attribute, name, description in self.HISTOGRAMS:
+                name = '{}_{}'.format(self.prefix, name)
+                lines.append('# HELP {} {}'.format(name, description))
+                lines.append('# TYPE {} histogram'.format(name))
+
+                for action, metrics in actions:
+                    histogram = getattr(metrics, attribute)
+                    if not histogram.count:
+                        continue
+                    for bound, count in histogram.cumulative():
+                        lines.append('{}_bucket{{action="{}",le="{}"}} {}'
+                                     .format(name, action,
+                                             format_value(bound), count))
+                    lines.append('{}_sum{{action="{}"}} {}'.format(
+                        name, action, format_value(histogram.sum)))
+                    lines.append('{}_count{{action="{}"}} {}'.format(
+                        name, action, histogram.count))
+
+            name = '{}_errors_total'.format(self.prefix)
+            lines.append('# HELP {} Count of the failed calls'.format(name))
+            lines.append('# TYPE {} counter'.format(name))
+            for action, metrics in actions:
+                for code, count in sorted(metrics.errors.iteritems()):
+                    lines.append('{}{{action="{}",code="{}"}} {}'.format(
+                        name, action, code, count))
+
+        return '\n'.join(lines) + '\n'
@@ -209,7 +209,7 @@ class ActivityType(BaseModel):
 
     def upstream(self):
         from swf.querysets.activity import ActivityTypeQuerySet
-        qs = ActivityTypeQuerySet(self.domain)
+        qs = ActivityTypeQuerySet(self.domain, connection=self.connection)
         return qs.get(self.name, self.version)
 
     def __repr__(self):
@@ -249,18 +249,20 @@ class ActivityTask(BaseModel):
         self.started_event_id = started_event_id
 
     @classmethod
-    def from_poll(cls, domain, task_list, data):
+    def from_poll(cls, domain, task_list, data, **kwargs):
         from .workflow import WorkflowExecution
 
         activity_type = ActivityType(
             domain,
             data['activityType']['name'],
-            data['activityType']['version'])
+            data['activityType']['version'],
+            **kwargs)
 
         workflow_execution = WorkflowExecution(
             domain,
             data['workflowExecution']['workflowId'],
-            data['workflowExecution']['runId'])
+            data['workflowExecution']['runId'],
+            **kwargs)
 
         return cls(
             domain,
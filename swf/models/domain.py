@@ -138,7 +138,7 @@ class Domain(BaseModel):
 
     def upstream(self):
         from swf.querysets.domain import DomainQuerySet
-        qs = DomainQuerySet()
+        qs = DomainQuerySet(connection=self.connection)
         return qs.get(self.name)
 
     def workflows(self, status=REGISTERED):
@@ -151,7 +151,7 @@ class Domain(BaseModel):
         :type       status: string
         """
         from swf.querysets.workflow import WorkflowTypeQuerySet
-        qs = WorkflowTypeQuerySet(self)
+        qs = WorkflowTypeQuerySet(self, connection=self.connection)
         return qs.all(registration_status=status)
 
     def activities(self, status=REGISTERED):
@@ -164,7 +164,7 @@ class Domain(BaseModel):
         :type       status: string
         """
         from swf.querysets.activity import ActivityTypeQuerySet
-        qs = ActivityTypeQuerySet(self)
+        qs = ActivityTypeQuerySet(self, connection=self.connection)
         return qs.all(registration_status=status)
 
     @property
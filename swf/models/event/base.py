@@ -12,6 +12,30 @@ from datetime import datetime
 from swf.utils import camel_to_underscore, cached_property
 
 
+_attribute_names = {}
+
+# Value of Event._input when the decoded input must not be kept
+NOT_KEPT = object()
+
+
+def attribute_name(key):
+    """Translates an amazon event attribute *key* into an Event
+    attribute name, memoized
+
+    Names are ``str`` whether *key* is ``str`` or ``unicode``, as both
+    share an entry of the memo.
+
+    >>> attribute_name('scheduledEventId')
+    'scheduled_event_id'
+
+    """
+    try:
+        return _attribute_names[key]
+    except KeyError:
+        name = _attribute_names[key] = str(camel_to_underscore(key))
+        return name
+
+
 class Event(object):
     """Simple workflow execution event wrapper base class
 
@@ -29,6 +53,11 @@ class Event(object):
     instance would for example have type 'DecisionTask',
     name 'DecisionTaskScheduleFailed', id '1' and state 'failed'.
 
+    Events attributes are not copied: they are read from the raw_data
+    attributes when accessed, with their names underscored (e.g.
+    ``event.scheduled_event_id`` for ``scheduledEventId``). Events have
+    ``__slots__`` and no instance ``__dict__``.
+
     :param  id: event id provided by amazon service
     :type   id: string
 
@@ -40,10 +69,25 @@ class Event(object):
 
     :param  raw_data: raw_event representation provided by amazon service
     :type   raw_data: dict
+
+    :param  name: amazon event type, such as 'DecisionTaskScheduled'
+    :type   name: string
+
+    :param  attributes_key: raw_data key holding the event attributes
+    :type   attributes_key: string
     """
+    __slots__ = (
+        '_id',
+        '_state',
+        '_timestamp',
+        '_timestamp_cache',
+        '_input',
+        '_name',
+        '_attributes_key',
+        'raw',
+    )
+
     _type = None
-    _name = None
-    _attributes_key = None
     _attributes = None
 
     excluded_attributes = (
@@ -52,20 +96,32 @@ class Event(object):
         'eventTimestamp'
     )
 
-    def __init__(self, id, state, timestamp, raw_data):
+    def __init__(self, id, state, timestamp, raw_data,
+                 name=None, attributes_key=None):
         """
         """
         self._id = id
         self._state = state
         self._timestamp = timestamp
-        self._input = {}
+        self._name = name
+        self._attributes_key = attributes_key
         self.raw = raw_data or {}
 
-        self.process_attributes()
-
     def __repr__(self):
         return '<Event %s %s : %s >' % (self.id, self.type, self.state)
 
+    def __getattr__(self, name):
+        # Only called when regular lookup fails
+        if name.startswith('__') or name in Event.__slots__:
+            raise AttributeError(name)
+
+        for key, value in self.attributes.iteritems():
+            if attribute_name(key) == name:
+                return value
+
+        raise AttributeError("'{}' object has no attribute '{}'".format(
+                             self.__class__.__name__, name))
+
     @property
     def id(self):
         return self._id
@@ -82,20 +138,33 @@ class Event(object):
     def state(self):
         return self._state
 
+    @property
+    def attributes(self):
+        """Raw event attributes, as provided by amazon service
+
+        :rtype: dict
+        """
+        return self.raw.get(self._attributes_key) or {}
+
     @cached_property
     def timestamp(self):
         return datetime.fromtimestamp(self._timestamp)
 
+    def _decode_input(self):
+        value = self.attributes.get('input')
+        return json.loads(value) if value is not None else {}
+
     @property
     def input(self):
-        return self._input
+        try:
+            input = self._input
+        except AttributeError:
+            input = self._input = self._decode_input()
+
+        if input is NOT_KEPT:
+            return self._decode_input()
+        return input
 
     @input.setter
     def input(self, value):
         self._input = json.loads(value)
-
-    def process_attributes(self):
-        """Processes the event raw_data attributes_key elements
-        and sets current instance attributes accordingly"""
-        for key, value in self.raw[self._attributes_key].iteritems():
-            setattr(self, camel_to_underscore(key), value)
@@ -42,6 +42,8 @@ class CompiledEvent(Event, Stateful):
     should implement
 
     * ``initial_state`` class attribute: constructor supplied event attended state
+    * ``initial_states`` (tuple) class attribute: other states a compiled event
+    can be built in, such as failures to initiate it
     * ``states`` (tuple) class attribute: every event type possible states should
     be listed
     * ``transitions`` (dictionary) class attribute: every initial state to possible
@@ -53,6 +55,7 @@ class CompiledEvent(Event, Stateful):
     """
 
     initial_state = None
+    initial_states = ()
 
     def __init__(self, event):
         """Builds a  CompiledEvent from provided ``event``
@@ -63,22 +66,30 @@ class CompiledEvent(Event, Stateful):
         :param  event: base event to build the compiled event upon
         :type   event: swf.models.event.Event
         """
-        if event.state != self.initial_state:
+        if not self.is_initial(event.state):
             raise InconsistentStateError("Provided event is in {0} state "
                                          "when attended intial state is {1}"
                                          .format(event.state, self.initial_state))
-        self.__dict__ = event.__dict__.copy()
+        self._assign(event)
 
     def __repr__(self):
         return '<CompiledEvent %s %s>' % (self.type, self.state)
 
+    @classmethod
+    def is_initial(cls, state):
+        """Tells if a compiled event can be built from an event in *state*
+
+        :rtype: bool
+        """
+        return state == cls.initial_state or state in cls.initial_states
+
     @property
     def next_states(self):
         """Returns attended next compiled event states
 
         :rtype: list
         """
-        return self.transitions[self.state]
+        return self.transitions.get(self.state, ())
 
     def transit(self, event):
         """Tries to apply CompiledEvent transition to the provided ``event``
@@ -88,7 +99,25 @@ class CompiledEvent(Event, Stateful):
                        state transition
         :type   event: swf.models.event.Event
         """
-        if event.state not in self.transitions[self.state]:
-            raise TransitionError("Transition to state %s not allowed")
-
-        self.__dict__ = event.__dict__.copy()
+        if event.state not in self.next_states:
+            raise TransitionError("Transition of {0} from state {1} to state "
+                                  "{2} not allowed".format(self.type,
+                                                           self.state,
+                                                           event.state))
+
+        self._assign(event)
+
+    def _assign(self, event):
+        """Takes over *event* fields"""
+        for slot in Event.__slots__:
+            try:
+                value = getattr(event, slot)
+            except AttributeError:
+                # Caches unset on *event* must not keep the values of the
+                # previous event.
+                try:
+                    delattr(self, slot)
+                except AttributeError:
+                    pass
+            else:
+                setattr(self, slot, value)
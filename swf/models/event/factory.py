@@ -6,7 +6,10 @@
 # See the file LICENSE for copying permission.
 
 import collections
+import json
 
+from swf.constants import KEEP_BOTH, KEEP_PARSED, KEEP_RAW
+from swf.models.event.base import NOT_KEPT
 from swf.models.event.workflow import (
     WorkflowExecutionEvent,
     CompiledWorkflowExecutionEvent,
@@ -40,11 +43,11 @@ EVENTS = collections.OrderedDict([
     # At top-level to override 'WorkflowExecution'
     ('ChildWorkflowExecution', {
         'event': ChildWorkflowExecutionEvent,
-        'compiled': CompiledChildWorkflowExecutionEvent,
+        'compiled_event': CompiledChildWorkflowExecutionEvent,
     }),
-    ('ExternalWorkflow', {
+    ('ExternalWorkflowExecution', {
         'event': ExternalWorkflowExecutionEvent,
-        'compiled': CompiledExternalWorkflowExecutionEvent,
+        'compiled_event': CompiledExternalWorkflowExecutionEvent,
     }),
     ('WorkflowExecution', {
         'event': WorkflowExecutionEvent,
@@ -60,15 +63,107 @@ EVENTS = collections.OrderedDict([
     }),
     ('Marker', {
         'event': MarkerEvent,
-        'compiled': CompiledMarkerEvent,
+        'compiled_event': CompiledMarkerEvent,
     }),
     ('Timer', {
         'event': TimerEvent,
-        'compiled': CompiledTimerEvent,
+        'compiled_event': CompiledTimerEvent,
     }),
 ])
 
 
+# Every event type of the amazon swf API
+EVENT_TYPES = (
+    'WorkflowExecutionStarted',
+    'WorkflowExecutionCancelRequested',
+    'WorkflowExecutionCompleted',
+    'CompleteWorkflowExecutionFailed',
+    'WorkflowExecutionFailed',
+    'FailWorkflowExecutionFailed',
+    'WorkflowExecutionTimedOut',
+    'WorkflowExecutionCanceled',
+    'CancelWorkflowExecutionFailed',
+    'WorkflowExecutionContinuedAsNew',
+    'ContinueAsNewWorkflowExecutionFailed',
+    'WorkflowExecutionTerminated',
+    'WorkflowExecutionSignaled',
+    'DecisionTaskScheduled',
+    'DecisionTaskStarted',
+    'DecisionTaskCompleted',
+    'DecisionTaskTimedOut',
+    'ActivityTaskScheduled',
+    'ScheduleActivityTaskFailed',
+    'ActivityTaskStarted',
+    'ActivityTaskCompleted',
+    'ActivityTaskFailed',
+    'ActivityTaskTimedOut',
+    'ActivityTaskCanceled',
+    'ActivityTaskCancelRequested',
+    'RequestCancelActivityTaskFailed',
+    'MarkerRecorded',
+    'RecordMarkerFailed',
+    'TimerStarted',
+    'StartTimerFailed',
+    'TimerFired',
+    'TimerCanceled',
+    'CancelTimerFailed',
+    'StartChildWorkflowExecutionInitiated',
+    'StartChildWorkflowExecutionFailed',
+    'ChildWorkflowExecutionStarted',
+    'ChildWorkflowExecutionCompleted',
+    'ChildWorkflowExecutionFailed',
+    'ChildWorkflowExecutionTimedOut',
+    'ChildWorkflowExecutionCanceled',
+    'ChildWorkflowExecutionTerminated',
+    'SignalExternalWorkflowExecutionInitiated',
+    'SignalExternalWorkflowExecutionFailed',
+    'ExternalWorkflowExecutionSignaled',
+    'RequestCancelExternalWorkflowExecutionInitiated',
+    'RequestCancelExternalWorkflowExecutionFailed',
+    'ExternalWorkflowExecutionCancelRequested',
+)
+
+
+# Attributes holding strings repeated across events and histories, such
+# as task list names, activity and workflow types names and versions
+INTERNED_ATTRIBUTES = frozenset([
+    'name',
+    'version',
+    'childPolicy',
+    'timeoutType',
+    'cause',
+])
+
+# Count of strings interned before the table is emptied, so that it does
+# not grow for the life of the process
+MAX_INTERNED = 10000
+
+_interned = {}
+
+
+def intern_attributes(attributes):
+    """Replaces, in place, the *attributes* values that are often
+    repeated by a single shared copy of them
+
+    >>> first = {'activityType': {'name': u'resize', 'version': u'1.0'}}
+    >>> second = {'activityType': {'name': u'resize', 'version': u'1.0'}}
+    >>> intern_attributes(first); intern_attributes(second)
+    >>> second['activityType']['name'] is first['activityType']['name']
+    True
+
+    """
+    for key, value in attributes.iteritems():
+        if isinstance(value, dict):
+            intern_attributes(value)
+        elif key in INTERNED_ATTRIBUTES and isinstance(value, basestring):
+            interned = _interned.get(value)
+            if interned is None:
+                if len(_interned) >= MAX_INTERNED:
+                    _interned.clear()
+                interned = _interned[value] = value
+            attributes[key] = interned
+
+
 class EventFactory(object):
     """Processes an input json event representation, and instantiates
     an ``swf.models.event.Event`` subclass instance accordingly.
@@ -96,36 +191,90 @@ class EventFactory(object):
                        amazon service
     :type   raw_event: dict
 
+    :param  retention: what the event keeps of its json encoded input:
+                       ``swf.constants.KEEP_BOTH`` the encoded input, and
+                       the decoded one once accessed,
+                       ``swf.constants.KEEP_RAW`` only the encoded input, or
+                       ``swf.constants.KEEP_PARSED`` only the decoded input,
+                       the event then holds a copy of *raw_event* without
+                       it
+    :type   retention: str
+
     :returns: ``swf.models.event.Event`` subclass instance
     """
 
     # eventType to Event subclass bindings
     events = EVENTS
 
-    def __new__(klass, raw_event):
-        event_id = raw_event['eventId']
+    # eventType to (Event subclass, state, attributes key), filled with
+    # EVENT_TYPES at import and completed with unknown types when met.
+    descriptions = {}
+
+    def __new__(klass, raw_event, retention=KEEP_BOTH):
         event_name = raw_event['eventType']
-        event_timestamp = raw_event['eventTimestamp']
 
+        try:
+            event_class, event_state, event_attributes_key = \
+                klass.descriptions[event_name]
+        except KeyError:
+            description = klass._describe(event_name)
+            klass.descriptions[event_name] = description
+            event_class, event_state, event_attributes_key = description
+
+        attributes = raw_event.get(event_attributes_key)
+        if attributes:
+            intern_attributes(attributes)
+
+        input = None
+        if retention == KEEP_PARSED:
+            attributes = dict(attributes or {})
+            input = attributes.pop('input', None)
+            input = json.loads(input) if input is not None else {}
+            raw_event = dict(raw_event)
+            raw_event[event_attributes_key] = attributes
+
+        instance = event_class(
+            id=raw_event['eventId'],
+            state=event_state,
+            timestamp=raw_event['eventTimestamp'],
+            raw_data=raw_event,
+            name=event_name,
+            attributes_key=event_attributes_key,
+        )
+
+        if retention == KEEP_PARSED:
+            instance._input = input
+        elif retention == KEEP_RAW:
+            instance._input = NOT_KEPT
+
+        return instance
+
+    @classmethod
+    def _describe(klass, event_name):
+        """Computes the Event subclass, state and attributes key of
+        *event_name* events
+
+        Example:
+
+        >>> EventFactory._describe('StartChildWorkflowExecutionInitiated')
+        ... # doctest: +NORMALIZE_WHITESPACE
+        (<class 'swf.models.event.workflow.ChildWorkflowExecutionEvent'>,
+         'start_initiated',
+         'startChildWorkflowExecutionInitiatedEventAttributes')
+
+        """
         event_type = klass._extract_event_type(event_name)
         event_state = klass._extract_event_state(event_type, event_name)
         # amazon swf format is not very normalized and event attributes
         # response field is non-capitalized...
         event_attributes_key = decapitalize(event_name) + 'EventAttributes'
 
-        klass = EventFactory.events[event_type]['event']
-        klass._name = event_name
-        klass._attributes_key = event_attributes_key
-
-        instance = klass(
-            id=event_id,
-            state=event_state,
-            timestamp=event_timestamp,
-            raw_data=raw_event
+        return (
+            klass.events[event_type]['event'],
+            event_state,
+            event_attributes_key,
         )
 
-        return instance
-
     @classmethod
     def _extract_event_type(klass, event_name):
         """Extracts event type from raw event_name
@@ -165,6 +314,12 @@ class EventFactory(object):
         return camel_to_underscore(left + right)
 
 
+EventFactory.descriptions.update(
+    (event_name, EventFactory._describe(event_name)) for
+    event_name in EVENT_TYPES
+)
+
+
 class CompiledEventFactory(object):
     events = EVENTS
 
@@ -11,13 +11,16 @@ from swf.models.event.compiler import CompiledEvent
 
 class MarkerEvent(Event):
     _type = 'Marker'
+    __slots__ = ()
 
 
 class CompiledMarkerEvent(CompiledEvent):
     _type = 'Marker'
     states = (
         'recorded',
+        'record_failed',  # Failed to process RecordMarker decision
     )
 
     transitions = {}
     initial_state = 'recorded'
+    initial_states = ('record_failed',)
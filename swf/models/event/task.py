@@ -11,6 +11,7 @@ from swf.models.event.compiler import CompiledEvent
 
 class ActivityTaskEvent(Event):
     _type = 'ActivityTask'
+    __slots__ = ()
 
 
 class CompiledActivityTaskEvent(CompiledEvent):
@@ -28,21 +29,26 @@ class CompiledActivityTaskEvent(CompiledEvent):
     )
 
     transitions = {
-        'scheduled': ('schedule_failed', 'canceled', 'timed_out', 'started'),
+        'scheduled': ('schedule_failed', 'canceled', 'timed_out', 'started',
+                      'cancel_requested'),
         'schedule_failed': ('scheduled', 'timed_out'),
-        'started': ('canceled', 'failed', 'timed_out', 'completed'),
+        'started': ('canceled', 'failed', 'timed_out', 'completed',
+                    'cancel_requested'),
         'failed': ('scheduled', 'timed_out'),
-        'timed_out': ('scheduled'),
+        'timed_out': ('scheduled',),
         'canceled': ('scheduled', 'timed_out'),
-        'cancel_requested': ('canceled', 'request_cancel_failed', 'timed_out'),
+        'cancel_requested': ('canceled', 'request_cancel_failed', 'timed_out',
+                             'started', 'completed', 'failed'),
         'request_cancel_failed': ('scheduled', 'timed_out'),
     }
 
     initial_state = 'scheduled'
+    initial_states = ('schedule_failed', 'request_cancel_failed')
 
 
 class DecisionTaskEvent(Event):
     _type = 'DecisionTask'
+    __slots__ = ()
 
 
 class CompiledDecisionTaskEvent(CompiledEvent):
@@ -55,9 +61,9 @@ class CompiledDecisionTaskEvent(CompiledEvent):
     )
 
     transitions = {
-        'scheduled': ('started'),
+        'scheduled': ('started', 'timed_out'),
         'started': ('timed_out', 'completed'),
-        'timed_out': ('scheduled'),
+        'timed_out': ('scheduled',),
     }
 
     initial_state = 'scheduled'
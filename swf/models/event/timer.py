@@ -11,6 +11,7 @@ from swf.models.event.compiler import CompiledEvent
 
 class TimerEvent(Event):
     _type = 'Timer'
+    __slots__ = ()
 
 
 class CompiledTimerEvent(CompiledEvent):
@@ -27,9 +28,10 @@ class CompiledTimerEvent(CompiledEvent):
 
     transitions = {
         'started': ('canceled', 'fired'),
-        'start_failed': ('canceled'),
-        'fired': ('canceled'),
+        'start_failed': ('canceled',),
+        'fired': ('canceled',),
         'canceled': ('cancel_failed', 'fired'),
     }
 
     initial_state = 'started'
+    initial_states = ('start_failed', 'cancel_failed')
@@ -11,6 +11,7 @@ from swf.models.event.compiler import CompiledEvent
 
 class WorkflowExecutionEvent(Event):
     _type = 'WorkflowExecution'
+    __slots__ = ()
 
 
 class CompiledWorkflowExecutionEvent(CompiledEvent):
@@ -25,33 +26,42 @@ class CompiledWorkflowExecutionEvent(CompiledEvent):
         'terminated',  # The workflow execution was terminated
         'continued_as_new',  # The workflow execution was closed and a new execution of the same type was created with the same workflowId
         'cancel_requested',  # A request to cancel this workflow execution was made
+        'complete_failed',  # Failed to process CompleteWorkflowExecution decision
+        'fail_failed',  # Failed to process FailWorkflowExecution decision
+        'cancel_failed',  # Failed to process CancelWorkflowExecution decision
+        'continue_as_new_failed',  # Failed to process ContinueAsNewWorkflowExecution decision
     )
 
-    transitions = {
-        'started': (
-            'signaled',
-            'failed',
-            'timed_out',
-            'canceled',
-            'terminated',
-            'continued_as_new',
-            'completed'
-        ),
-        'signaled': (
-            'signaled',
-            'started',
-            'continued_as_new',
-        ),
-
-        'cancel_requested': ('canceled'),
-
-    }
+    transitions = dict((state, (
+        'signaled',
+        'cancel_requested',
+        'failed',
+        'timed_out',
+        'canceled',
+        'terminated',
+        'continued_as_new',
+        'completed',
+        'complete_failed',
+        'fail_failed',
+        'cancel_failed',
+        'continue_as_new_failed',
+    )) for state in (
+        # Open execution states
+        'started',
+        'signaled',
+        'cancel_requested',
+        'complete_failed',
+        'fail_failed',
+        'cancel_failed',
+        'continue_as_new_failed',
+    ))
 
     initial_state = 'started'
 
 
 class ChildWorkflowExecutionEvent(Event):
     _type = 'ChildWorkflowExecution'
+    __slots__ = ()
 
 
 class CompiledChildWorkflowExecutionEvent(CompiledEvent):
@@ -70,8 +80,9 @@ class CompiledChildWorkflowExecutionEvent(CompiledEvent):
 
     transitions = {
         'start_initiated': ('start_failed', 'started'),
-        'start_failed': ('failed'),
-        'started': ('canceled', 'failed', 'timed_out', 'terminated'),
+        'start_failed': ('failed',),
+        'started': ('completed', 'canceled', 'failed', 'timed_out',
+                    'terminated'),
     }
 
     initial_state = 'start_initiated'
@@ -79,6 +90,7 @@ class CompiledChildWorkflowExecutionEvent(CompiledEvent):
 
 class ExternalWorkflowExecutionEvent(Event):
     _type = 'ExternalWorkflowExecution'
+    __slots__ = ()
 
 
 class CompiledExternalWorkflowExecutionEvent(CompiledEvent):
@@ -95,8 +107,10 @@ class CompiledExternalWorkflowExecutionEvent(CompiledEvent):
 
     transitions = {
         'signal_initiated': ('signal_failed', 'signaled'),
-        'request_cancel_initiated': ('request_cancel_failed'),
-        'cancel_requested': ('request_cancel_failed'),
+        'request_cancel_initiated': ('request_cancel_failed',
+                                     'cancel_requested'),
+        'cancel_requested': ('request_cancel_failed',),
     }
 
     initial_state = 'signal_initiated'
+    initial_states = ('request_cancel_initiated',)
@@ -1 +1,3 @@
 from base import History
+from cache import HistoryCache
+from lazy import LazyHistory
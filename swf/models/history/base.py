@@ -5,11 +5,19 @@
 #
 # See the file LICENSE for copying permission.
 
-from itertools import groupby
+import threading
+from collections import OrderedDict
 
-from swf.models.event import EventFactory, CompiledEventFactory
+from swf.constants import KEEP_BOTH, KEEP_PARSED
+from swf.models.event import EventFactory
 from swf.models.event.workflow import WorkflowExecutionEvent
-from swf.utils import cached_property
+from swf.models.history import binary
+from swf.models.history.columns import HistoryColumns
+from swf.models.history.compiler import EntityKeys, HistoryCompiler
+from swf.models.history.index import HistoryIndex
+
+
+_MISSING = object()
 
 
 class History(object):
@@ -20,11 +28,16 @@ class History(object):
     using it's from_event_list method.
 
     It is iterable and exposes a list-like __getitem__ for easier
-    manipulation.
+    manipulation. Each iteration has its own iterator, so that a history
+    can be read by several loops or threads at once.
 
     :param  events: Events list to build History upon
     :type   events: list
 
+    :param  retention: retention policy of the events the history builds,
+                       see ``swf.models.event.EventFactory``
+    :type   retention: str
+
     Typical amazon response looks like:
 
     .. code-block:: json
@@ -64,10 +77,15 @@ class History(object):
         }
     """
 
+    _index = None
+    _compiler = None
+    retention = KEEP_BOTH
+
     def __init__(self, *args, **kwargs):
         self.events = kwargs.pop('events', [])
         self.raw = kwargs.pop('raw', None)
-        self.it_pos = 0
+        self.retention = kwargs.pop('retention', KEEP_BOTH)
+        self._lock = threading.Lock()  # guards the index and compiler
 
     def __len__(self):
         return len(self.events)
@@ -89,16 +107,55 @@ class History(object):
         return repr_str
 
     def __iter__(self):
-        return self
+        return iter(self.events)
+
+    def _iter_range(self, start, end):
+        events = self.events
+        for position in xrange(start, end):
+            yield events[position]
+
+    def _position_after(self, event_id):
+        """Returns the position of the first event with an id greater than
+        *event_id*"""
+        events = self.events
+        low, high = 0, len(events)
+
+        # Ids are usually contiguous
+        if high:
+            guess = event_id - events[0].id + 1
+            if 0 < guess <= high and events[guess - 1].id == event_id:
+                return guess
+
+        while low < high:
+            middle = (low + high) // 2
+            if events[middle].id <= event_id:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def since(self, event_id):
+        """Yields the events that come after the event *event_id*, as
+        stored when called
 
-    def next(self):
-        try:
-            next_event = self.events[self.it_pos]
-            self.it_pos += 1
-        except IndexError:
-            self.it_pos = 0
-            raise StopIteration
-        return next_event
+        :param  event_id: id of the last event not to yield
+        :type   event_id: int
+
+        :rtype: generator of swf.models.event.Event
+        """
+        return self._iter_range(self._position_after(event_id),
+                                len(self.events))
+
+    def tail(self, n):
+        """Yields the *n* latest events, as stored when called
+
+        :param  n: latest events count to yield
+        :type   n: int
+
+        :rtype: generator of swf.models.event.Event
+        """
+        end = len(self.events)
+        return self._iter_range(max(end - n, 0), end)
 
     @property
     def last(self):
@@ -147,6 +204,87 @@ class History(object):
         return False
 
 
+    @property
+    def index(self):
+        """Lookup tables over the history events, built on first access
+        and completed with the events appended since
+
+        :rtype: swf.models.history.index.HistoryIndex
+        """
+        events = self.events
+        index = self._index
+
+        if (index is None or index.events is not events or
+                index.count > len(events)):
+            index = HistoryIndex(events)
+            with self._lock:
+                self._index = index
+        elif index.count < len(events):
+            with self._lock:
+                for event in events[index.count:]:
+                    index.add(event)
+
+        return index
+
+    def get_event(self, event_id):
+        """Returns the event with id *event_id*
+
+        :rtype: swf.models.event.Event
+
+        :raises: KeyError
+        """
+        return self.index.by_id[event_id]
+
+    def last_event(self, type, state=None):
+        """Returns the latest event of *type*, and *state* if provided, or
+        None
+
+        :rtype: swf.models.event.Event
+        """
+        if state is None:
+            events = self.index.by_type.get(type)
+        else:
+            events = self.index.by_type_state.get((type, state))
+
+        return events[-1] if events else None
+
+    def _correlated_events(self, by, key):
+        """Returns the events identified by *by* == *key*, and the events
+        referring to them through their scheduled or initiated event id
+        """
+        attributes = self.index.by_attribute
+        events = list(attributes[by].get(key, ()))
+
+        for event in list(events):
+            for attr in ('scheduled_event_id', 'initiated_event_id'):
+                events.extend(attributes[attr].get(event.id, ()))
+
+        return sorted(set(events), key=lambda e: e.id)
+
+    def activity_events(self, activity_id):
+        """Returns every event of the activity task *activity_id*
+
+        :rtype: list of swf.models.event.Event
+        """
+        return self._correlated_events('activity_id', activity_id)
+
+    def timer_events(self, timer_id):
+        """Returns every event of the timer *timer_id*
+
+        :rtype: list of swf.models.event.Event
+        """
+        return list(self.index.by_attribute['timer_id'].get(timer_id, ()))
+
+    def child_workflow_events(self, workflow_id):
+        """Returns every event of the child workflow execution
+        *workflow_id*
+
+        :rtype: list of swf.models.event.Event
+        """
+        return [event for event in
+                self._correlated_events('workflow_id', workflow_id) if
+                event.type == 'ChildWorkflowExecution']
+
     def filter(self, **kwargs):
         """Filters the history based on kwargs events attributes
 
@@ -155,6 +293,10 @@ class History(object):
         'DecisionTask' in the history, to check the presence of a specific
         event and so on...
 
+        Filtering on ``id``, ``type``, ``state`` or one of the
+        ``swf.models.history.index.INDEXED_ATTRIBUTES`` only looks at the
+        events matching in the history index.
+
         example:
 
         .. code-block:: python
@@ -177,10 +319,13 @@ class History(object):
 
         :rtype: swf.models.history.History
         """
-        return filter(
-            lambda e: all(getattr(e, k) == v for k, v in kwargs.iteritems()),
-            self.events
-        )
+        events = self.index.candidates(**kwargs)
+        if events is None:
+            events = self.events
+
+        return [e for e in events if
+                all(getattr(e, k, _MISSING) == v for
+                    k, v in kwargs.iteritems())]
 
     @property
     def reversed(self):
@@ -189,25 +334,20 @@ class History(object):
 
     @property
     def distinct(self):
-        """Extracts distinct history events based on their types
+        """Groups history events by entity: every event of an activity
+        task, of a timer, of a child workflow execution... in a list
 
-        :rtype: list of swf.models.event.Event
-        """
-        distinct_events = []
+        Lists are ordered by the first event of their entity.
 
-        for key, group in groupby(self.events, lambda e: e.type):
-            g = list(group)
+        :rtype: list of lists of swf.models.event.Event
+        """
+        entity_key = EntityKeys()
+        entities = OrderedDict()
 
-            # Merge every WorkflowExecution events into same group
-            if (len(g) == 1 and
-                len(distinct_events) >= 1 and
-                    g[0].type == "WorkflowExecution"):
-                # WorfklowExecution group will always be in first position
-                distinct_events[0].extend(g)
-            else:
-                distinct_events.append(list(g))
+        for event in self.events:
+            entities.setdefault(entity_key(event), []).append(event)
 
-        return distinct_events
+        return entities.values()
 
     def compile(self):
         """Compiles history events into a stateful History
@@ -218,30 +358,71 @@ class History(object):
 
         :rtype: swf.models.history.History made of swf.models.event.CompiledEvent
         """
-        distinct_events = self.distinct
-        compiled_history = []
+        compiler = HistoryCompiler(self.events)
+        return History(events=compiler.compiled_events)
 
-        for events_list in distinct_events:
-            if len(events_list) > 0:
-                compiled_event = CompiledEventFactory(events_list[0])
+    @property
+    def compiled(self):
+        """Compiled history version
 
-                for event in events_list[1:]:
-                    compiled_event.transit(event)
+        Compiled once, then only the events appended since the previous
+        access are compiled.
 
-                compiled_history.append(compiled_event)
+        :rtype: swf.models.history.History made of swf.models.event.CompiledEvent
+        """
+        events = self.events
+        compiler = self._compiler
 
-        return History(events=compiled_history)
+        if (compiler is None or compiler.events is not events or
+                compiler.count > len(events)):
+            compiler = HistoryCompiler(events)
+            compiled = History(events=compiler.compiled_events)
+            with self._lock:
+                self._compiler = compiler
+                self._compiled = compiled
+            return compiled
 
-    @cached_property
-    def compiled(self):
-        """Compiled history version
+        if compiler.count < len(events):
+            with self._lock:
+                compiler.update()
 
-        :rtype: swf.models.history.History made of swf.models.event.CompiledEvent
+        return self._compiled
+
+    def to_columns(self):
+        """Returns the history events as NumPy arrays, for analysis
+
+        Requires numpy.
+
+        :rtype: swf.models.history.columns.HistoryColumns
         """
-        return self.compile()
+        return HistoryColumns(self.events)
+
+    def stats(self, percentiles=(50, 90, 99)):
+        """Returns the latencies *percentiles* and retries of the activity
+        tasks by activity type, as computed by
+        ``swf.models.history.columns.HistoryColumns.activity_stats``
+
+        Requires numpy.
+
+        example:
+
+        .. code-block:: python
+
+            >>> history_obj.stats()  # doctest: +SKIP
+            {('resize', '1.0'): {
+                'count': 3,
+                'retries': 1,
+                'schedule_to_start': {50: 0.2, 90: 1.4, 99: 1.67},
+                'start_to_close': {50: 12.0, 90: 12.8, 99: 12.98},
+                'schedule_to_close': {50: 12.2, 90: 14.2, 99: 14.65},
+            }}
+
+        :rtype: dict
+        """
+        return self.to_columns().activity_stats(percentiles)
 
     @classmethod
-    def from_event_list(cls, data):
+    def from_event_list(cls, data, retention=KEEP_BOTH):
         """Instantiates a new ``swf.models.history.History`` instance
         from amazon service response.
 
@@ -252,13 +433,63 @@ class History(object):
         :param  data: event history description (typically, an amazon response)
         :type   data: dict
 
+        :param  retention: retention policy of the events, see
+                           ``swf.models.event.EventFactory``. With
+                           ``swf.constants.KEEP_PARSED``, *data* is not
+                           kept as ``raw``.
+        :type   retention: str
+
         :returns: History model instance built upon data description
         :rtype : swf.model.event.History
         """
         events_history = []
 
         for index, d in enumerate(data):
-            event = EventFactory(d)
+            event = EventFactory(d, retention)
             events_history.append(event)
 
-        return cls(events=events_history, raw=data)
+        return cls(events=events_history,
+                   raw=data if retention != KEEP_PARSED else None,
+                   retention=retention)
+
+    def dump(self, path):
+        """Writes the history events to *path*, in the binary format of
+        ``swf.models.history.binary``
+
+        :param  path: path of the file to write
+        :type   path: str
+        """
+        binary.dump(self.events, path)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Instantiates a new ``swf.models.history.History`` from a file
+        written by ``dump()``
+
+        The file is only read when events are accessed, and events are
+        built on their first access.
+
+        :param  path: path of the file to read
+        :type   path: str
+
+        :param  mmap: map the file in memory instead of reading it
+        :type   mmap: bool
+
+        :rtype: swf.models.history.History
+        """
+        return cls(events=binary.load(path, use_mmap=mmap))
+
+    def extend(self, data):
+        """Appends events built from an amazon service events description
+        to the history, in place.
+
+        *data* must only hold events that come after the current last
+        event, in ascending order.
+
+        :param  data: event history description (typically, an amazon response)
+        :type   data: list
+        """
+        self.events.extend(EventFactory(d, self.retention) for d in data)
+
+        if self.raw is not None and self.raw is not data:
+            self.raw.extend(data)
@@ -0,0 +1,210 @@
+# -*- coding:utf-8 -*-
+
+# Copyright (c) 2013, Theo Crevon
+# Copyright (c) 2013, Greg Leclercq
+#
+# See the file LICENSE for copying permission.
+
+"""Compact binary format of history events
+
+A history file is made of, in that order:
+
+* a header: magic, format version, events count and strings count;
+* the events table: a fixed-width record per event with its id, its
+  timestamp, the string index of its amazon event type, and the offset
+  and size of its attributes blob;
+* the strings table: a fixed-width (offset, size) record per string;
+* the interned strings, utf-8 encoded;
+* the attributes blobs, as compact json.
+
+Offsets are from the start of the file and integers are little-endian.
+"""
+
+import collections
+import json
+import mmap
+import struct
+
+from swf.models.event import EventFactory
+from swf.models.event.base import NOT_KEPT
+from swf.models.history.columns import Codes
+from swf.utils import decapitalize
+
+
+MAGIC = 'SWFH'
+VERSION = 1
+
+HEADER = struct.Struct('<4sHII')  # magic, version, events, strings
+EVENT = struct.Struct('<qdIQI')  # id, timestamp, type, blob offset, size
+STRING = struct.Struct('<QI')  # offset, size
+
+
+def dump(events, path):
+    """Writes *events* to a history file at *path*
+
+    :param  events: events to write, in ascending ids
+    :type   events: list of swf.models.event.Event
+
+    :param  path: path of the file to write
+    :type   path: str
+    """
+    write(((event.id, event.raw['eventTimestamp'], event.name,
+            event_attributes(event)) for event in events), path)
+
+
+def event_attributes(event):
+    """Returns the attributes of *event*, with its input encoded back if
+    it only kept the decoded one
+
+    An empty decoded input is not written: it is also that of the events
+    without input.
+
+    :rtype: dict
+    """
+    attributes = event.attributes
+    input = getattr(event, '_input', NOT_KEPT)
+    if 'input' in attributes or input is NOT_KEPT or input == {}:
+        return attributes
+
+    attributes = dict(attributes)
+    attributes['input'] = json.dumps(input, separators=(',', ':'),
+                                     sort_keys=True)
+    return attributes
+
+
+def dump_raw(raw_events, path):
+    """Writes amazon events descriptions to a history file at *path*,
+    without building events
+
+    :param  raw_events: events descriptions, in ascending ids
+    :type   raw_events: list of dict
+
+    :param  path: path of the file to write
+    :type   path: str
+    """
+    write(((raw['eventId'], raw['eventTimestamp'], raw['eventType'],
+            raw.get(decapitalize(raw['eventType']) + 'EventAttributes', {}))
+           for raw in raw_events), path)
+
+
+def write(records, path):
+    """Writes (id, timestamp, event type, attributes) *records* to a
+    history file at *path*"""
+    strings = Codes()
+    records = [
+        (event_id, timestamp, strings.code(event_type),
+         json.dumps(attributes, separators=(',', ':'), sort_keys=True))
+        for event_id, timestamp, event_type, attributes in records
+    ]
+    encoded_strings = [name.encode('utf-8') for name in strings.names]
+
+    offset = (HEADER.size + EVENT.size * len(records) +
+              STRING.size * len(encoded_strings))
+
+    with open(path, 'wb') as stream:
+        stream.write(HEADER.pack(MAGIC, VERSION, len(records),
+                                 len(encoded_strings)))
+
+        blobs_offset = offset + sum(len(string) for string in encoded_strings)
+        for event_id, timestamp, event_type, blob in records:
+            stream.write(EVENT.pack(event_id, timestamp, event_type,
+                                    blobs_offset, len(blob)))
+            blobs_offset += len(blob)
+
+        for string in encoded_strings:
+            stream.write(STRING.pack(offset, len(string)))
+            offset += len(string)
+
+        for string in encoded_strings:
+            stream.write(string)
+
+        for _, _, _, blob in records:
+            stream.write(blob)
+
+
+def load(path, use_mmap=True):
+    """Reads the events of the history file at *path*
+
+    :param  path: path of the file to read
+    :type   path: str
+
+    :param  use_mmap: map the file in memory instead of reading it
+    :type   use_mmap: bool
+
+    :rtype: MappedEvents
+    """
+    with open(path, 'rb') as stream:
+        if use_mmap:
+            buffer = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            buffer = stream.read()
+
+    return MappedEvents(buffer)
+
+
+class MappedEvents(collections.Sequence):
+    """Sequence of the events of a history file buffer
+
+    Events are only built, and their attributes decoded, when accessed.
+    Events appended to the sequence are kept in memory.
+
+    :param  buffer: history file content, or a memory map of it
+    :type   buffer: str or mmap.mmap
+
+    :raises: ValueError if *buffer* is not a supported history file
+    """
+    def __init__(self, buffer):
+        magic, version, count, strings_count = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('not a version {} history file'.format(VERSION))
+
+        self._buffer = buffer
+        self._count = count
+        self._events = [None] * count
+        self._appended = []
+
+        strings_position = HEADER.size + EVENT.size * count
+        self._strings = []
+        for index in xrange(strings_count):
+            offset, size = STRING.unpack_from(
+                buffer, strings_position + STRING.size * index)
+            self._strings.append(
+                buffer[offset:offset + size].decode('utf-8'))
+
+    def __len__(self):
+        return self._count + len(self._appended)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in xrange(*index.indices(len(self)))]
+
+        if index < 0:
+            index += len(self)
+        if index >= self._count:
+            return self._appended[index - self._count]
+        if index < 0:
+            raise IndexError('event index out of range')
+
+        event = self._events[index]
+        if event is None:
+            event = self._events[index] = self._build(index)
+        return event
+
+    def _build(self, index):
+        event_id, timestamp, name, offset, size = EVENT.unpack_from(
+            self._buffer, HEADER.size + EVENT.size * index)
+        event_type = self._strings[name]
+
+        return EventFactory({
+            'eventId': event_id,
+            'eventType': event_type,
+            'eventTimestamp': timestamp,
+            decapitalize(event_type) + 'EventAttributes':
+                json.loads(self._buffer[offset:offset + size]),
+        })
+
+    def append(self, event):
+        self._appended.append(event)
+
+    def extend(self, events):
+        self._appended.extend(events)
@@ -1,8 +1,11 @@
 import json
+import random
 
 import swf.models
 import swf.models.event.workflow
 from swf.models.event.factory import EventFactory
+from swf.models.history import binary
+from swf.utils import decapitalize
 
 DEFAULT_DECIDER_IDENTITY = 'test_decider'
 DEFAULT_WORKER_IDENTITY = 'test_worker'
@@ -10,7 +13,7 @@ DEFAULT_REASON = 'REASON'
 DEFAULT_DETAILS = 'DETAILS'
 
 
-__all__ = ['History']
+__all__ = ['History', 'HistoryGenerator']
 
 
 FIRST_TIMESTAMP = None
@@ -669,3 +672,250 @@ class History(swf.models.History):
         }))
 
         return self
+
+
+# Maximum number of events in an amazon swf workflow execution history
+MAX_EVENTS = 25000
+
+
+class HistoryGenerator(object):
+    """
+    Generates synthetic histories, as amazon events descriptions.
+
+    The generated workflow execution runs *activities* activity tasks,
+    *timers* timers and *child_workflows* child workflow executions,
+    started *fan_out* at a time by each decision task, in an order and
+    with outcomes drawn from a random generator seeded with *seed*: the
+    same arguments always generate the same history.
+
+    An activity task attempt fails with probability *failure_rate*, and
+    is then scheduled again, up to *retries* times. The execution is
+    completed after the last decision task, or when the history would
+    exceed *max_events* events.
+
+    Unlike :class:`History`, no event is built: use :meth:`history`, or
+    :meth:`dump` for the binary format of ``History.load()``.
+
+    :param seed: random generator seed
+    :type  seed: hashable
+    :param start: timestamp of the first event
+    :type  start: float
+
+    """
+    def __init__(self,
+                 activities=10,
+                 fan_out=1,
+                 retries=0,
+                 failure_rate=0.0,
+                 timers=0,
+                 child_workflows=0,
+                 max_events=MAX_EVENTS,
+                 seed=0,
+                 start=1365177769.0,
+                 task_list='test',
+                 workflow_name='workflow',
+                 activity_names=('activity',),
+                 version='1.0'):
+        if max_events < 8:
+            raise ValueError('max_events must be at least 8')
+
+        self.activities = activities
+        self.fan_out = max(1, fan_out)
+        self.retries = retries
+        self.failure_rate = failure_rate
+        self.timers = timers
+        self.child_workflows = child_workflows
+        self.max_events = min(max_events, MAX_EVENTS)
+        self.seed = seed
+        self.start = start
+        self.task_list = task_list
+        self.workflow_name = workflow_name
+        self.activity_names = activity_names
+        self.version = version
+
+    def _event(self, event_type, **attributes):
+        self._clock += self._random.uniform(0.001, 2.0)
+        event = {
+            'eventId': len(self._events) + 1,
+            'eventType': event_type,
+            'eventTimestamp': round(self._clock, 3),
+            decapitalize(event_type) + 'EventAttributes': attributes,
+        }
+        self._events.append(event)
+        return event['eventId']
+
+    def _decision_task(self):
+        scheduled = self._event('DecisionTaskScheduled',
+                                taskList={'name': self.task_list},
+                                startToCloseTimeout='300')
+        return scheduled, self._event('DecisionTaskStarted',
+                                      scheduledEventId=scheduled,
+                                      identity=DEFAULT_DECIDER_IDENTITY)
+
+    def _decision_task_completed(self, scheduled, started):
+        return self._event('DecisionTaskCompleted',
+                           scheduledEventId=scheduled,
+                           startedEventId=started)
+
+    def _start(self, item, decision_id):
+        """Records the decision to start *item*, returns the events that
+        close it"""
+        kind, number, attempt = item
+
+        if kind == 'activity':
+            name = self.activity_names[number % len(self.activity_names)]
+            scheduled = self._event(
+                'ActivityTaskScheduled',
+                activityId='{}-{}'.format(name, number),
+                activityType={'name': name, 'version': self.version},
+                taskList={'name': self.task_list},
+                input=json.dumps({'number': number, 'attempt': attempt},
+                                 sort_keys=True),
+                decisionTaskCompletedEventId=decision_id,
+                scheduleToCloseTimeout='600',
+                scheduleToStartTimeout='300',
+                startToCloseTimeout='300',
+                heartbeatTimeout='60',
+            )
+            return [self._activity_outcome(item, scheduled)]
+
+        if kind == 'timer':
+            timer_id = 'timer-{}'.format(number)
+            started = self._event('TimerStarted',
+                                  timerId=timer_id,
+                                  startToFireTimeout='60',
+                                  decisionTaskCompletedEventId=decision_id)
+            return [lambda: self._event('TimerFired',
+                                        timerId=timer_id,
+                                        startedEventId=started)]
+
+        workflow_id = '{}-child-{}'.format(self.workflow_name, number)
+        workflow_type = {'name': self.workflow_name, 'version': self.version}
+        initiated = self._event('StartChildWorkflowExecutionInitiated',
+                                workflowId=workflow_id,
+                                workflowType=workflow_type,
+                                taskList={'name': self.task_list},
+                                childPolicy='TERMINATE',
+                                decisionTaskCompletedEventId=decision_id)
+        execution = {'workflowId': workflow_id,
+                     'runId': '{:032x}'.format(self._random.getrandbits(128))}
+
+        def completed(started):
+            return lambda: self._event('ChildWorkflowExecutionCompleted',
+                                       initiatedEventId=initiated,
+                                       startedEventId=started,
+                                       workflowExecution=execution,
+                                       workflowType=workflow_type,
+                                       result='{}')
+
+        return [lambda: completed(self._event(
+            'ChildWorkflowExecutionStarted',
+            initiatedEventId=initiated,
+            workflowExecution=execution,
+            workflowType=workflow_type,
+        ))]
+
+    def _activity_outcome(self, item, scheduled):
+        kind, number, attempt = item
+
+        def started():
+            started = self._event('ActivityTaskStarted',
+                                  scheduledEventId=scheduled,
+                                  identity=DEFAULT_WORKER_IDENTITY)
+
+            def closed():
+                if (attempt < self.retries and
+                        self._random.random() < self.failure_rate):
+                    self._retries.append((kind, number, attempt + 1))
+                    return self._event('ActivityTaskFailed',
+                                       scheduledEventId=scheduled,
+                                       startedEventId=started,
+                                       reason=DEFAULT_REASON,
+                                       details=DEFAULT_DETAILS)
+                return self._event('ActivityTaskCompleted',
+                                   scheduledEventId=scheduled,
+                                   startedEventId=started,
+                                   result=json.dumps({'number': number}))
+            return closed
+
+        return started
+
+    def _run_batch(self, batch, decision_id):
+        pending = []
+        for item in batch:
+            pending.extend(self._start(item, decision_id))
+
+        # Items progress in a random order: each step records the next
+        # event of an item, and may return the step after it.
+        while pending:
+            step = pending.pop(self._random.randrange(len(pending)))
+            next_step = step()
+            if callable(next_step):
+                pending.append(next_step)
+
+    def events(self):
+        """Generates the history
+
+        :rtype: list of dict
+        """
+        self._random = random.Random(self.seed)
+        self._clock = self.start
+        self._events = []
+        self._retries = []
+
+        items = ([('activity', number, 0) for
+                  number in xrange(self.activities)] +
+                 [('timer', number, 0) for number in xrange(self.timers)] +
+                 [('child', number, 0) for
+                  number in xrange(self.child_workflows)])
+        self._random.shuffle(items)
+
+        self._event('WorkflowExecutionStarted',
+                    taskList={'name': self.task_list},
+                    workflowType={'name': self.workflow_name,
+                                  'version': self.version},
+                    childPolicy='TERMINATE',
+                    input='{}',
+                    parentInitiatedEventId=0,
+                    taskStartToCloseTimeout='300',
+                    executionStartToCloseTimeout='86400')
+        scheduled, started = self._decision_task()
+
+        # Items to start, the next one last
+        items.reverse()
+
+        while items or self._retries:
+            items.extend(reversed(self._retries))
+            self._retries = []
+
+            # At most 3 events per item, 3 for the decision tasks and 2 to
+            # complete the execution.
+            room = max(0, (self.max_events - len(self._events) - 5) // 3)
+            batch = [items.pop() for _ in xrange(min(self.fan_out, room,
+                                                     len(items)))]
+            if not batch:
+                break
+
+            decision_id = self._decision_task_completed(scheduled, started)
+            self._run_batch(batch, decision_id)
+            scheduled, started = self._decision_task()
+
+        decision_id = self._decision_task_completed(scheduled, started)
+        self._event('WorkflowExecutionCompleted',
+                    result='{}',
+                    decisionTaskCompletedEventId=decision_id)
+
+        events = self._events
+        del self._random, self._clock, self._events, self._retries
+        return events
+
+    def history(self):
+        """Generates the history as a ``swf.models.history.History``
+
+        :rtype: swf.models.history.History
+        """
+        return swf.models.History.from_event_list(self.events())
+
+    def dump(self, path):
+        """Generates the history in a binary history file at *path*"""
+        binary.dump_raw(self.events(), path)
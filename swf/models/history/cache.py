@@ -0,0 +1,106 @@
+# -*- coding:utf-8 -*-
+
+# Copyright (c) 2013, Theo Crevon
+# Copyright (c) 2013, Greg Leclercq
+#
+# See the file LICENSE for copying permission.
+
+import threading
+from collections import OrderedDict
+
+
+class HistoryCache(object):
+    """Least recently used store of workflow executions histories
+
+    Histories are keyed by ``(workflow_id, run_id)``. The cache is bounded
+    both by the number of histories it holds and by the total number of
+    events across them, the latter being the one that drives memory usage.
+    Least recently used histories are evicted first.
+
+    It is safe to share a cache between threads.
+
+    :param  max_entries: maximum number of histories to hold
+    :type   max_entries: int
+
+    :param  max_events: maximum number of events to hold across histories
+    :type   max_events: int
+    """
+    def __init__(self, max_entries=1000, max_events=1000000):
+        self.max_entries = max_entries
+        self.max_events = max_events
+
+        self._histories = OrderedDict()
+        self._sizes = {}
+        self._events_count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._histories)
+
+    def __contains__(self, key):
+        return key in self._histories
+
+    @property
+    def events_count(self):
+        """Number of events currently held"""
+        return self._events_count
+
+    def get(self, key, default=None):
+        """Returns the history stored for *key* and marks it as
+        recently used
+
+        :param  key: (workflow_id, run_id)
+        :type   key: tuple
+
+        :rtype: swf.models.history.History
+        """
+        with self._lock:
+            history = self._histories.pop(key, None)
+            if history is None:
+                return default
+
+            self._histories[key] = history
+            return history
+
+    def set(self, key, history):
+        """Stores *history* for *key*
+
+        Must be called again whenever a stored history is extended, for
+        the cache to account for its new size.
+
+        :param  key: (workflow_id, run_id)
+        :type   key: tuple
+
+        :param  history: history to store
+        :type   history: swf.models.history.History
+        """
+        with self._lock:
+            self._remove(key)
+
+            size = len(history)
+            if size > self.max_events:
+                return
+
+            self._histories[key] = history
+            self._sizes[key] = size
+            self._events_count += size
+
+            while (len(self._histories) > self.max_entries or
+                   self._events_count > self.max_events):
+                oldest = next(iter(self._histories))
+                self._remove(oldest)
+
+    def discard(self, key):
+        """Removes the history stored for *key*, if any"""
+        with self._lock:
+            self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._histories.clear()
+            self._sizes.clear()
+            self._events_count = 0
+
+    def _remove(self, key):
+        if self._histories.pop(key, None) is not None:
+            self._events_count -= self._sizes.pop(key)
@@ -0,0 +1,218 @@
+# -*- coding:utf-8 -*-
+
+# Copyright (c) 2013, Theo Crevon
+# Copyright (c) 2013, Greg Leclercq
+#
+# See the file LICENSE for copying permission.
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# Attributes of the events columns holding event ids, 0 when missing
+REFERENCE_ATTRIBUTES = (
+    ('scheduled_event_id', 'scheduledEventId'),
+    ('started_event_id', 'startedEventId'),
+    ('initiated_event_id', 'initiatedEventId'),
+)
+
+# Activity task states closing an attempt
+ACTIVITY_CLOSED_STATES = (
+    'completed',
+    'failed',
+    'timed_out',
+    'canceled',
+)
+
+
+def require_numpy():
+    if numpy is None:
+        raise ImportError('numpy is required by history columns, '
+                          'install simple-workflow[analytics]')
+
+
+class Codes(object):
+    """Integer codes of strings, in order of appearance
+
+    >>> codes = Codes()
+    >>> codes.code('ActivityTask'), codes.code('Timer')
+    (0, 1)
+    >>> codes.code('ActivityTask')
+    0
+    >>> codes[1]
+    'Timer'
+    >>> codes.get('Marker')
+    -1
+
+    """
+    def __init__(self):
+        self.names = []
+        self._codes = {}
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, code):
+        return self.names[code]
+
+    def code(self, name):
+        try:
+            return self._codes[name]
+        except KeyError:
+            code = self._codes[name] = len(self.names)
+            self.names.append(name)
+            return code
+
+    def get(self, name):
+        """Returns the code of *name*, or -1 if it has none"""
+        return self._codes.get(name, -1)
+
+
+class HistoryColumns(object):
+    """Events of a history as NumPy arrays, one entry per event
+
+    * ``id``: event ids
+    * ``type``, ``state``: codes of the event types and states, decoded by
+      ``types`` and ``states``
+    * ``timestamp``: event timestamps, in seconds since the epoch
+    * ``scheduled_event_id``, ``started_event_id``,
+      ``initiated_event_id``: ids of the events referred to, or 0
+    * ``activity_id``, ``activity_type``: codes of the activity ids and
+      of the ``(name, version)`` activity types of activity task
+      scheduled events, decoded by ``activity_ids`` and
+      ``activity_types``, or -1
+
+    :param  events: events to build the columns from, in ascending ids
+    :type   events: list of swf.models.event.Event
+    """
+    def __init__(self, events):
+        require_numpy()
+
+        self.types = Codes()
+        self.states = Codes()
+        self.activity_ids = Codes()
+        self.activity_types = Codes()
+
+        count = len(events)
+        self.id = numpy.empty(count, dtype=numpy.int64)
+        self.type = numpy.empty(count, dtype=numpy.int16)
+        self.state = numpy.empty(count, dtype=numpy.int16)
+        self.timestamp = numpy.empty(count, dtype=numpy.float64)
+        for column, _ in REFERENCE_ATTRIBUTES:
+            setattr(self, column, numpy.zeros(count, dtype=numpy.int64))
+        self.activity_id = numpy.full(count, -1, dtype=numpy.int32)
+        self.activity_type = numpy.full(count, -1, dtype=numpy.int32)
+
+        for position, event in enumerate(events):
+            self._set(position, event)
+
+    def __len__(self):
+        return len(self.id)
+
+    def _set(self, position, event):
+        attributes = event.attributes
+
+        self.id[position] = event.id
+        self.type[position] = self.types.code(event.type)
+        self.state[position] = self.states.code(event.state)
+        self.timestamp[position] = event.raw['eventTimestamp']
+
+        for column, key in REFERENCE_ATTRIBUTES:
+            if key in attributes:
+                getattr(self, column)[position] = attributes[key]
+
+        if 'activityId' in attributes:
+            self.activity_id[position] = self.activity_ids.code(
+                attributes['activityId'])
+        if 'activityType' in attributes:
+            activity_type = attributes['activityType']
+            self.activity_type[position] = self.activity_types.code(
+                (activity_type['name'], activity_type['version']))
+
+    def mask(self, type, state=None):
+        """Returns a boolean array of the events of *type*, and *state* if
+        provided
+
+        :rtype: numpy.ndarray
+        """
+        mask = self.type == self.types.get(type)
+        if state is not None:
+            mask &= self.state == self.states.get(state)
+        return mask
+
+    def positions(self, event_ids):
+        """Returns the positions of the events with *event_ids*, and
+        whether each one is in the columns: events missing from a partial
+        history, as ``history[60:]``, have no valid position
+
+        :rtype: (numpy.ndarray, numpy.ndarray of bool)
+        """
+        event_ids = numpy.asarray(event_ids)
+        if not len(self.id):
+            return (numpy.zeros(len(event_ids), dtype=int),
+                    numpy.zeros(len(event_ids), dtype=bool))
+
+        positions = numpy.minimum(numpy.searchsorted(self.id, event_ids),
+                                  len(self.id) - 1)
+        return positions, self.id[positions] == event_ids
+
+    def activity_stats(self, percentiles=(50, 90, 99)):
+        """Activity tasks latencies and retries by activity type
+
+        Latencies are the *percentiles* of the durations in seconds between
+        the scheduling and the start (``schedule_to_start``), the start and
+        the end (``start_to_close``) and the scheduling and the end
+        (``schedule_to_close``) of the activity task attempts. ``retries``
+        counts the attempts scheduled after the first one of each
+        activity id.
+
+        :rtype: dict of (name, version): dict
+        """
+        started = self.mask('ActivityTask', 'started')
+        closed = numpy.in1d(self.state, [self.states.get(state) for
+                                         state in ACTIVITY_CLOSED_STATES])
+        closed &= self.mask('ActivityTask')
+        scheduled = self.mask('ActivityTask', 'scheduled')
+
+        def latencies(mask, since):
+            """Activity types and durations since the *since* event of
+            the *mask* events, but of those whose events are missing"""
+            rows = numpy.flatnonzero(mask)
+            scheduled, found = self.positions(self.scheduled_event_id[rows])
+            since, since_found = self.positions(since[rows])
+            found &= since_found
+            return (self.activity_type[scheduled[found]],
+                    self.timestamp[rows[found]] -
+                    self.timestamp[since[found]])
+
+        latency_columns = {
+            'schedule_to_start': latencies(started,
+                                           self.scheduled_event_id),
+            'start_to_close': latencies(closed & (self.started_event_id > 0),
+                                        self.started_event_id),
+            'schedule_to_close': latencies(closed, self.scheduled_event_id),
+        }
+
+        stats = {}
+        for code, activity_type in enumerate(self.activity_types.names):
+            of_type = scheduled & (self.activity_type == code)
+            attempts = int(numpy.count_nonzero(of_type))
+            activities = len(numpy.unique(self.activity_id[of_type]))
+
+            type_stats = {
+                'count': attempts,
+                'retries': attempts - activities,
+            }
+            for name, (codes, values) in latency_columns.iteritems():
+                values = values[codes == code]
+                type_stats[name] = {}
+                if len(values):
+                    type_stats[name] = dict(zip(
+                        percentiles,
+                        numpy.percentile(values, percentiles).tolist(),
+                    ))
+            stats[activity_type] = type_stats
+
+        return stats
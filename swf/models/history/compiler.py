@@ -0,0 +1,130 @@
+# -*- coding:utf-8 -*-
+
+# Copyright (c) 2013, Theo Crevon
+# Copyright (c) 2013, Greg Leclercq
+#
+# See the file LICENSE for copying permission.
+
+from swf.models.event import CompiledEventFactory
+
+
+# Event type to (attribute holding the id of an event of the same entity,
+# attribute identifying the entity)
+ENTITY_ATTRIBUTES = {
+    'ActivityTask': ('scheduledEventId', 'activityId'),
+    'DecisionTask': ('scheduledEventId', None),
+    'Timer': ('startedEventId', 'timerId'),
+    'ChildWorkflowExecution': ('initiatedEventId', 'workflowId'),
+    'ExternalWorkflowExecution': ('initiatedEventId', None),
+}
+
+# Event types with a single entity per history
+SINGLE_ENTITY_TYPES = (
+    'WorkflowExecution',
+)
+
+
+class EntityKeys(object):
+    """Tells which entity of a history (an activity task, a timer, a child
+    workflow execution...) events belong to
+
+    Events are looked at once, in the history order. An event belongs to
+    the entity of the event it refers to through its scheduled, started or
+    initiated event id. Otherwise, the events that can start an entity
+    start a new one, and the others belong to the latest entity with the
+    same activity, timer or workflow id.
+
+    Keys are tuples made of the entity type and of the id of its first
+    event, or only of the type for entities unique in a history.
+
+    """
+    def __init__(self):
+        self._by_event_id = {}
+        self._by_identity = {}
+
+    def __call__(self, event):
+        """Returns the key of the entity of *event*
+
+        :rtype: tuple
+        """
+        if event.type in SINGLE_ENTITY_TYPES:
+            key = (event.type,)
+        else:
+            key = self._entity_key(event)
+
+        self._by_event_id[event.id] = key
+        return key
+
+    def _entity_key(self, event):
+        reference, identity = ENTITY_ATTRIBUTES.get(event.type,
+                                                    (None, None))
+        attributes = event.attributes
+
+        if reference in attributes:
+            key = self._by_event_id.get(attributes[reference])
+            if key is not None:
+                return key
+
+        if identity not in attributes:
+            return (event.type, event.id)
+
+        identity_key = (event.type, attributes[identity])
+        key = self._by_identity.get(identity_key)
+
+        if key is None or starts_entity(event):
+            key = (event.type, event.id)
+            self._by_identity[identity_key] = key
+
+        return key
+
+
+def starts_entity(event):
+    """Tells if *event* can be the first event of an entity
+
+    :rtype: bool
+    """
+    compiled_class = CompiledEventFactory.events[event.type]['compiled_event']
+    return compiled_class.is_initial(event.state)
+
+
+class HistoryCompiler(object):
+    """Compiles history events incrementally
+
+    Keeps a ``swf.models.event.CompiledEvent`` state machine per entity
+    of the history, as told by ``EntityKeys``, and applies each added
+    event to the state machine of its entity, in constant time. Compiled
+    events are listed in ``compiled_events`` in the order their entities
+    appeared.
+
+    :param  events: events to compile first, kept as ``events``
+    :type   events: list
+    """
+    def __init__(self, events=()):
+        self.events = events
+        self.compiled_events = []
+        self.count = 0
+        self._entities = {}
+        self._entity_keys = EntityKeys()
+
+        for event in events:
+            self.add(event)
+
+    def add(self, event):
+        """Applies *event* to the state machine of its entity"""
+        key = self._entity_keys(event)
+
+        compiled_event = self._entities.get(key)
+        if compiled_event is None:
+            compiled_event = CompiledEventFactory(event)
+            self._entities[key] = compiled_event
+            self.compiled_events.append(compiled_event)
+        else:
+            compiled_event.transit(event)
+
+        self.count += 1
+
+    def update(self):
+        """Compiles the events appended to ``events`` since the last
+        update"""
+        for event in self.events[self.count:]:
+            self.add(event)
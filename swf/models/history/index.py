@@ -0,0 +1,75 @@
+# -*- coding:utf-8 -*-
+
+# Copyright (c) 2013, Theo Crevon
+# Copyright (c) 2013, Greg Leclercq
+#
+# See the file LICENSE for copying permission.
+
+from collections import defaultdict
+
+from swf.models.event.base import attribute_name
+
+
+# Event attributes that identify an entity or refer to another event
+INDEXED_ATTRIBUTES = (
+    'activity_id',
+    'timer_id',
+    'workflow_id',
+    'scheduled_event_id',
+    'started_event_id',
+    'initiated_event_id',
+)
+
+
+class HistoryIndex(object):
+    """Lookup tables over history events
+
+    Events are indexed by id, by type, by (type, state) and by the value
+    of their ``INDEXED_ATTRIBUTES``. Each table lists events in the order
+    they were added.
+
+    :param  events: events to index first, kept as ``events``
+    :type   events: list
+    """
+    def __init__(self, events=()):
+        self.events = events
+        self.by_id = {}
+        self.by_type = defaultdict(list)
+        self.by_type_state = defaultdict(list)
+        self.by_attribute = {attr: defaultdict(list) for attr in
+                             INDEXED_ATTRIBUTES}
+        self.count = 0
+
+        for event in events:
+            self.add(event)
+
+    def add(self, event):
+        self.by_id[event.id] = event
+        self.by_type[event.type].append(event)
+        self.by_type_state[(event.type, event.state)].append(event)
+
+        for key, value in event.attributes.iteritems():
+            index = self.by_attribute.get(attribute_name(key))
+            if index is not None:
+                index[value].append(event)
+
+        self.count += 1
+
+    def candidates(self, **kwargs):
+        """Returns the smallest indexed list of events that holds every
+        event matching *kwargs*, or None if no kwarg is indexed"""
+        if 'id' in kwargs:
+            event = self.by_id.get(kwargs['id'])
+            return [event] if event is not None else []
+
+        for attr in INDEXED_ATTRIBUTES:
+            if attr in kwargs:
+                return self.by_attribute[attr].get(kwargs[attr], [])
+
+        if 'type' in kwargs:
+            if 'state' in kwargs:
+                return self.by_type_state.get(
+                    (kwargs['type'], kwargs['state']), [])
+            return self.by_type.get(kwargs['type'], [])
+
+        return None
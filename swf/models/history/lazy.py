@@ -0,0 +1,127 @@
+# -*- coding:utf-8 -*-
+
+# Copyright (c) 2013, Theo Crevon
+# Copyright (c) 2013, Greg Leclercq
+#
+# See the file LICENSE for copying permission.
+
+import threading
+
+from swf.constants import KEEP_BOTH
+from swf.models.event import EventFactory
+from swf.models.history.base import History
+
+
+class LazyHistory(History):
+    """History whose events are fetched and parsed page by page
+
+    Pages are only requested when events they hold are needed: iterating
+    in the pages order stops fetching as soon as the iteration stops.
+    With pages in reverse order (newest events first), ``reversed`` and
+    ``last`` only fetch the most recent pages; with pages in natural
+    order, iterating and ``first`` do.
+
+    Any other access (``len()``, indexing, ``filter()``...) fetches the
+    remaining pages.
+
+    :param  pages: iterable of amazon events descriptions lists
+    :type   pages: iterable
+
+    :param  reverse_order: whether pages hold events in reverse order
+    :type   reverse_order: bool
+
+    :param  retention: retention policy of the events, see
+                       ``swf.models.event.EventFactory``
+    :type   retention: str
+    """
+
+    def __init__(self, pages, reverse_order=False, retention=KEEP_BOTH):
+        self._pages = iter(pages)
+        self._reverse_order = reverse_order
+        self.retention = retention
+        self._fetched = []
+        self._events = None
+        self.raw = None
+        self._lock = threading.Lock()
+
+    @property
+    def events(self):
+        if self._events is None:
+            while self._fetch_page():
+                pass
+
+            if self._reverse_order:
+                self._events = self._fetched[::-1]
+            else:
+                self._events = self._fetched
+            self._fetched = None
+
+        return self._events
+
+    @property
+    def complete(self):
+        """Whether every page was fetched
+
+        :rtype: bool
+        """
+        return self._events is not None or self._pages is None
+
+    def _fetch_page(self):
+        if self._pages is None:
+            return False
+
+        try:
+            page = next(self._pages)
+        except StopIteration:
+            self._pages = None
+            return False
+
+        self._fetched.extend(EventFactory(d, self.retention) for d in page)
+        return True
+
+    def _stream(self):
+        """Yields events in the pages order, fetching pages as needed"""
+        position = 0
+
+        while self._events is None:
+            if position < len(self._fetched):
+                yield self._fetched[position]
+                position += 1
+            elif not self._fetch_page():
+                break
+
+        if self._events is not None:
+            remaining = (self._events[:len(self._events) - position] if
+                         self._reverse_order else
+                         self._events[position:])
+            for event in (reversed(remaining) if self._reverse_order else
+                          remaining):
+                yield event
+
+    def __iter__(self):
+        if self._reverse_order:
+            return iter(self.events)
+        return self._stream()
+
+    @property
+    def reversed(self):
+        if self._reverse_order:
+            return self._stream()
+        return super(LazyHistory, self).reversed
+
+    def _first_fetched(self):
+        for event in self._stream():
+            return event
+        raise IndexError('history is empty')
+
+    @property
+    def last(self):
+        if self._reverse_order:
+            return self._first_fetched()
+        return self.events[-1]
+
+    @property
+    def first(self):
+        if not self._reverse_order:
+            return self._first_fetched()
+        return self.events[0]
@@ -0,0 +1,444 @@
+# -*- coding:utf-8 -*-
+
+# Copyright (c) 2013, Theo Crevon
+# Copyright (c) 2013, Greg Leclercq
+#
+# See the file LICENSE for copying permission.
+
+"""Replays stored histories through a decider, without swf
+
+A decider is a callable that takes the ``swf.models.history.History`` of
+a decision task, up to its ``DecisionTaskStarted`` event, and returns the
+list of its ``swf.models.decision.Decision``. Replaying a history calls it
+for each decision task of the history, checks its decisions against the
+events recorded for the ``DecisionTaskCompleted`` event of the task, and
+measures each call.
+
+It can also be run to benchmark a decider over history files, as written
+by ``History.dump()`` or as json ``GetWorkflowExecutionHistory``
+responses:
+
+.. code-block:: bash
+
+    $ python -m swf.models.history.replay mypackage.deciders:decide \\
+        histories/*.bin
+"""
+
+import argparse
+import collections
+import gc
+import itertools
+import json
+import sys
+from timeit import default_timer
+
+from swf.models.history.base import History
+from swf.utils import decapitalize
+
+
+# Decision type to (names of the events recording it, attribute
+# identifying the decision target)
+DECISION_EVENTS = {
+    'ScheduleActivityTask': (
+        ('ActivityTaskScheduled', 'ScheduleActivityTaskFailed'),
+        'activityId'),
+    'RequestCancelActivityTask': (
+        ('ActivityTaskCancelRequested', 'RequestCancelActivityTaskFailed'),
+        'activityId'),
+    'StartTimer': (
+        ('TimerStarted', 'StartTimerFailed'),
+        'timerId'),
+    'CancelTimer': (
+        ('TimerCanceled', 'CancelTimerFailed'),
+        'timerId'),
+    'RecordMarker': (
+        ('MarkerRecorded', 'RecordMarkerFailed'),
+        'markerName'),
+    'CompleteWorkflowExecution': (
+        ('WorkflowExecutionCompleted', 'CompleteWorkflowExecutionFailed'),
+        None),
+    'FailWorkflowExecution': (
+        ('WorkflowExecutionFailed', 'FailWorkflowExecutionFailed'),
+        None),
+    'CancelWorkflowExecution': (
+        ('WorkflowExecutionCanceled', 'CancelWorkflowExecutionFailed'),
+        None),
+    'ContinueAsNewWorkflowExecution': (
+        ('WorkflowExecutionContinuedAsNew',
+         'ContinueAsNewWorkflowExecutionFailed'),
+        None),
+    'StartChildWorkflowExecution': (
+        ('StartChildWorkflowExecutionInitiated',
+         'StartChildWorkflowExecutionFailed'),
+        'workflowId'),
+    'SignalExternalWorkflowExecution': (
+        ('SignalExternalWorkflowExecutionInitiated',
+         'SignalExternalWorkflowExecutionFailed'),
+        'workflowId'),
+    'RequestCancelExternalWorkflowExecution': (
+        ('RequestCancelExternalWorkflowExecutionInitiated',
+         'RequestCancelExternalWorkflowExecutionFailed'),
+        'workflowId'),
+}
+
+# Event name to the decision type it records
+EVENT_DECISIONS = dict(
+    (event_name, decision_type) for
+    decision_type, (event_names, _) in DECISION_EVENTS.iteritems() for
+    event_name in event_names
+)
+
+
+def decision_signature(decision):
+    """Returns the type and the target of *decision*
+
+    >>> from swf.models.decision import TimerDecision
+    >>> decision = TimerDecision('start', id='wait',
+    ...                          start_to_fire_timeout='60')
+    >>> decision_signature(decision)
+    ('StartTimer', 'wait')
+
+    :rtype: tuple
+    """
+    decision_type = decision['decisionType']
+    _, identity = DECISION_EVENTS.get(decision_type, ((), None))
+    attributes = decision.get(
+        decapitalize(decision_type) + 'DecisionAttributes') or {}
+
+    return (decision_type, attributes.get(identity))
+
+
+def recorded_signature(event):
+    """Returns the type and the target of the decision recorded by
+    *event*
+
+    :rtype: tuple
+    """
+    decision_type = EVENT_DECISIONS[event.name]
+    _, identity = DECISION_EVENTS[decision_type]
+
+    return (decision_type, event.attributes.get(identity))
+
+
+def recorded_decisions(events):
+    """Returns the signatures of the decisions recorded in *events*, by
+    id of the ``DecisionTaskStarted`` event of their decision task
+
+    :rtype: dict of int: list of tuples
+    """
+    started_ids = {}
+    decisions = {}
+
+    for event in events:
+        attributes = event.attributes
+        if event.name == 'DecisionTaskCompleted':
+            started_ids[event.id] = attributes['startedEventId']
+            decisions[attributes['startedEventId']] = []
+        elif event.name in EVENT_DECISIONS:
+            started_id = started_ids[
+                attributes['decisionTaskCompletedEventId']]
+            decisions[started_id].append(recorded_signature(event))
+
+    return decisions
+
+
+class EventsPrefix(collections.Sequence):
+    """Sequence of the *length* first events of *events*, not copied
+
+    The histories of the decision tasks of a history share its events,
+    instead of each holding a copy of the events up to its task.
+
+    :param  events: events of the history
+    :type   events: list of swf.models.event.Event
+
+    :param  length: count of the first events in the sequence
+    :type   length: int
+    """
+    def __init__(self, events, length):
+        self._events = events
+        self._length = length
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._length)
+            if stop < 0:
+                # Backwards up to the first event
+                stop = None
+            return self._events[start:stop:step]
+
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError('event index out of range')
+        return self._events[index]
+
+    def __iter__(self):
+        return itertools.islice(self._events, self._length)
+
+
+def measure(call, *args, **kwargs):
+    """Calls ``call(*args, **kwargs)`` and measures it
+
+    Allocations are counted as the number of container objects, tracked
+    by the garbage collector, that are still allocated when *call*
+    returns: the collector is disabled during the call.
+
+    :returns: the result of the call, its duration in seconds and its
+              allocations
+    :rtype: tuple
+    """
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        allocations = gc.get_count()[0]
+        start = default_timer()
+        result = call(*args, **kwargs)
+        latency = default_timer() - start
+        allocations = gc.get_count()[0] - allocations
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    return result, latency, allocations
+
+
+class DecisionReplay(object):
+    """Replay of a decision task
+
+    :param  started_event_id: id of the ``DecisionTaskStarted`` event of
+                              the task
+    :type   started_event_id: int
+
+    :param  expected: signatures of the recorded decisions, None if the
+                      task was not completed
+    :type   expected: list
+
+    :param  decisions: decisions returned by the decider
+    :type   decisions: list of swf.models.decision.Decision
+
+    :param  latency: duration of the decider call in seconds
+    :type   latency: float
+
+    :param  allocations: objects allocated by the decider call
+    :type   allocations: int
+    """
+    def __init__(self, started_event_id, expected, decisions, latency,
+                 allocations):
+        self.started_event_id = started_event_id
+        self.expected = expected
+        self.decisions = decisions
+        self.latency = latency
+        self.allocations = allocations
+
+    def __repr__(self):
+        return '<DecisionReplay {} {}>'.format(
+            self.started_event_id, 'matches' if self.matches else 'differs')
+
+    @property
+    def signatures(self):
+        return [decision_signature(decision) for decision in self.decisions]
+
+    @property
+    def matches(self):
+        """Whether the decisions are the recorded ones, or no decision was
+        recorded
+
+        :rtype: bool
+        """
+        return self.expected is None or self.signatures == self.expected
+
+
+def percentile(values, rank):
+    """Returns the *rank* percentile of *values*, by nearest rank
+
+    >>> percentile([3, 1, 2, 4], 50)
+    2
+    >>> percentile([3, 1, 2, 4], 100)
+    4
+
+    """
+    values = sorted(values)
+    if not values:
+        return None
+
+    position = max(int(-(-rank * len(values) // 100)) - 1, 0)
+    return values[position]
+
+
+class ReplayReport(object):
+    """Decision tasks replays of one or several histories"""
+    def __init__(self):
+        self.replays = []
+
+    def __len__(self):
+        return len(self.replays)
+
+    def __iter__(self):
+        return iter(self.replays)
+
+    @property
+    def matches(self):
+        """Whether every replayed decision matches the recorded ones
+
+        :rtype: bool
+        """
+        return all(replay.matches for replay in self.replays)
+
+    @property
+    def mismatches(self):
+        """
+        :rtype: list of DecisionReplay
+        """
+        return [replay for replay in self.replays if not replay.matches]
+
+    def summary(self, percentiles=(50, 90, 99)):
+        """Decisions count, mismatches count, and *percentiles* of the
+        decisions latencies and allocations
+
+        :rtype: dict
+        """
+        latencies = [replay.latency for replay in self.replays]
+        allocations = [replay.allocations for replay in self.replays]
+
+        return {
+            'decisions': len(self.replays),
+            'mismatches': len(self.mismatches),
+            'latency': dict((rank, percentile(latencies, rank)) for
+                            rank in percentiles),
+            'allocations': dict((rank, percentile(allocations, rank)) for
+                                rank in percentiles),
+        }
+
+
+def replay(decide, history, report=None):
+    """Replays each decision task of *history* through *decide*
+
+    :param  decide: decider
+    :type   decide: callable(swf.models.history.History)
+
+    :param  history: history to replay
+    :type   history: swf.models.history.History
+
+    :param  report: report to add the replays to
+    :type   report: ReplayReport
+
+    :rtype: ReplayReport
+    """
+    if report is None:
+        report = ReplayReport()
+
+    events = history.events
+    recorded = recorded_decisions(events)
+
+    for position, event in enumerate(events):
+        if event.name != 'DecisionTaskStarted':
+            continue
+
+        task_history = History(events=EventsPrefix(events, position + 1))
+        decisions, latency, allocations = measure(decide, task_history)
+
+        report.replays.append(DecisionReplay(
+            event.id,
+            recorded.get(event.id),
+            decisions or [],
+            latency,
+            allocations,
+        ))
+
+    return report
+
+
+def benchmark(decide, histories, repeat=5):
+    """Replays *histories* through *decide* *repeat* times, and reports
+    the fastest replay of each decision task
+
+    :param  histories: histories to replay
+    :type   histories: iterable of swf.models.history.History
+
+    :rtype: ReplayReport
+    """
+    report = ReplayReport()
+
+    for history in histories:
+        runs = [replay(decide, history).replays for _ in xrange(repeat)]
+        for replays in zip(*runs):
+            report.replays.append(min(replays,
+                                      key=lambda replay: replay.latency))
+
+    return report
+
+
+def history_from_responses(responses):
+    """Builds a history from recorded ``GetWorkflowExecutionHistory`` or
+    ``PollForDecisionTask`` responses
+
+    :param  responses: a response or the list of the responses pages
+    :type   responses: dict or list
+
+    :rtype: swf.models.history.History
+    """
+    if isinstance(responses, dict):
+        responses = [responses]
+
+    events = [event for response in responses for
+              event in response['events']]
+    events.sort(key=lambda event: event['eventId'])
+
+    return History.from_event_list(events)
+
+
+def load_history(path):
+    """Loads a history file written by ``History.dump()``, or a json
+    file of recorded responses
+
+    :rtype: swf.models.history.History
+    """
+    if path.endswith('.json'):
+        with open(path) as stream:
+            return history_from_responses(json.load(stream))
+
+    return History.load(path)
+
+
+def load_decider(name):
+    """Imports the decider *name*, as 'package.module:function'"""
+    module_name, _, function_name = name.partition(':')
+    module = __import__(module_name, fromlist=[function_name])
+
+    return getattr(module, function_name)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Replays histories through a decider.')
+    parser.add_argument('decider', help="as 'package.module:function'")
+    parser.add_argument('histories', nargs='+',
+                        help='history files, .json for recorded responses')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    report = benchmark(load_decider(args.decider),
+                       [load_history(path) for path in args.histories],
+                       repeat=args.repeat)
+
+    summary = report.summary()
+    print('{} decisions, {} mismatches'.format(summary['decisions'],
+                                               summary['mismatches']))
+    for rank in sorted(summary['latency']):
+        print('p{}: {:.3f} ms, {} allocations'.format(
+            rank,
+            (summary['latency'][rank] or 0) * 1000,
+            summary['allocations'][rank]))
+    for mismatch in report.mismatches:
+        print('decision task {}: expected {}, got {}'.format(
+            mismatch.started_event_id, mismatch.expected,
+            mismatch.signatures))
+
+    return 0 if report.matches else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
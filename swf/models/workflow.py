@@ -218,7 +218,7 @@ class WorkflowType(BaseModel):
 
     def upstream(self):
         from swf.querysets.workflow import WorkflowTypeQuerySet
-        qs = WorkflowTypeQuerySet(self.domain)
+        qs = WorkflowTypeQuerySet(self.domain, connection=self.connection)
         return qs.get(self.name, self.version)
 
     def start_execution(self, workflow_id=None, task_list=None,
@@ -270,7 +270,8 @@ class WorkflowType(BaseModel):
             task_start_to_close_timeout=decision_tasks_timeout,
         )['runId']
 
-        return WorkflowExecution(self.domain, workflow_id, run_id=run_id)
+        return WorkflowExecution(self.domain, workflow_id, run_id=run_id,
+                                 connection=self.connection)
 
     def __repr__(self):
         return '<{} domain={} name={} version={} status={}>'.format(
@@ -438,7 +439,8 @@ class WorkflowExecution(BaseModel):
 
     def upstream(self):
         from swf.querysets.workflow import WorkflowExecutionQuerySet
-        qs = WorkflowExecutionQuerySet(self.domain)
+        qs = WorkflowExecutionQuerySet(self.domain,
+                                       connection=self.connection)
         return qs.get(self.workflow_id, self.run_id)
 
     def history(self, *args, **kwargs):
@@ -60,6 +60,7 @@ class ActivityTypeQuerySet(BaseQuerySet):
             description=type_info.get('description'),
             creation_date=type_info.get('creationDate'),
             deprecation_date=type_info.get('deprecationDate'),
+            connection=self.connection,
             **kwargs
         )
 
@@ -380,6 +381,7 @@ class ActivityTypeQuerySet(BaseQuerySet):
             task_schedule_to_close_timeout=task_schedule_to_close_timeout,
             task_schedule_to_start_timeout=task_schedule_to_start_timeout,
             task_start_to_close_timeout=task_start_to_close_timeout,
+            connection=self.connection,
         )
         activity_type.save()
 
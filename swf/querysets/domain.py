@@ -136,8 +136,8 @@ class DomainQuerySet(BaseQuerySet):
                 for domain_info in response['domainInfos']:
                     yield domain_info
 
-        return [Domain(d['name'], d['status'], d.get('description')) for d
-                in get_domains()]
+        return [Domain(d['name'], d['status'], d.get('description'),
+                       connection=self.connection) for d in get_domains()]
 
     def create(self, name,
                status=REGISTERED,
@@ -166,7 +166,8 @@ class DomainQuerySet(BaseQuerySet):
             name,
             status=status,
             description=description,
-            retention_period=retention_period
+            retention_period=retention_period,
+            connection=self.connection,
         )
         domain.save()
 
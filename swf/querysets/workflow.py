@@ -85,6 +85,7 @@ class WorkflowTypeQuerySet(BaseWorkflowQuerySet):
             workflow_info['workflowType']['name'],
             workflow_info['workflowType']['version'],
             status=workflow_info['status'],
+            connection=self.connection,
             **kwargs
         )
 
@@ -379,7 +380,8 @@ class WorkflowTypeQuerySet(BaseWorkflowQuerySet):
             child_policy=child_policy,
             execution_timeout=execution_timeout,
             decision_tasks_timeout=decision_tasks_timeout,
-            description=description
+            description=description,
+            connection=self.connection,
         )
         workflow_type.save()
 
@@ -432,7 +434,8 @@ class WorkflowExecutionQuerySet(BaseWorkflowQuerySet):
 
     def get_workflow_type(self, execution_info):
         workflow_type = execution_info['workflowType']
-        workflow_type_qs = WorkflowTypeQuerySet(self.domain)
+        workflow_type_qs = WorkflowTypeQuerySet(self.domain,
+                                                connection=self.connection)
 
         return workflow_type_qs.get(
             workflow_type['name'],
@@ -443,7 +446,8 @@ class WorkflowExecutionQuerySet(BaseWorkflowQuerySet):
         workflow_type = WorkflowType(
             self.domain,
             execution_info['workflowType']['name'],
-            execution_info['workflowType']['version']
+            execution_info['workflowType']['version'],
+            connection=self.connection,
         )
 
         return WorkflowExecution(
@@ -458,6 +462,7 @@ class WorkflowExecutionQuerySet(BaseWorkflowQuerySet):
             close_timestamp=execution_info.get('closeTimestamp'),
             cancel_requested=execution_info.get('cancelRequested'),
             parent=execution_info.get('parent'),
+            connection=self.connection,
             **kwargs
         )
 
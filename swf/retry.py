@@ -0,0 +1,301 @@
+# -*- coding:utf-8 -*-
+
+# Copyright (c) 2013, Theo Crevon
+# Copyright (c) 2013, Greg Leclercq
+#
+# See the file LICENSE for copying permission.
+
+"""Retries of the SWF API calls that fail transiently
+
+:data:`POLICY` retries the calls of the connections of the process-wide
+pool:
+
+- refused by SWF throttling: the call was not processed, it is retried
+  whatever its action;
+- failed with a server error or a network error: the call may have been
+  processed, it is retried only if its action is in
+  :data:`IDEMPOTENT_ACTIONS`.
+
+Retries wait with exponential backoff and decorrelated jitter, so that
+throttled clients spread their retries instead of failing together again.
+They stop after ``max_attempts`` attempts, or ``max_elapsed`` seconds
+after the first failure; the last error is then raised with the
+``retries`` count and ``retry_time`` it took.
+
+boto itself retries, at the HTTP level, the requests answered by a 5xx
+status or failing with a network error, whatever their action. The pool
+connections are :class:`SingleAttemptLayer1` instead, that send each
+request once and leave the retries to the policy. The ``max_retry_time``
+setting (``SWF_MAX_RETRY_TIME``) sets ``max_elapsed``, 0 disables the
+retries of the pool connections.
+"""
+
+import collections
+import httplib
+import json
+import logging
+import random
+import socket
+import threading
+import time
+from timeit import default_timer
+
+import boto.swf.layer1
+from boto.exception import SWFResponseError
+
+
+logger = logging.getLogger(__name__)
+
+# Error codes of the calls refused by throttling
+THROTTLING_ERRORS = frozenset([
+    'ThrottlingException',
+    'Throttling',
+    'RequestLimitExceeded',
+    'ServiceUnavailable',
+    'ServiceUnavailableException',
+])
+
+# Actions that can be sent again if unknown whether they were processed:
+# they do not change anything, or they change a task whose token is only
+# valid once.
+IDEMPOTENT_ACTIONS = frozenset([
+    'CountClosedWorkflowExecutions',
+    'CountOpenWorkflowExecutions',
+    'CountPendingActivityTasks',
+    'CountPendingDecisionTasks',
+    'DescribeActivityType',
+    'DescribeDomain',
+    'DescribeWorkflowExecution',
+    'DescribeWorkflowType',
+    'GetWorkflowExecutionHistory',
+    'ListActivityTypes',
+    'ListClosedWorkflowExecutions',
+    'ListDomains',
+    'ListOpenWorkflowExecutions',
+    'ListWorkflowTypes',
+    'PollForActivityTask',
+    'PollForDecisionTask',
+    'RecordActivityTaskHeartbeat',
+    'RespondActivityTaskCanceled',
+    'RespondActivityTaskCompleted',
+    'RespondActivityTaskFailed',
+    'RespondDecisionTaskCompleted',
+])
+
+# Errors raised by boto when a request did not get a response
+NETWORK_ERRORS = (socket.error, httplib.HTTPException)
+
+
+class RetryPolicy(object):
+    """Retries of transient failures
+
+    :param  max_attempts: maximum count of attempts of a call
+    :type   max_attempts: int
+
+    :param  max_elapsed: seconds after the first failure of a call to stop
+                         retrying it
+    :type   max_elapsed: float
+
+    :param  base: minimum wait between two attempts, in seconds
+    :type   base: float
+
+    :param  cap: maximum wait between two attempts, in seconds
+    :type   cap: float
+
+    :param  throttling_errors: error codes retried for every action
+    :type   throttling_errors: frozenset
+
+    :param  idempotent_actions: actions retried on server or network
+                                errors
+    :type   idempotent_actions: frozenset
+
+    The count of retries and the time they took, by action, are kept in
+    the ``retries`` and ``retry_time`` counters.
+
+    """
+    def __init__(self, max_attempts=8, max_elapsed=60.0, base=0.05,
+                 cap=10.0,
+                 throttling_errors=THROTTLING_ERRORS,
+                 idempotent_actions=IDEMPOTENT_ACTIONS,
+                 clock=default_timer, sleep=time.sleep,
+                 random=random.random):
+        self.max_attempts = max_attempts
+        self.max_elapsed = max_elapsed
+        self.base = base
+        self.cap = cap
+        self.throttling_errors = throttling_errors
+        self.idempotent_actions = idempotent_actions
+        self._clock = clock
+        self._sleep = sleep
+        self._random = random
+
+        self.retries = collections.Counter()
+        self.retry_time = collections.Counter()
+        self._lock = threading.Lock()
+
+    def __nonzero__(self):
+        return self.max_attempts > 1 and self.max_elapsed > 0
+
+    def is_retryable(self, action, error):
+        """Returns whether the call to *action* that raised *error* can be
+        sent again
+
+        :rtype: bool
+
+        """
+        if isinstance(error, SWFResponseError):
+            if getattr(error, 'error_code', None) in self.throttling_errors:
+                return True
+            if error.status < 500:
+                return False
+        elif not isinstance(error, NETWORK_ERRORS):
+            return False
+
+        return action in self.idempotent_actions
+
+    def backoff(self, previous):
+        """Returns the wait after a wait of *previous* seconds
+
+        Waits are drawn between *base* and three times the previous wait,
+        up to *cap*.
+
+        :rtype: float
+
+        """
+        upper = max(self.base, previous * 3)
+        return min(self.cap,
+                   self.base + self._random() * (upper - self.base))
+
+    def call(self, action, func, *args, **kwargs):
+        """Returns ``func(*args, **kwargs)``, the call to *action*,
+        retrying it while it fails transiently"""
+        attempts = 0
+        wait = 0.0
+        failed_at = None
+
+        while True:
+            attempts += 1
+            try:
+                response = func(*args, **kwargs)
+            except Exception as error:
+                now = self._clock()
+                if failed_at is None:
+                    failed_at = now
+                elapsed = now - failed_at
+
+                if not self.is_retryable(action, error):
+                    self._count(action, attempts - 1, elapsed)
+                    raise
+                wait = self.backoff(wait)
+                if (attempts >= self.max_attempts or
+                        elapsed + wait > self.max_elapsed):
+                    self._count(action, attempts - 1, elapsed)
+                    error.retries = attempts - 1
+                    error.retry_time = elapsed
+                    logger.warning('%s failed after %d attempts in %.3fs: %s',
+                                   action, attempts, elapsed, error)
+                    raise
+
+                logger.info('%s failed (%s), retrying in %.3fs',
+                            action, error, wait)
+                self._sleep(wait)
+            else:
+                if failed_at is not None:
+                    self._count(action, attempts - 1,
+                                self._clock() - failed_at)
+                return response
+
+    def _count(self, action, retries, elapsed):
+        if retries:
+            with self._lock:
+                self.retries[action] += retries
+                self.retry_time[action] += elapsed
+
+    def reset(self):
+        """Resets the ``retries`` and ``retry_time`` counters"""
+        with self._lock:
+            self.retries.clear()
+            self.retry_time.clear()
+
+
+# Retry policy shared by the connections of the process-wide pool
+POLICY = RetryPolicy()
+
+
+class SingleAttemptLayer1(boto.swf.layer1.Layer1):
+    """``boto.swf.layer1.Layer1`` sending each request once
+
+    boto retries the requests failing with a network error or a 5xx
+    status up to 10 times; these errors are raised at once instead, to be
+    retried by a :class:`RetryPolicy` that knows which actions can be.
+    """
+    def _mexe(self, request, sender=None, override_num_retries=None,
+              retry_handler=None):
+        connection = self.get_http_connection(request.host, request.port,
+                                              self.is_secure)
+        if not isinstance(request.body, bytes):
+            request.body = request.body.encode('utf-8')
+
+        request.authorize(connection=self)
+        if not request.headers.get('Host'):
+            self.set_host_header(request)
+
+        try:
+            connection.request(request.method, request.path, request.body,
+                               request.headers)
+            response = connection.getresponse()
+        except self.http_exceptions:
+            connection.close()
+            raise
+
+        if response.status >= 500:
+            # The body may not be json, as from a load balancer.
+            body = response.read()
+            connection.close()
+            try:
+                body = json.loads(body)
+            except ValueError:
+                body = {'message': body}
+            raise self.ResponseError(response.status, response.reason,
+                                     body=body)
+
+        if response.getheader('connection') == 'close':
+            connection.close()
+        else:
+            self.put_http_connection(request.host, request.port,
+                                     self.is_secure, connection)
+        if self.request_hook is not None:
+            self.request_hook.handle_request_data(request, response)
+        return response
+
+
+class RetryingConnection(boto.swf.layer1.Layer1):
+    """Connection retrying the failed requests sent to *connection* as
+    allowed by *policy*
+
+    :param  connection: connection to send requests to
+    :type   connection: boto.swf.layer1.Layer1
+
+    :param  policy: retry policy of the requests
+    :type   policy: RetryPolicy
+
+    """
+    def __init__(self, connection, policy=POLICY):
+        # ``connection`` is taken by the http connection of
+        # ``AWSAuthConnection``.
+        self.wrapped = connection
+        self.region = connection.region
+        self.policy = policy
+
+    def make_request(self, action, body='', object_hook=None):
+        return self.policy.call(action, self.wrapped.make_request,
+                                action, body, object_hook)
+
+    def __getattr__(self, name):
+        # Credentials and settings are those of the wrapped connection.
+        if name == 'wrapped':
+            raise AttributeError(name)
+        return getattr(self.wrapped, name)
+
+    def close(self):
+        self.wrapped.close()
@@ -12,6 +12,17 @@ except ImportError:
     from configparser import ConfigParser
 
 
+# Optional settings of the [defaults] section, with their environment
+# variables
+OPTIONS = (
+    ('endpoint', 'SWF_ENDPOINT'),
+    ('record', 'SWF_RECORD'),
+    ('replay', 'SWF_REPLAY'),
+    ('rate_limits', 'SWF_RATE_LIMITS'),
+    ('max_retry_time', 'SWF_MAX_RETRY_TIME'),
+)
+
+
 def from_stream(stream):
     """Retrieves AWS settings from a stream in INI format.
 
@@ -47,6 +58,16 @@ def from_stream(stream):
     True
     >>> settings['aws_secret_access_key'] == 'SECRET'
     True
+    >>> stream = StringIO('''
+    ...
+    ... [defaults]
+    ... region=us-east-1
+    ... endpoint=http://localhost:8642
+    ...
+    ... ''')
+    >>> settings = from_stream(stream)
+    >>> settings['endpoint'] == 'http://localhost:8642'
+    True
 
     :param      stream: of chars in INI format.
     :type       stream: stream.
@@ -71,6 +92,9 @@ def from_stream(stream):
 
     if config.has_section('defaults'):
         settings['region'] = config.get('defaults', 'region')
+        for option, _ in OPTIONS:
+            if config.has_option('defaults', option):
+                settings[option] = config.get('defaults', option)
 
     return settings
 
@@ -101,6 +125,15 @@ def from_env():
         - `AWS_ACCESS_KEY_ID`
         - `AWS_SECRET_ACCESS_KEY`
         - `AWS_DEFAULT_REGION`
+        - `SWF_ENDPOINT`: URL of a SWF endpoint other than amazon's, as a
+          ``swf.local.server``
+        - `SWF_RECORD`: path of a log to record the SWF traffic to, see
+          ``swf.local.recording``
+        - `SWF_REPLAY`: path of a log to replay the SWF traffic from
+        - `SWF_RATE_LIMITS`: calls per second allowed by SWF action, see
+          ``swf.throttling``
+        - `SWF_MAX_RETRY_TIME`: seconds to retry the SWF calls failing
+          transiently for, see ``swf.retry``
 
     :rtype: dict
 
@@ -114,6 +147,10 @@ def from_env():
     if "AWS_DEFAULT_REGION" in os.environ:
         hsh["region"] = os.environ["AWS_DEFAULT_REGION"]
 
+    for option, variable in OPTIONS:
+        if variable in os.environ:
+            hsh[option] = os.environ[variable]
+
     return hsh
 
 
@@ -0,0 +1,262 @@
+# -*- coding:utf-8 -*-
+
+# Copyright (c) 2013, Theo Crevon
+# Copyright (c) 2013, Greg Leclercq
+#
+# See the file LICENSE for copying permission.
+
+"""Client-side rate limiting of the SWF API
+
+SWF throttles each account with a token bucket per API action: a burst of
+calls empties the bucket, then calls fail with a ``ThrottlingException``
+until it refills. :data:`LIMITER` keeps the calls of the process under
+such quotas with buckets of its own: a call that finds its bucket empty
+waits for a token instead of being sent, so that calls queue in order
+rather than fail.
+
+Limits are set by action, with ``*`` for the actions not listed, as
+``<action>=<rate>[/<capacity>]`` where *rate* is the count of calls
+refilled per second and *capacity* the size of the burst allowed, in the
+``rate_limits`` setting:
+
+.. code-block:: bash
+
+    $ export SWF_RATE_LIMITS='StartWorkflowExecution=2/50,*=10'
+
+or in the code, at any time:
+
+.. code-block:: python
+
+    from swf.throttling import LIMITER
+
+    LIMITER.configure('GetWorkflowExecutionHistory', 5, capacity=20)
+
+Limits apply to one process: processes sharing an account have to split
+its quotas between them.
+"""
+
+import threading
+import time
+from timeit import default_timer
+
+import boto.swf.layer1
+
+
+# Name of the limit of the actions without a limit of their own
+DEFAULT = '*'
+
+
+class TokenBucket(object):
+    """Bucket of *capacity* tokens refilled by *rate* tokens per second
+
+    A token is reserved at once, even if the bucket is empty: the bucket
+    then goes into debt, and the caller waits until its token is refilled.
+    Callers thus get their tokens in the order they asked for them.
+
+    :param  rate: tokens refilled per second
+    :type   rate: float
+
+    :param  capacity: maximum count of tokens, defaults to *rate* and at
+                      least 1
+    :type   capacity: float
+
+    """
+    def __init__(self, rate, capacity=None, clock=default_timer):
+        if rate <= 0:
+            raise ValueError('invalid rate: {}'.format(rate))
+
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(rate, 1))
+        self.tokens = self.capacity
+        self._clock = clock
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+        self.delayed = 0  # count of the reservations that waited
+        self.waited = 0.0  # total wait, in seconds
+
+    def reserve(self):
+        """Takes a token and returns how long to wait for it, in seconds
+
+        :rtype: float
+
+        """
+        with self._lock:
+            now = self._clock()
+            self.tokens = min(self.capacity,
+                              self.tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self.tokens -= 1
+
+            if self.tokens >= 0:
+                return 0.0
+
+            wait = -self.tokens / self.rate
+            self.delayed += 1
+            self.waited += wait
+            return wait
+
+
+class RateLimiter(object):
+    """Token buckets by SWF API action
+
+    :param  limits: (rate, capacity) by action, with ``*`` for the other
+                    actions
+    :type   limits: dict
+
+    An action without a limit, when there is no ``*`` one, is not limited.
+
+    """
+    def __init__(self, limits=None, clock=default_timer, sleep=time.sleep):
+        self._clock = clock
+        self._sleep = sleep
+        self._limits = {}
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+        for action, (rate, capacity) in (limits or {}).iteritems():
+            self.configure(action, rate, capacity)
+
+    def __nonzero__(self):
+        return bool(self._limits)
+
+    def configure(self, action, rate, capacity=None):
+        """Limits *action*, or the actions without a limit of their own if
+        *action* is ``*``, to *rate* calls per second and bursts of
+        *capacity* calls
+
+        A *rate* of None removes the limit.
+
+        """
+        with self._lock:
+            if rate is None:
+                self._limits.pop(action, None)
+            else:
+                self._limits[action] = (rate, capacity)
+            # Buckets are refilled from scratch with the new limits.
+            self._buckets.clear()
+
+    def update(self, limits):
+        """Sets the (rate, capacity) *limits* by action"""
+        for action, (rate, capacity) in limits.iteritems():
+            self.configure(action, rate, capacity)
+
+    def clear(self):
+        """Removes every limit"""
+        with self._lock:
+            self._limits.clear()
+            self._buckets.clear()
+
+    def bucket(self, action):
+        """Returns the bucket of *action*, or None if it is not limited
+
+        Actions limited by the ``*`` limit have a bucket each.
+
+        :rtype: TokenBucket
+
+        """
+        bucket = self._buckets.get(action)
+        if bucket is not None:
+            return bucket
+
+        with self._lock:
+            limit = self._limits.get(action, self._limits.get(DEFAULT))
+            if limit is None:
+                return None
+
+            bucket = self._buckets.get(action)
+            if bucket is None:
+                rate, capacity = limit
+                bucket = self._buckets[action] = TokenBucket(
+                    rate, capacity, clock=self._clock)
+        return bucket
+
+    def acquire(self, action):
+        """Waits until a call to *action* is allowed
+
+        :returns: how long it waited, in seconds
+        :rtype: float
+
+        """
+        bucket = self.bucket(action)
+        if bucket is None:
+            return 0.0
+
+        wait = bucket.reserve()
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+
+def parse_limits(string):
+    """Returns the (rate, capacity) limits by action of *string*, as set
+    in the ``rate_limits`` setting
+
+    >>> limits = parse_limits('StartWorkflowExecution=2/50, *=10')
+    >>> limits['StartWorkflowExecution']
+    (2.0, 50.0)
+    >>> limits['*']
+    (10.0, None)
+    >>> parse_limits('StartWorkflowExecution')
+    Traceback (most recent call last):
+        ...
+    ValueError: invalid rate limit: StartWorkflowExecution
+
+    :rtype: dict
+
+    """
+    limits = {}
+
+    for item in string.split(','):
+        item = item.strip()
+        if not item:
+            continue
+
+        action, sep, limit = item.partition('=')
+        if not sep:
+            raise ValueError('invalid rate limit: {}'.format(item))
+
+        rate, _, capacity = limit.partition('/')
+        try:
+            limits[action.strip()] = (float(rate),
+                                      float(capacity) if capacity else None)
+        except ValueError:
+            raise ValueError('invalid rate limit: {}'.format(item))
+
+    return limits
+
+
+# Rate limiter shared by the connections of the process-wide pool
+LIMITER = RateLimiter()
+
+
+class ThrottledConnection(boto.swf.layer1.Layer1):
+    """Connection waiting for *limiter* before sending each request to
+    *connection*
+
+    :param  connection: connection to send requests to
+    :type   connection: boto.swf.layer1.Layer1
+
+    :param  limiter: rate limiter of the requests
+    :type   limiter: RateLimiter
+
+    """
+    def __init__(self, connection, limiter=LIMITER):
+        # ``connection`` is taken by the http connection of
+        # ``AWSAuthConnection``.
+        self.wrapped = connection
+        self.region = connection.region
+        self.limiter = limiter
+
+    def make_request(self, action, body='', object_hook=None):
+        self.limiter.acquire(action)
+        return self.wrapped.make_request(action, body, object_hook)
+
+    def __getattr__(self, name):
+        # Credentials and settings are those of the wrapped connection.
+        if name == 'wrapped':
+            raise AttributeError(name)
+        return getattr(self.wrapped, name)
+
+    def close(self):
+        self.wrapped.close()
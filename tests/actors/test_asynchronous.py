@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import unittest
+
+from boto.swf.layer1 import Layer1
+from mock import patch
+
+from swf.exceptions import PollTimeout
+from swf.models import Domain
+from swf.actors import AsyncActivityWorker, AsyncDecider
+
+
+class TestAsyncActivityWorker(unittest.TestCase):
+    def setUp(self):
+        self.domain = Domain("TestDomain")
+        self.actor = AsyncActivityWorker(self.domain, "test-task-list",
+                                         max_concurrency=4)
+
+    def tearDown(self):
+        self.actor.close()
+
+    def test_calls_return_results(self):
+        with patch.object(Layer1, 'respond_activity_task_completed') as mock:
+            mock.return_value = {}
+            result = self.actor.complete('token', 'result')
+
+            self.assertEqual(result.get(timeout=5), {})
+            mock.assert_called_with('token', 'result')
+
+    def test_calls_raise_exceptions(self):
+        with patch.object(Layer1, 'poll_for_activity_task') as mock:
+            mock.return_value = {}
+            result = self.actor.poll()
+
+            with self.assertRaises(PollTimeout):
+                result.get(timeout=5)
+
+    def test_callback(self):
+        called = threading.Event()
+
+        with patch.object(Layer1, 'record_activity_task_heartbeat') as mock:
+            mock.return_value = {'cancelRequested': False}
+            self.actor.heartbeat('token',
+                                 callback=lambda _: called.set()).wait(5)
+
+        self.assertTrue(called.is_set())
+
+    def test_concurrent_calls_use_own_actor(self):
+        started = []
+        all_started = threading.Event()
+
+        def fail(connection, *args, **kwargs):
+            started.append(self.actor.actor)
+            if len(started) == 2:
+                all_started.set()
+            all_started.wait(5)
+            return {}
+
+        with patch.object(Layer1, 'respond_activity_task_failed', fail):
+            results = [self.actor.fail('token-1'), self.actor.fail('token-2')]
+            for result in results:
+                result.get(timeout=5)
+
+        self.assertIsNot(started[0], started[1])
+        self.assertIsNot(started[0].connection, started[1].connection)
+
+
+class TestAsyncDecider(unittest.TestCase):
+    def setUp(self):
+        self.domain = Domain("TestDomain")
+        self.actor = AsyncDecider(self.domain, "test-task-list",
+                                  max_concurrency=2)
+
+    def tearDown(self):
+        self.actor.close()
+
+    def test_poll_timeout(self):
+        with patch.object(Layer1, 'poll_for_decision_task') as mock:
+            mock.return_value = {}
+            result = self.actor.poll()
+
+            with self.assertRaises(PollTimeout):
+                result.get(timeout=5)
@@ -1,10 +1,12 @@
 import boto
 import unittest
+from mock import patch
 from moto import mock_swf
 
 from swf.exceptions import PollTimeout
 from swf.actors import Decider
 from swf.models import Domain
+from swf.models.history import HistoryCache
 
 
 class TestActor(unittest.TestCase):
@@ -65,3 +67,105 @@ class TestActor(unittest.TestCase):
         )
         self.assertEquals(response.execution.workflow_id, 'wfe-1234')
         self.assertIsNotNone(response.execution.run_id)
+
+
+def decision_task_page(event_ids, next_page_token=None,
+                       previous_started_event_id=0):
+    page = {
+        'taskToken': 'token',
+        'previousStartedEventId': previous_started_event_id,
+        'workflowType': {'name': 'test-workflow', 'version': 'v1.2'},
+        'workflowExecution': {'workflowId': 'wfe-1234', 'runId': 'run-1'},
+        'events': [{
+            'eventId': event_id,
+            'eventType': 'DecisionTaskScheduled',
+            'eventTimestamp': 1365177769.585,
+            'decisionTaskScheduledEventAttributes': {
+                'taskList': {'name': 'test-task-list'},
+            },
+        } for event_id in event_ids],
+    }
+    if next_page_token is not None:
+        page['nextPageToken'] = next_page_token
+
+    return page
+
+
+class TestDeciderHistoryCache(unittest.TestCase):
+    def setUp(self):
+        self.domain = Domain("TestDomain")
+        self.cache = HistoryCache()
+        self.actor = Decider(self.domain, "test-task-list",
+                             history_cache=self.cache)
+
+    def poll(self, *pages):
+        with patch.object(self.actor.connection,
+                          'poll_for_decision_task') as mock:
+            mock.side_effect = list(pages)
+            response = self.actor.poll_for_task()
+
+        self.assertTrue(all(call[1]['reverse_order'] for call in
+                            mock.call_args_list))
+        return response, mock.call_count
+
+    def test_poll_for_task_caches_history(self):
+        response, count = self.poll(
+            decision_task_page([4, 3], next_page_token='page-2'),
+            decision_task_page([2, 1]),
+        )
+
+        self.assertEqual(count, 2)
+        self.assertEqual([event.id for event in response.history],
+                         [1, 2, 3, 4])
+        self.assertIs(self.cache.get(('wfe-1234', 'run-1')),
+                      response.history)
+
+    def test_poll_for_task_fetches_new_events_only(self):
+        first, _ = self.poll(decision_task_page([4, 3, 2, 1]))
+        second, count = self.poll(
+            decision_task_page([7, 6], next_page_token='page-2',
+                               previous_started_event_id=3),
+            decision_task_page([5, 4], next_page_token='page-3',
+                               previous_started_event_id=3),
+        )
+
+        self.assertEqual(count, 2)
+        self.assertIs(second.history, first.history)
+        self.assertEqual([event.id for event in second.history],
+                         range(1, 8))
+
+    def test_poll_for_task_first_decision_ignores_cache(self):
+        first, _ = self.poll(decision_task_page([2, 1]))
+        second, _ = self.poll(decision_task_page([2, 1]))
+
+        self.assertIsNot(second.history, first.history)
+        self.assertEqual(len(second.history), 2)
+
+
+class TestDeciderLazyHistory(unittest.TestCase):
+    def setUp(self):
+        self.domain = Domain("TestDomain")
+        self.actor = Decider(self.domain, "test-task-list")
+
+    def test_poll_for_task_fetches_pages_on_demand(self):
+        with patch.object(self.actor.connection,
+                          'poll_for_decision_task') as mock:
+            mock.side_effect = [
+                decision_task_page([4, 3], next_page_token='page-2'),
+                decision_task_page([2, 1]),
+            ]
+            response = self.actor.poll_for_task(lazy=True,
+                                                reverse_order=True)
+            self.assertEqual(response.history.last.id, 4)
+            self.assertEqual(mock.call_count, 1)
+
+            self.assertEqual([event.id for event in response.history],
+                             [1, 2, 3, 4])
+            self.assertEqual(mock.call_count, 2)
+            self.assertEqual(mock.call_args[1]['next_page_token'], 'page-2')
+
+    def test_poll_for_task_lazy_with_history_cache(self):
+        self.actor.history_cache = HistoryCache()
+
+        with self.assertRaises(ValueError):
+            self.actor.poll_for_task(lazy=True)
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+
+import os
+import threading
+import time
+import unittest
+
+from swf.exceptions import ActivityTaskCanceledError
+
+from swf.actors.helpers import Every, Scheduler, meanwhile
+from swf.actors.heartbeat import heartbeat_on, raise_if_cancel_requested
+
+
+class TestScheduler(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = Scheduler(tick=0.01, nb_buckets=8)
+
+    def test_schedule_calls_periodically(self):
+        calls = []
+        done = threading.Event()
+
+        def call(value):
+            calls.append(value)
+            if len(calls) == 3:
+                done.set()
+
+        timer = self.scheduler.schedule(0.02, call, 'value')
+        self.assertTrue(done.wait(5))
+        self.scheduler.cancel(timer)
+
+        self.assertEqual(calls[:3], ['value'] * 3)
+        self.assertEqual(len(self.scheduler), 0)
+
+    def test_intervals_longer_than_a_wheel_turn(self):
+        called = []
+        start = time.time()
+
+        timer = self.scheduler.schedule(0.2, lambda: called.append(
+            time.time() - start))
+        while not called:
+            time.sleep(0.01)
+        self.scheduler.cancel(timer)
+
+        self.assertGreaterEqual(called[0], 0.2)
+
+    def test_cancel_stops_calls(self):
+        calls = []
+        timer = self.scheduler.schedule(0.01, calls.append, 1)
+        self.scheduler.cancel(timer)
+        time.sleep(0.05)
+
+        self.assertEqual(calls, [])
+
+    def test_few_threads_for_many_timers(self):
+        threads = set()
+        lock = threading.Lock()
+
+        def call():
+            with lock:
+                threads.add(threading.current_thread())
+
+        timers = [self.scheduler.schedule(0.01 * (i % 3 + 1), call) for
+                  i in range(50)]
+        time.sleep(0.1)
+        for timer in timers:
+            self.scheduler.cancel(timer)
+
+        self.assertLessEqual(len(threads), self.scheduler.nb_workers)
+
+    def test_slow_call_does_not_delay_others(self):
+        fast = []
+        slow = []
+
+        def slow_call():
+            slow.append(time.time())
+            time.sleep(0.3)
+
+        timers = [self.scheduler.schedule(0.01, slow_call),
+                  self.scheduler.schedule(0.02, lambda: fast.append(
+                      time.time()))]
+        time.sleep(0.35)
+        for timer in timers:
+            self.scheduler.cancel(timer)
+
+        # One call of the slow timer in flight at a time
+        self.assertLessEqual(len(slow), 2)
+        self.assertGreater(len(fast), 5)
+        self.assertLess(max(b - a for a, b in zip(fast, fast[1:])), 0.2)
+
+
+class TestHeartbeatOn(unittest.TestCase):
+    def test_heartbeat_while_running(self):
+        heartbeats = []
+
+        @heartbeat_on(lambda token: heartbeats.append(token), 0.1)
+        def activity(token):
+            time.sleep(0.5)
+            return 'done'
+
+        self.assertEqual(activity('token'), 'done')
+        self.assertGreaterEqual(len(heartbeats), 2)
+        self.assertEqual(set(heartbeats), set(['token']))
+
+        count = len(heartbeats)
+        time.sleep(0.2)
+        self.assertEqual(len(heartbeats), count)
+
+    def test_heartbeat_stops_on_error(self):
+        every = Every(0.1, lambda: None)
+
+        def boom():
+            raise ValueError('boom')
+
+        with self.assertRaises(ValueError):
+            meanwhile(every, boom)
+        self.assertTrue(every._timer.cancelled)
+
+
+def spin(seconds):
+    end = time.time() + seconds
+    while time.time() < end:
+        pass
+    return 'done'
+
+
+class TestHeartbeatOnCancel(unittest.TestCase):
+    def test_every_cancel_requested(self):
+        responses = iter([{'cancelRequested': False},
+                          {'cancelRequested': True}])
+        every = Every(0.05, lambda: next(responses, None))()
+
+        self.assertTrue(every.cancel_requested.wait(5))
+        every.stop()
+
+    def test_raise_if_cancel_requested(self):
+        @heartbeat_on(lambda: {'cancelRequested': True}, 0.05)
+        def activity():
+            while True:
+                raise_if_cancel_requested()
+                time.sleep(0.01)
+
+        with self.assertRaises(ActivityTaskCanceledError):
+            activity()
+
+    def test_outside_heartbeat_on(self):
+        raise_if_cancel_requested()
+
+
+class TestHeartbeatOnInProcess(unittest.TestCase):
+    def test_heartbeat_while_holding_gil(self):
+        heartbeats = []
+
+        @heartbeat_on(lambda seconds: heartbeats.append(os.getpid()), 0.1,
+                      in_process=True)
+        def activity(seconds):
+            return spin(seconds)
+
+        self.assertEqual(activity(0.5), 'done')
+        self.assertGreaterEqual(len(heartbeats), 3)
+        self.assertEqual(set(heartbeats), set([os.getpid()]))
+
+    def test_exception_is_raised_again(self):
+        @heartbeat_on(lambda: None, 0.1, in_process=True)
+        def activity():
+            raise ValueError('boom')
+
+        with self.assertRaises(ValueError):
+            activity()
+
+    def test_cancel_requested(self):
+        @heartbeat_on(lambda: {'cancelRequested': True}, 0.1,
+                      in_process=True)
+        def activity():
+            return spin(5)
+
+        start = time.time()
+        with self.assertRaises(ActivityTaskCanceledError):
+            activity()
+        self.assertLess(time.time() - start, 2)
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import unittest
+
+from boto.swf.layer1 import Layer1
+from mock import patch
+
+from swf.models import Domain
+from swf.actors import Supervisor
+from swf.exceptions import ActivityTaskCanceledError
+
+
+def activity_task(token):
+    return {
+        'taskToken': token,
+        'activityId': 'activity-{}'.format(token),
+        'startedEventId': 1,
+        'activityType': {'name': 'activity', 'version': '1.0'},
+        'workflowExecution': {'workflowId': 'wfe-1234', 'runId': 'run-1'},
+        'input': token,
+    }
+
+
+class TestSupervisor(unittest.TestCase):
+    def setUp(self):
+        self.domain = Domain("TestDomain")
+        self.release = threading.Event()
+        self.lock = threading.Lock()
+        self.tokens = iter(['token-{}'.format(i) for i in range(10)])
+        self.polls = 0
+
+    def poll(self, connection, *args, **kwargs):
+        with self.lock:
+            self.polls += 1
+            token = next(self.tokens, None)
+
+        if token is None:
+            self.supervisor.stop()
+            return {}
+        return activity_task(token)
+
+    def process_task(self, task):
+        self.release.wait(5)
+        if task.input == 'token-0':
+            raise ValueError('boom')
+        return task.input
+
+    def test_polls_only_with_free_slots_and_drains(self):
+        self.supervisor = Supervisor(self.domain, 'test-task-list',
+                                     self.process_task, nb_slots=2)
+
+        with patch.object(Layer1, 'poll_for_activity_task', self.poll), \
+                patch.object(Layer1, 'respond_activity_task_completed') as completed, \
+                patch.object(Layer1, 'respond_activity_task_failed') as failed:
+            self.supervisor.start()
+
+            for _ in range(50):
+                if self.supervisor.busy_slots == 2:
+                    break
+                threading.Event().wait(0.1)
+
+            self.assertEqual(self.supervisor.utilization, 1.0)
+            self.assertEqual(self.polls, 2)
+
+            self.release.set()
+            self.supervisor.join(5)
+
+        self.assertEqual(completed.call_count, 9)
+        self.assertEqual(failed.call_count, 1)
+        self.assertEqual(self.supervisor.stats, {
+            'slots': 2,
+            'busy': 0,
+            'utilization': 0.0,
+            'processed': 10,
+            'failed': 1,
+            'canceled': 0,
+        })
+
+    def test_canceled_task(self):
+        self.tokens = iter(['token-1'])
+
+        def process_task(task):
+            raise ActivityTaskCanceledError('canceled')
+
+        self.supervisor = Supervisor(self.domain, 'test-task-list',
+                                     process_task, nb_slots=1)
+
+        with patch.object(Layer1, 'poll_for_activity_task', self.poll), \
+                patch.object(Layer1, 'respond_activity_task_canceled') as canceled:
+            self.supervisor.start()
+            self.supervisor.join(5)
+
+        canceled.assert_called_once_with('token-1', details='canceled')
+        self.assertEqual(self.supervisor.stats['canceled'], 1)
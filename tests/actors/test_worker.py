@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+from mock import patch
+
+from swf.exceptions import ActivityTaskCanceledError
+from swf.models import Domain
+from swf.actors import ActivityWorker
+
+
+class TestActivityWorker(unittest.TestCase):
+    def setUp(self):
+        self.domain = Domain("TestDomain")
+        self.actor = ActivityWorker(self.domain, "test-task-list")
+
+    def test_heartbeat_returns_response(self):
+        with patch.object(self.actor.connection,
+                          'record_activity_task_heartbeat') as mock:
+            mock.return_value = {'cancelRequested': True}
+
+            self.assertEqual(self.actor.heartbeat('token'),
+                             {'cancelRequested': True})
+
+    def test_heartbeat_raise_on_cancel(self):
+        with patch.object(self.actor.connection,
+                          'record_activity_task_heartbeat') as mock:
+            mock.return_value = {'cancelRequested': False}
+            self.actor.heartbeat('token', raise_on_cancel=True)
+
+            mock.return_value = {'cancelRequested': True}
+            with self.assertRaises(ActivityTaskCanceledError):
+                self.actor.heartbeat('token', raise_on_cancel=True)
+
+    def test_cancel_sends_details(self):
+        with patch.object(self.actor.connection,
+                          'respond_activity_task_canceled') as mock:
+            self.actor.cancel('token', details='details')
+
+        mock.assert_called_once_with('token', details='details')
@@ -0,0 +1,108 @@
+# -*- coding:utf-8 -*-
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from boto.swf.exceptions import SWFDomainAlreadyExistsError
+
+from swf.actors import Decider
+from swf.core import ConnectionPool
+from swf.local import LocalConnection, SWFSimulator
+from swf.local.recording import (
+    RecordingConnection,
+    ReplayConnection,
+    ReplayError,
+    Replayer,
+)
+from swf.models import Domain
+
+
+class TestRecording(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'traffic.log')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def record(self, path=None):
+        """Records a decision task polled by pages"""
+        connection = RecordingConnection(
+            LocalConnection(SWFSimulator(poll_timeout=0)),
+            path or self.path)
+
+        connection.register_domain('test-domain', '1')
+        connection.register_workflow_type(
+            'test-domain', 'test-workflow', '1.0',
+            task_list='decisions',
+            default_child_policy='TERMINATE',
+            default_execution_start_to_close_timeout='3600',
+            default_task_start_to_close_timeout='60',
+        )
+        connection.start_workflow_execution(
+            'test-domain', 'workflow-1', 'test-workflow', '1.0')
+        with self.assertRaises(SWFDomainAlreadyExistsError):
+            connection.register_domain('test-domain', '1')
+
+        self.poll(connection)
+        connection.recorder.close()
+
+    def poll(self, connection, identity='decider-1'):
+        decider = Decider(Domain('test-domain', connection=connection),
+                          'decisions', connection=connection)
+        response = decider.poll_for_task(identity=identity,
+                                         maximum_page_size=2)
+        return [event.name for event in response.history]
+
+    def test_replay(self):
+        self.record()
+        connection = ReplayConnection(Replayer(self.path))
+
+        self.assertIn(
+            'runId',
+            connection.start_workflow_execution(
+                'test-domain', 'workflow-1', 'test-workflow', '1.0'))
+        self.assertEqual(
+            self.poll(connection),
+            ['WorkflowExecutionStarted', 'DecisionTaskScheduled',
+             'DecisionTaskStarted'])
+
+    def test_replay_faults(self):
+        self.record()
+        connection = ReplayConnection(Replayer(self.path))
+        connection.register_domain('test-domain', '1')
+
+        with self.assertRaises(SWFDomainAlreadyExistsError):
+            connection.register_domain('test-domain', '1')
+        with self.assertRaises(ReplayError):
+            connection.register_domain('test-domain', '1')
+
+    def test_replay_differing_requests(self):
+        self.record()
+        replayer = Replayer(self.path)
+        remaining = replayer.remaining
+
+        self.poll(ReplayConnection(replayer), identity='decider-2')
+        self.assertEqual(replayer.remaining, remaining - 2)
+
+    def test_compressed_log(self):
+        path = self.path + '.gz'
+        self.record(path)
+
+        self.assertEqual(len(Replayer(path).records), 6)
+
+    def test_pool_settings(self):
+        self.record()
+        pool = ConnectionPool()
+
+        connection = pool.get('us-east-1', replay=self.path)
+        self.assertIsInstance(connection, ReplayConnection)
+        self.assertIs(connection, pool.get('us-east-1', replay=self.path))
+
+        connection = pool.get('us-east-1', 'key', 'secret',
+                              record=self.path + '.new')
+        self.assertIsInstance(connection, RecordingConnection)
+        pool.clear()
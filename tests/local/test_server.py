@@ -0,0 +1,67 @@
+# -*- coding:utf-8 -*-
+
+import json
+import threading
+import unittest
+
+from boto.swf.exceptions import SWFDomainAlreadyExistsError
+
+from swf.core import ConnectionPool, Instrumentation
+from swf.local import SWFSimulator
+from swf.local.server import SWFServer
+
+
+class TestSWFServer(unittest.TestCase):
+
+    def setUp(self):
+        self.server = SWFServer(('localhost', 0),
+                                SWFSimulator(poll_timeout=0))
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+        self.pool = ConnectionPool()
+        self.connection = self.pool.get('us-east-1', 'key', 'secret',
+                                        endpoint=self.server.endpoint)
+        # Not through a proxy of the environment
+        self.connection.proxy = None
+        self.connection.use_proxy = False
+
+    def tearDown(self):
+        self.pool.clear()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_requests(self):
+        self.connection.register_domain('test-domain', '1')
+
+        self.assertEqual(
+            self.connection.describe_domain('test-domain')['domainInfo'],
+            {'name': 'test-domain', 'status': 'REGISTERED'})
+        self.assertEqual(
+            self.connection.poll_for_decision_task('test-domain',
+                                                   'decisions'),
+            {'previousStartedEventId': 0, 'startedEventId': 0})
+
+    def test_faults(self):
+        self.connection.register_domain('test-domain', '1')
+
+        with self.assertRaises(SWFDomainAlreadyExistsError):
+            self.connection.register_domain('test-domain', '1')
+
+    def test_response_size(self):
+        instrumentation = Instrumentation()
+        sizes = []
+        instrumentation.add(after=lambda call: sizes.append(
+            call.response_size))
+        pool = ConnectionPool(instrumentation=instrumentation)
+        connection = pool.get('us-east-1', 'key', 'secret',
+                              endpoint=self.server.endpoint)
+        connection.wrapped.proxy = None
+        connection.wrapped.use_proxy = False
+
+        connection.register_domain('test-domain', '1')
+        response = connection.describe_domain('test-domain')
+        pool.clear()
+
+        self.assertEqual(sizes, [0, len(json.dumps(response))])
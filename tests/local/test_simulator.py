@@ -0,0 +1,253 @@
+# -*- coding:utf-8 -*-
+
+import threading
+import time
+import unittest
+
+from boto.swf.exceptions import (
+    SWFResponseError,
+    SWFWorkflowExecutionAlreadyStartedError,
+)
+
+from swf.actors import ActivityWorker, Decider
+from swf.exceptions import DoesNotExistError, PollTimeout
+from swf.local import LocalConnection, SWFSimulator
+from swf.models import ActivityType, Domain, WorkflowType
+from swf.models.decision import (
+    ActivityTaskDecision,
+    TimerDecision,
+    WorkflowExecutionDecision,
+)
+from swf.querysets import WorkflowExecutionQuerySet
+
+
+class Clock(object):
+
+    def __init__(self):
+        self.now = time.time()
+
+    def __call__(self):
+        return self.now
+
+
+class TestSWFSimulator(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = Clock()
+        self.simulator = SWFSimulator(poll_timeout=0, clock=self.clock)
+        self.connection = LocalConnection(self.simulator)
+
+        self.domain = Domain('test-domain', connection=self.connection)
+        self.domain.save()
+        self.workflow_type = WorkflowType(
+            self.domain, 'test-workflow', '1.0',
+            task_list='decisions',
+            connection=self.connection,
+        )
+        self.workflow_type.save()
+        self.activity_type = ActivityType(
+            self.domain, 'test-activity', '1.0',
+            task_list='activities',
+            connection=self.connection,
+        )
+        self.activity_type.save()
+
+        self.decider = Decider(self.domain, 'decisions',
+                               connection=self.connection)
+        self.worker = ActivityWorker(self.domain, 'activities',
+                                     connection=self.connection)
+
+    def start(self, workflow_id='workflow-1', **kwargs):
+        return self.connection.start_workflow_execution(
+            'test-domain', workflow_id, 'test-workflow', '1.0',
+            **kwargs)['runId']
+
+    def history(self, run_id, workflow_id='workflow-1'):
+        response = self.connection.get_workflow_execution_history(
+            'test-domain', run_id, workflow_id)
+        return [event['eventType'] for event in response['events']]
+
+    def schedule(self, activity_id='activity-1', input=None):
+        decision = ActivityTaskDecision(
+            'schedule', activity_id, self.activity_type, input=input)
+        decision.update_attributes({'taskList': {'name': 'activities'}})
+        return decision
+
+    def test_registrations(self):
+        self.assertEqual(self.domain.upstream().name, 'test-domain')
+        self.assertEqual(self.workflow_type.upstream().task_list,
+                         'decisions')
+        self.assertEqual(
+            [info['activityType']['name'] for info in
+             self.connection.list_activity_types(
+                 'test-domain', 'REGISTERED')['typeInfos']],
+            ['test-activity'])
+
+        with self.assertRaises(DoesNotExistError):
+            Domain('missing', connection=self.connection).upstream()
+
+    def test_poll_times_out(self):
+        with self.assertRaises(PollTimeout):
+            self.decider.poll()
+        with self.assertRaises(PollTimeout):
+            self.worker.poll()
+
+    def test_workflow_execution(self):
+        run_id = self.start(input='"workflow input"')
+
+        token, history = self.decider.poll()
+        self.assertEqual(history[0].input, 'workflow input')
+        self.assertEqual(history.last.name, 'DecisionTaskStarted')
+        self.decider.complete(token, [self.schedule(input='data')])
+
+        token, task = self.worker.poll()
+        self.assertEqual(task.activity_id, 'activity-1')
+        self.assertEqual(task.input, '"data"')
+        self.worker.complete(token, 'result')
+
+        token, history = self.decider.poll()
+        self.assertEqual(history[-3].name, 'ActivityTaskCompleted')
+        self.assertEqual(history[-3].result, 'result')
+        decision = WorkflowExecutionDecision()
+        decision.complete(result='done')
+        self.decider.complete(token, [decision])
+
+        self.assertEqual(self.history(run_id), [
+            'WorkflowExecutionStarted',
+            'DecisionTaskScheduled',
+            'DecisionTaskStarted',
+            'DecisionTaskCompleted',
+            'ActivityTaskScheduled',
+            'ActivityTaskStarted',
+            'ActivityTaskCompleted',
+            'DecisionTaskScheduled',
+            'DecisionTaskStarted',
+            'DecisionTaskCompleted',
+            'WorkflowExecutionCompleted',
+        ])
+
+        queryset = WorkflowExecutionQuerySet(self.domain,
+                                             connection=self.connection)
+        execution = queryset.get('workflow-1', run_id)
+        self.assertEqual(execution.status, 'CLOSED')
+        self.assertEqual(execution.close_status, 'COMPLETED')
+
+    def test_start_twice(self):
+        self.start()
+        with self.assertRaises(SWFWorkflowExecutionAlreadyStartedError):
+            self.start()
+
+    def test_unknown_task_token(self):
+        with self.assertRaises(DoesNotExistError):
+            self.decider.complete('unknown')
+
+    def test_decision_while_decision_task_started(self):
+        run_id = self.start()
+        token, _ = self.decider.poll()
+
+        self.connection.signal_workflow_execution(
+            'test-domain', 'signal', 'workflow-1')
+        # Only scheduled once the started decision task completes
+        with self.assertRaises(PollTimeout):
+            self.decider.poll()
+
+        self.decider.complete(token)
+        token, history = self.decider.poll()
+        self.assertEqual(history[-2].name, 'DecisionTaskScheduled')
+        self.assertEqual(history[-4].name, 'WorkflowExecutionSignaled')
+
+    def test_history_paging(self):
+        run_id = self.start()
+        for index in xrange(3):
+            token, _ = self.decider.poll()
+            self.decider.complete(token, [
+                self.schedule('activity-{}'.format(index))])
+            token, _ = self.worker.poll()
+            self.worker.complete(token)
+
+        response = self.connection.get_workflow_execution_history(
+            'test-domain', run_id, 'workflow-1', maximum_page_size=5)
+        self.assertEqual(len(response['events']), 5)
+        self.assertIn('nextPageToken', response)
+
+        token, history = self.decider.poll(maximum_page_size=5)
+        self.assertEqual([event.id for event in history],
+                         range(1, len(self.history(run_id)) + 1))
+
+        response = self.connection.get_workflow_execution_history(
+            'test-domain', run_id, 'workflow-1', reverse_order=True)
+        self.assertEqual(response['events'][0]['eventType'],
+                         'DecisionTaskStarted')
+
+    def test_long_poll(self):
+        self.simulator.poll_timeout = 5
+        self.simulator.clock = time.time
+        polled = []
+
+        thread = threading.Thread(
+            target=lambda: polled.append(self.decider.poll()))
+        thread.start()
+        self.start()
+        thread.join(5)
+
+        self.assertEqual(len(polled), 1)
+
+    def test_timers(self):
+        run_id = self.start()
+        token, _ = self.decider.poll()
+        self.decider.complete(token, [
+            TimerDecision('start', id='wait', start_to_fire_timeout='60')])
+
+        self.clock.now += 59
+        with self.assertRaises(PollTimeout):
+            self.decider.poll()
+
+        self.clock.now += 1
+        token, history = self.decider.poll()
+        self.assertEqual(history[-3].name, 'TimerFired')
+        self.assertEqual(history[-3].timer_id, 'wait')
+
+    def test_request_cancel_activity(self):
+        run_id = self.start()
+        token, _ = self.decider.poll()
+        self.decider.complete(token, [self.schedule()])
+
+        activity_token, _ = self.worker.poll()
+        self.connection.signal_workflow_execution(
+            'test-domain', 'signal', 'workflow-1')
+        token, _ = self.decider.poll()
+        self.decider.complete(token, [
+            ActivityTaskDecision('request_cancel', 'activity-1')])
+
+        self.assertTrue(
+            self.worker.heartbeat(activity_token)['cancelRequested'])
+
+        self.worker.cancel(activity_token)
+        self.assertEqual(self.history(run_id)[-2:], [
+            'ActivityTaskCanceled',
+            'DecisionTaskScheduled',
+        ])
+
+    def test_list_executions(self):
+        self.start('workflow-1', tag_list=['a'])
+        self.clock.now += 1
+        self.start('workflow-2')
+        self.connection.terminate_workflow_execution('test-domain',
+                                                     'workflow-2')
+
+        queryset = WorkflowExecutionQuerySet(self.domain,
+                                             connection=self.connection)
+        self.assertEqual(
+            [execution.workflow_id for execution in queryset.all()],
+            ['workflow-1'])
+        self.assertEqual(
+            [execution.workflow_id for execution in
+             queryset.all(status='CLOSED')],
+            ['workflow-2'])
+        self.assertEqual(
+            self.connection.count_open_workflow_executions(
+                'test-domain', time.time() + 10, 0, tag='a')['count'], 1)
+
+    def test_unknown_action(self):
+        with self.assertRaises(SWFResponseError):
+            self.connection.json_request('Request', {})
@@ -0,0 +1,120 @@
+# -*- coding:utf-8 -*-
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from swf.local import LocalConnection
+from swf.local.store import PersistentSimulator
+
+
+class TestPersistentSimulator(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'swf.db')
+        self.now = time.time()
+        self.connection = self.open()
+
+        self.connection.register_domain('test-domain', '1')
+        self.connection.register_workflow_type(
+            'test-domain', 'test-workflow', '1.0',
+            task_list='decisions',
+            default_child_policy='TERMINATE',
+            default_execution_start_to_close_timeout='3600',
+            default_task_start_to_close_timeout='60',
+        )
+        self.connection.register_activity_type(
+            'test-domain', 'test-activity', '1.0',
+            task_list='activities',
+        )
+        self.run_id = self.connection.start_workflow_execution(
+            'test-domain', 'workflow-1', 'test-workflow', '1.0')['runId']
+
+    def tearDown(self):
+        self.connection.simulator.close()
+        shutil.rmtree(self.directory)
+
+    def open(self):
+        return LocalConnection(PersistentSimulator(
+            self.path, poll_timeout=0, clock=lambda: self.now))
+
+    def reopen(self):
+        self.connection.simulator.close()
+        self.connection = self.open()
+        return self.connection
+
+    def poll_decision(self):
+        return self.connection.poll_for_decision_task(
+            'test-domain', 'decisions')
+
+    def history(self):
+        response = self.connection.get_workflow_execution_history(
+            'test-domain', self.run_id, 'workflow-1')
+        return [event['eventType'] for event in response['events']]
+
+    def test_registrations(self):
+        connection = self.reopen()
+
+        self.assertEqual(
+            connection.describe_domain('test-domain')['domainInfo']['name'],
+            'test-domain')
+        self.assertEqual(
+            connection.describe_activity_type(
+                'test-domain', 'test-activity', '1.0'
+            )['configuration']['defaultTaskList'],
+            {'name': 'activities'})
+
+    def test_pending_decision_task(self):
+        self.reopen()
+
+        task = self.poll_decision()
+        self.assertEqual(task['workflowExecution']['runId'], self.run_id)
+        self.assertEqual(task['events'][-1]['eventType'],
+                         'DecisionTaskStarted')
+
+    def test_started_tasks(self):
+        task = self.poll_decision()
+        self.connection.respond_decision_task_completed(task['taskToken'], [{
+            'decisionType': 'ScheduleActivityTask',
+            'scheduleActivityTaskDecisionAttributes': {
+                'activityId': 'activity-1',
+                'activityType': {'name': 'test-activity', 'version': '1.0'},
+            },
+        }, {
+            'decisionType': 'StartTimer',
+            'startTimerDecisionAttributes': {
+                'timerId': 'timer-1',
+                'startToFireTimeout': '10',
+            },
+        }])
+        activity_task = self.connection.poll_for_activity_task(
+            'test-domain', 'activities')
+
+        connection = self.reopen()
+        connection.respond_activity_task_completed(
+            activity_task['taskToken'], 'result')
+        self.assertEqual(self.history()[-2:], [
+            'ActivityTaskCompleted',
+            'DecisionTaskScheduled',
+        ])
+
+        self.now += 10
+        task = self.poll_decision()
+        self.assertEqual(self.history()[-4:-1], [
+            'ActivityTaskCompleted',
+            'DecisionTaskScheduled',
+            'TimerFired',
+        ])
+
+        self.reopen()
+        self.connection.respond_decision_task_completed(task['taskToken'], [{
+            'decisionType': 'CompleteWorkflowExecution',
+        }])
+        self.assertEqual(
+            self.connection.describe_workflow_execution(
+                'test-domain', self.run_id, 'workflow-1'
+            )['executionInfo']['closeStatus'],
+            'COMPLETED')
@@ -2,7 +2,9 @@
 
 import unittest
 
-from swf.models.event import Event
+from swf.models.event import Event, EventFactory, CompiledEventFactory
+from swf.models.event import base, factory
+from swf.models.event.factory import EVENT_TYPES
 from swf.models.history import History
 import swf.constants
 
@@ -61,3 +63,141 @@ class TestHistory(unittest.TestCase):
     def test_get_by_invalid_index_type(self):
         with self.assertRaises(TypeError):
             self.history["invalid, bitch"]
+
+
+class TestEventFactory(unittest.TestCase):
+
+    def test_name_and_attributes_key_are_per_instance(self):
+        events = mock_get_workflow_execution_history()['events']
+        scheduled = EventFactory(events[1])
+        started = EventFactory(dict(events[1],
+                                    eventType='DecisionTaskStarted',
+                                    decisionTaskStartedEventAttributes={}))
+
+        self.assertEqual(scheduled.name, 'DecisionTaskScheduled')
+        self.assertEqual(scheduled._attributes_key,
+                         'decisionTaskScheduledEventAttributes')
+        self.assertEqual(started.name, 'DecisionTaskStarted')
+
+    def test_every_event_type_is_described(self):
+        for event_name in EVENT_TYPES:
+            self.assertIn(event_name, EventFactory.descriptions)
+
+
+class TestEventAttributes(unittest.TestCase):
+
+    def setUp(self):
+        events = mock_get_workflow_execution_history()['events']
+        events[0]['workflowExecutionStartedEventAttributes']['input'] = \
+            '{"a": 1}'
+        self.started = EventFactory(events[0])
+        self.scheduled = EventFactory(events[1])
+
+    def test_attributes_are_read_from_raw(self):
+        self.assertEqual(self.started.task_start_to_close_timeout, '300')
+        self.assertEqual(self.started.workflow_type,
+                         {'version': '0.1', 'name': 'test-crawl-fsm1'})
+        self.assertEqual(self.scheduled.task_list, {'name': 'test'})
+
+    def test_missing_attribute(self):
+        with self.assertRaises(AttributeError):
+            self.scheduled.workflow_type
+
+    def test_input_is_decoded(self):
+        self.assertEqual(self.started.input, {'a': 1})
+        self.assertEqual(self.scheduled.input, {})
+
+    def test_attribute_names_are_str(self):
+        key = u'unicodeAttributeKey'
+        self.assertIs(type(base.attribute_name(key)), str)
+        self.assertIs(type(base.attribute_name(str(key))), str)
+
+    def test_no_instance_dict(self):
+        self.assertFalse(hasattr(self.started, '__dict__'))
+
+    def test_compiled_event(self):
+        compiled = CompiledEventFactory(self.scheduled)
+
+        self.assertEqual(compiled.task_list, {'name': 'test'})
+        self.assertEqual(compiled.state, 'scheduled')
+
+    def test_compiled_event_transit_resets_caches(self):
+        compiled = CompiledEventFactory(self.scheduled)
+        self.assertEqual(compiled.input, {})
+        timestamp = compiled.timestamp
+
+        started = EventFactory({
+            'eventId': 3,
+            'eventType': 'DecisionTaskStarted',
+            'decisionTaskStartedEventAttributes': {
+                'scheduledEventId': 2,
+                'input': '{"b": 2}',
+            },
+            'eventTimestamp': 1365177779.585,
+        })
+        compiled.transit(started)
+
+        self.assertEqual(compiled.state, 'started')
+        self.assertEqual(compiled.input, {'b': 2})
+        self.assertNotEqual(compiled.timestamp, timestamp)
+
+
+class TestEventRetention(unittest.TestCase):
+
+    def setUp(self):
+        self.events = mock_get_workflow_execution_history()['events']
+        self.raw = self.events[0]
+        self.raw['workflowExecutionStartedEventAttributes']['input'] = \
+            '{"a": 1}'
+
+    def test_keep_both(self):
+        event = EventFactory(self.raw, swf.constants.KEEP_BOTH)
+
+        self.assertIs(event.raw, self.raw)
+        self.assertEqual(event.input, {'a': 1})
+        self.assertIs(event.input, event.input)
+
+    def test_keep_raw(self):
+        event = EventFactory(self.raw, swf.constants.KEEP_RAW)
+
+        self.assertIs(event.raw, self.raw)
+        self.assertEqual(event.input, {'a': 1})
+        self.assertIsNot(event.input, event.input)
+
+    def test_keep_parsed(self):
+        event = EventFactory(self.raw, swf.constants.KEEP_PARSED)
+
+        self.assertEqual(event.input, {'a': 1})
+        self.assertNotIn('input', event.attributes)
+        self.assertEqual(event.task_start_to_close_timeout, '300')
+        self.assertIn('input',
+                      self.raw['workflowExecutionStartedEventAttributes'])
+
+    def test_history_retention(self):
+        history = History.from_event_list(self.events,
+                                          swf.constants.KEEP_PARSED)
+
+        self.assertIsNone(history.raw)
+        self.assertEqual(history[0].input, {'a': 1})
+        self.assertNotIn('input', history[0].attributes)
+
+        history.extend([dict(self.raw, eventId=3)])
+        self.assertNotIn('input', history[-1].attributes)
+
+    def test_repeated_strings_are_interned(self):
+        other = mock_get_workflow_execution_history()['events'][0]
+        # Equal strings that are not the same object
+        name = other['workflowExecutionStartedEventAttributes']['workflowType']
+        name['name'] = ''.join(list(name['name']))
+
+        first = EventFactory(self.raw)
+        second = EventFactory(other)
+
+        self.assertIs(second.workflow_type['name'],
+                      first.workflow_type['name'])
+
+    def test_interned_strings_are_bounded(self):
+        for index in xrange(factory.MAX_INTERNED + 10):
+            factory.intern_attributes({'name': 'activity-{}'.format(index)})
+
+        self.assertLessEqual(len(factory._interned), factory.MAX_INTERNED)
@@ -0,0 +1,404 @@
+# -*- coding:utf-8 -*-
+
+import unittest
+
+from swf.models.history import History, HistoryCache, LazyHistory
+
+from ..mocks.event import mock_get_workflow_execution_history
+
+
+class TestHistoryCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = HistoryCache(max_entries=2, max_events=5)
+
+    def history(self):
+        events = mock_get_workflow_execution_history()['events']
+        return History.from_event_list(events)
+
+    def test_get_missing(self):
+        self.assertIsNone(self.cache.get(('wf', 'run')))
+
+    def test_set_and_get(self):
+        history = self.history()
+        self.cache.set(('wf', 'run'), history)
+
+        self.assertIs(self.cache.get(('wf', 'run')), history)
+        self.assertEqual(self.cache.events_count, 2)
+
+    def test_evicts_least_recently_used_entries(self):
+        self.cache.set(('wf', 'run-1'), self.history())
+        self.cache.set(('wf', 'run-2'), self.history())
+        self.cache.get(('wf', 'run-1'))
+        self.cache.set(('wf', 'run-3'), self.history())
+
+        self.assertIn(('wf', 'run-1'), self.cache)
+        self.assertNotIn(('wf', 'run-2'), self.cache)
+        self.assertIn(('wf', 'run-3'), self.cache)
+
+    def test_evicts_on_events_count(self):
+        self.cache.max_entries = 10
+        for run_id in ('run-1', 'run-2', 'run-3'):
+            self.cache.set(('wf', run_id), self.history())
+
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(self.cache.events_count, 4)
+
+    def test_set_accounts_for_extended_history(self):
+        history = self.history()
+        self.cache.set(('wf', 'run'), history)
+        history.extend([{
+            'eventId': 3,
+            'eventType': 'DecisionTaskScheduled',
+            'eventTimestamp': 1365177769.585,
+            'decisionTaskScheduledEventAttributes': {},
+        }])
+        self.cache.set(('wf', 'run'), history)
+
+        self.assertEqual(self.cache.events_count, 3)
+
+    def test_discard(self):
+        self.cache.set(('wf', 'run'), self.history())
+        self.cache.discard(('wf', 'run'))
+
+        self.assertNotIn(('wf', 'run'), self.cache)
+        self.assertEqual(self.cache.events_count, 0)
+
+
+def events_page(event_ids):
+    return [{
+        'eventId': event_id,
+        'eventType': 'DecisionTaskScheduled',
+        'eventTimestamp': 1365177769.585,
+        'decisionTaskScheduledEventAttributes': {},
+    } for event_id in event_ids]
+
+
+class TestLazyHistory(unittest.TestCase):
+
+    def setUp(self):
+        self.fetched = []
+
+    def pages(self, *pages):
+        for page in pages:
+            self.fetched.append(page)
+            yield events_page(page)
+
+    def test_iteration_fetches_pages_on_demand(self):
+        history = LazyHistory(self.pages([1, 2], [3, 4], [5]))
+
+        for event in history:
+            if event.id == 2:
+                break
+
+        self.assertEqual(self.fetched, [[1, 2]])
+        self.assertFalse(history.complete)
+
+    def test_reversed_with_reverse_order_pages(self):
+        history = LazyHistory(self.pages([5, 4], [3, 2], [1]),
+                              reverse_order=True)
+
+        self.assertEqual(history.last.id, 5)
+        self.assertEqual([event.id for event in history.reversed][:3],
+                         [5, 4, 3])
+        self.assertEqual(self.fetched, [[5, 4], [3, 2], [1]])
+
+    def test_events_are_in_natural_order(self):
+        history = LazyHistory(self.pages([5, 4], [3, 2], [1]),
+                              reverse_order=True)
+
+        self.assertEqual([event.id for event in history], [1, 2, 3, 4, 5])
+        self.assertEqual(len(history), 5)
+        self.assertEqual(history.first.id, 1)
+        self.assertTrue(history.complete)
+
+    def test_stream_resumes_after_completion(self):
+        history = LazyHistory(self.pages([1, 2], [3]))
+
+        stream = iter(history)
+        self.assertEqual(next(stream).id, 1)
+        self.assertEqual(len(history), 3)
+        self.assertEqual([event.id for event in stream], [2, 3])
+
+    def test_empty(self):
+        history = LazyHistory(self.pages())
+
+        self.assertEqual(len(history), 0)
+        with self.assertRaises(IndexError):
+            history.first
+
+
+def activity_events_page():
+    timestamp = 1365177769.585
+    return [
+        {'eventId': 1, 'eventType': 'WorkflowExecutionStarted',
+         'eventTimestamp': timestamp,
+         'workflowExecutionStartedEventAttributes': {}},
+        {'eventId': 2, 'eventType': 'ActivityTaskScheduled',
+         'eventTimestamp': timestamp,
+         'activityTaskScheduledEventAttributes': {'activityId': 'a-1'}},
+        {'eventId': 3, 'eventType': 'ActivityTaskScheduled',
+         'eventTimestamp': timestamp,
+         'activityTaskScheduledEventAttributes': {'activityId': 'a-2'}},
+        {'eventId': 4, 'eventType': 'ActivityTaskStarted',
+         'eventTimestamp': timestamp,
+         'activityTaskStartedEventAttributes': {'scheduledEventId': 2}},
+        {'eventId': 5, 'eventType': 'ActivityTaskCompleted',
+         'eventTimestamp': timestamp,
+         'activityTaskCompletedEventAttributes': {'scheduledEventId': 2,
+                                                  'startedEventId': 4}},
+        {'eventId': 6, 'eventType': 'TimerStarted',
+         'eventTimestamp': timestamp,
+         'timerStartedEventAttributes': {'timerId': 't-1'}},
+    ]
+
+
+class TestHistoryIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.history = History.from_event_list(activity_events_page())
+
+    def test_get_event(self):
+        self.assertEqual(self.history.get_event(4).type, 'ActivityTask')
+        with self.assertRaises(KeyError):
+            self.history.get_event(42)
+
+    def test_last_event(self):
+        self.assertEqual(self.history.last_event('ActivityTask').id, 5)
+        self.assertEqual(
+            self.history.last_event('ActivityTask', 'scheduled').id, 3)
+        self.assertIsNone(self.history.last_event('ChildWorkflowExecution'))
+
+    def test_activity_events(self):
+        self.assertEqual(
+            [event.id for event in self.history.activity_events('a-1')],
+            [2, 4, 5])
+        self.assertEqual(self.history.activity_events('a-3'), [])
+
+    def test_timer_events(self):
+        self.assertEqual(
+            [event.id for event in self.history.timer_events('t-1')], [6])
+
+    def test_filter_uses_index(self):
+        self.assertEqual(
+            [e.id for e in self.history.filter(type='ActivityTask',
+                                               state='scheduled')],
+            [2, 3])
+        self.assertEqual(
+            [e.id for e in self.history.filter(scheduled_event_id=2,
+                                               state='completed')],
+            [5])
+        self.assertEqual(self.history.filter(id=42), [])
+
+    def test_filter_on_unindexed_attribute(self):
+        self.assertEqual(
+            [e.id for e in self.history.filter(state='started')], [1, 4, 6])
+
+    def test_index_follows_extend(self):
+        self.history.index
+        self.history.extend([{
+            'eventId': 7, 'eventType': 'ActivityTaskFailed',
+            'eventTimestamp': 1365177769.585,
+            'activityTaskFailedEventAttributes': {'scheduledEventId': 3},
+        }])
+
+        self.assertEqual(self.history.get_event(7).state, 'failed')
+        self.assertEqual(
+            [event.id for event in self.history.activity_events('a-2')],
+            [3, 7])
+
+
+def decision_events_page():
+    timestamp = 1365177769.585
+    return [
+        {'eventId': 1, 'eventType': 'WorkflowExecutionStarted',
+         'eventTimestamp': timestamp,
+         'workflowExecutionStartedEventAttributes': {}},
+        {'eventId': 2, 'eventType': 'DecisionTaskScheduled',
+         'eventTimestamp': timestamp,
+         'decisionTaskScheduledEventAttributes': {}},
+        {'eventId': 3, 'eventType': 'DecisionTaskStarted',
+         'eventTimestamp': timestamp,
+         'decisionTaskStartedEventAttributes': {'scheduledEventId': 2}},
+        {'eventId': 4, 'eventType': 'DecisionTaskCompleted',
+         'eventTimestamp': timestamp,
+         'decisionTaskCompletedEventAttributes': {'scheduledEventId': 2,
+                                                  'startedEventId': 3}},
+        {'eventId': 5, 'eventType': 'ActivityTaskScheduled',
+         'eventTimestamp': timestamp,
+         'activityTaskScheduledEventAttributes': {'activityId': 'a-1'}},
+        {'eventId': 6, 'eventType': 'ActivityTaskScheduled',
+         'eventTimestamp': timestamp,
+         'activityTaskScheduledEventAttributes': {'activityId': 'a-2'}},
+        {'eventId': 7, 'eventType': 'ActivityTaskStarted',
+         'eventTimestamp': timestamp,
+         'activityTaskStartedEventAttributes': {'scheduledEventId': 6}},
+        {'eventId': 8, 'eventType': 'ActivityTaskStarted',
+         'eventTimestamp': timestamp,
+         'activityTaskStartedEventAttributes': {'scheduledEventId': 5}},
+    ]
+
+
+class TestHistoryCompiler(unittest.TestCase):
+
+    def setUp(self):
+        self.history = History.from_event_list(decision_events_page())
+
+    def states(self, history):
+        return [(event.type, event.id, event.state) for event in history]
+
+    def test_compile_per_entity(self):
+        self.assertEqual(self.states(self.history.compile()), [
+            ('WorkflowExecution', 1, 'started'),
+            ('DecisionTask', 4, 'completed'),
+            ('ActivityTask', 8, 'started'),
+            ('ActivityTask', 7, 'started'),
+        ])
+
+    def test_compiled_is_incremental(self):
+        compiled = self.history.compiled
+        activity = compiled[2]
+
+        self.history.extend([{
+            'eventId': 9, 'eventType': 'ActivityTaskCompleted',
+            'eventTimestamp': 1365177769.585,
+            'activityTaskCompletedEventAttributes': {'scheduledEventId': 5,
+                                                     'startedEventId': 8},
+        }, {
+            'eventId': 10, 'eventType': 'DecisionTaskScheduled',
+            'eventTimestamp': 1365177769.585,
+            'decisionTaskScheduledEventAttributes': {},
+        }])
+
+        self.assertIs(self.history.compiled, compiled)
+        self.assertIs(compiled[2], activity)
+        self.assertEqual(activity.state, 'completed')
+        self.assertEqual(self.states(compiled)[-1],
+                         ('DecisionTask', 10, 'scheduled'))
+
+    def test_compiled_follows_replaced_events(self):
+        compiled = self.history.compiled
+        self.history.events = self.history.events[:2]
+
+        self.assertIsNot(self.history.compiled, compiled)
+        self.assertEqual(len(self.history.compiled), 2)
+
+    def test_histories_do_not_share_locks(self):
+        other = History(events=self.history.events)
+
+        self.assertIsNot(other._lock, self.history._lock)
+        self.assertIsNot(LazyHistory([])._lock, self.history._lock)
+        with self.history._lock:
+            self.assertEqual(len(other.compiled), 4)
+
+
+def raw_event(event_id, event_type, **attributes):
+    return {
+        'eventId': event_id,
+        'eventType': event_type,
+        'eventTimestamp': 1365177769.585,
+        event_type[0].lower() + event_type[1:] + 'EventAttributes':
+            attributes,
+    }
+
+
+def interleaved_events_page():
+    return [
+        raw_event(1, 'WorkflowExecutionStarted'),
+        raw_event(2, 'DecisionTaskScheduled'),
+        raw_event(3, 'DecisionTaskStarted', scheduledEventId=2),
+        raw_event(4, 'DecisionTaskCompleted', scheduledEventId=2),
+        raw_event(5, 'ActivityTaskScheduled', activityId='a-1'),
+        raw_event(6, 'TimerStarted', timerId='t-1'),
+        raw_event(7, 'StartChildWorkflowExecutionInitiated',
+                  workflowId='child'),
+        raw_event(8, 'ScheduleActivityTaskFailed', activityId='a-1'),
+        raw_event(9, 'ActivityTaskStarted', scheduledEventId=5),
+        raw_event(10, 'WorkflowExecutionSignaled', signalName='go'),
+        raw_event(11, 'DecisionTaskScheduled'),
+        raw_event(12, 'ActivityTaskFailed', scheduledEventId=5),
+        raw_event(13, 'ChildWorkflowExecutionStarted', initiatedEventId=7),
+        raw_event(14, 'DecisionTaskStarted', scheduledEventId=11),
+        raw_event(15, 'TimerFired', timerId='t-1', startedEventId=6),
+        raw_event(16, 'DecisionTaskCompleted', scheduledEventId=11),
+        raw_event(17, 'ActivityTaskScheduled', activityId='a-1'),
+        raw_event(18, 'MarkerRecorded', markerName='m'),
+        raw_event(19, 'ChildWorkflowExecutionCompleted', initiatedEventId=7),
+        raw_event(20, 'ActivityTaskStarted', scheduledEventId=17),
+        raw_event(21, 'ActivityTaskCompleted', scheduledEventId=17),
+        raw_event(22, 'WorkflowExecutionCompleted'),
+    ]
+
+
+class TestHistoryEntities(unittest.TestCase):
+
+    def setUp(self):
+        self.history = History.from_event_list(interleaved_events_page())
+
+    def test_distinct_groups_interleaved_events_by_entity(self):
+        self.assertEqual(
+            [[event.id for event in events] for
+             events in self.history.distinct],
+            [[1, 10, 22], [2, 3, 4], [5, 9, 12], [6, 15], [7, 13, 19], [8],
+             [11, 14, 16], [17, 20, 21], [18]])
+
+    def test_compile_interleaved_events(self):
+        self.assertEqual(
+            [(event.type, event.state) for event in self.history.compile()],
+            [('WorkflowExecution', 'completed'),
+             ('DecisionTask', 'completed'),
+             ('ActivityTask', 'failed'),
+             ('Timer', 'fired'),
+             ('ChildWorkflowExecution', 'completed'),
+             ('ActivityTask', 'schedule_failed'),
+             ('DecisionTask', 'completed'),
+             ('ActivityTask', 'completed'),
+             ('Marker', 'recorded')])
+
+    def test_compiled_invalid_transition(self):
+        from swf.models.event.compiler import TransitionError
+
+        self.history.extend([
+            raw_event(23, 'ActivityTaskStarted', scheduledEventId=17),
+        ])
+
+        with self.assertRaises(TransitionError):
+            self.history.compile()
+
+
+class TestHistoryIteration(unittest.TestCase):
+
+    def setUp(self):
+        self.history = History.from_event_list(events_page([3, 4, 5, 7, 8]))
+
+    def ids(self, events):
+        return [event.id for event in events]
+
+    def test_nested_iterations(self):
+        pairs = [(a.id, b.id) for a in self.history for b in self.history]
+
+        self.assertEqual(len(pairs), 25)
+
+    def test_iteration_restarts_after_break(self):
+        for event in self.history:
+            break
+
+        self.assertEqual(self.ids(self.history), [3, 4, 5, 7, 8])
+
+    def test_since(self):
+        self.assertEqual(self.ids(self.history.since(4)), [5, 7, 8])
+        self.assertEqual(self.ids(self.history.since(5)), [7, 8])
+        self.assertEqual(self.ids(self.history.since(6)), [7, 8])
+        self.assertEqual(self.ids(self.history.since(0)), [3, 4, 5, 7, 8])
+        self.assertEqual(self.ids(self.history.since(8)), [])
+
+    def test_tail(self):
+        self.assertEqual(self.ids(self.history.tail(2)), [7, 8])
+        self.assertEqual(self.ids(self.history.tail(10)), [3, 4, 5, 7, 8])
+        self.assertEqual(self.ids(self.history.tail(0)), [])
+
+    def test_views_ignore_events_extended_later(self):
+        tail = self.history.tail(1)
+        self.history.extend(events_page([9]))
+
+        self.assertEqual(self.ids(tail), [8])
@@ -0,0 +1,94 @@
+# -*- coding:utf-8 -*-
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from swf.constants import KEEP_BOTH, KEEP_PARSED, KEEP_RAW
+from swf.models.history import History
+from swf.models.history.binary import MappedEvents
+from swf.models.history.builder import HistoryGenerator
+
+from .test_history import interleaved_events_page, raw_event
+
+
+class TestHistoryBinary(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'history.bin')
+        self.history = History.from_event_list(interleaved_events_page())
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def assertSameEvents(self, events, expected):
+        self.assertEqual(
+            [(e.id, e.name, e.timestamp, e.attributes) for e in events],
+            [(e.id, e.name, e.timestamp, e.attributes) for e in expected])
+
+    def test_dump_and_load(self):
+        self.history.dump(self.path)
+
+        for mmap in (True, False):
+            loaded = History.load(self.path, mmap=mmap)
+            self.assertEqual(len(loaded), len(self.history))
+            self.assertSameEvents(loaded, self.history)
+
+    def test_dump_and_load_keep_inputs(self):
+        events = HistoryGenerator(activities=4, fan_out=2, seed=1).events()
+
+        for retention in (KEEP_BOTH, KEEP_RAW, KEEP_PARSED):
+            history = History.from_event_list(events, retention=retention)
+            # Decoded inputs are kept once accessed
+            expected = [event.input for event in history]
+            history.dump(self.path)
+
+            loaded = History.load(self.path)
+            self.assertEqual([event.input for event in loaded], expected,
+                             retention)
+            self.assertIn({'attempt': 0, 'number': 0}, expected)
+
+    def test_events_are_built_on_access(self):
+        self.history.dump(self.path)
+        loaded = History.load(self.path)
+
+        event = loaded[4]
+        self.assertEqual(event.activity_id, 'a-1')
+        self.assertIs(loaded[4], event)
+        self.assertEqual(loaded.events._events.count(None),
+                         len(self.history) - 1)
+
+    def test_negative_index_and_slice(self):
+        self.history.dump(self.path)
+        loaded = History.load(self.path)
+
+        self.assertEqual(loaded[-1].id, 22)
+        self.assertEqual([event.id for event in loaded[2:4]], [3, 4])
+        with self.assertRaises(IndexError):
+            loaded[42]
+
+    def test_loaded_history_is_extended_and_compiled(self):
+        self.history.dump(self.path)
+        loaded = History.load(self.path)
+        compiled = loaded.compiled
+
+        loaded.extend([raw_event(23, 'MarkerRecorded', markerName='n')])
+
+        self.assertEqual(len(loaded), 23)
+        self.assertEqual(loaded.last.marker_name, 'n')
+        self.assertIs(loaded.compiled, compiled)
+        self.assertEqual(compiled[-1].marker_name, 'n')
+
+    def test_load_invalid_file(self):
+        with open(self.path, 'wb') as stream:
+            stream.write('{"events": []}')
+
+        with self.assertRaises(ValueError):
+            History.load(self.path)
+
+    def test_empty_history(self):
+        History(events=[]).dump(self.path)
+
+        self.assertEqual(len(MappedEvents(open(self.path, 'rb').read())), 0)
@@ -0,0 +1,80 @@
+# -*- coding:utf-8 -*-
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from swf.models.history import History
+from swf.models.history.builder import HistoryGenerator
+
+
+class TestHistoryGenerator(unittest.TestCase):
+
+    def test_is_deterministic(self):
+        generator = HistoryGenerator(activities=20, fan_out=4, retries=2,
+                                     failure_rate=0.5, timers=3,
+                                     child_workflows=2, seed=42)
+
+        self.assertEqual(generator.events(), generator.events())
+        self.assertEqual(HistoryGenerator(seed=42).events(),
+                         HistoryGenerator(seed=42).events())
+        self.assertNotEqual(
+            HistoryGenerator(activities=4, fan_out=4, seed=1).events(),
+            HistoryGenerator(activities=4, fan_out=4, seed=2).events())
+
+    def test_shape(self):
+        history = HistoryGenerator(activities=20, fan_out=4, retries=2,
+                                   failure_rate=0.5, timers=3,
+                                   child_workflows=2, seed=42).history()
+
+        scheduled = history.filter(type='ActivityTask', state='scheduled')
+        failed = history.filter(type='ActivityTask', state='failed')
+        self.assertEqual(len(scheduled), 20 + len(failed))
+        self.assertTrue(failed)
+        self.assertEqual(
+            len(history.filter(type='ActivityTask', state='completed')), 20)
+        self.assertEqual(len(history.filter(type='Timer', state='fired')), 3)
+        self.assertEqual(len(history.filter(type='ChildWorkflowExecution',
+                                            state='completed')), 2)
+        self.assertEqual([event.id for event in history],
+                         range(1, len(history) + 1))
+        self.assertTrue(history.finished)
+
+    def test_compiles(self):
+        history = HistoryGenerator(activities=50, fan_out=10, retries=3,
+                                   failure_rate=0.3, timers=5,
+                                   child_workflows=5, seed=3).history()
+
+        states = set((event.type, event.state) for
+                     event in history.compiled)
+        self.assertIn(('ActivityTask', 'completed'), states)
+        self.assertIn(('WorkflowExecution', 'completed'), states)
+        self.assertNotIn(('ActivityTask', 'started'), states)
+
+    def test_max_events(self):
+        events = HistoryGenerator(activities=100000, fan_out=50,
+                                  seed=0).events()
+
+        self.assertLessEqual(len(events), 25000)
+        self.assertGreater(len(events), 24900)
+        self.assertEqual(events[-1]['eventType'],
+                         'WorkflowExecutionCompleted')
+
+        events = HistoryGenerator(activities=100, max_events=50).events()
+        self.assertLessEqual(len(events), 50)
+
+    def test_dump(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'history.bin')
+            generator = HistoryGenerator(activities=10, timers=2, seed=5)
+            generator.dump(path)
+
+            loaded = History.load(path)
+            expected = generator.history()
+            self.assertEqual(
+                [(e.id, e.name, e.attributes) for e in loaded],
+                [(e.id, e.name, e.attributes) for e in expected])
+        finally:
+            shutil.rmtree(directory)
@@ -0,0 +1,135 @@
+# -*- coding:utf-8 -*-
+
+import unittest
+
+from swf.models.history import History
+from swf.models.history.columns import numpy
+
+
+def raw_event(event_id, timestamp, event_type, **attributes):
+    return {
+        'eventId': event_id,
+        'eventType': event_type,
+        'eventTimestamp': timestamp,
+        event_type[0].lower() + event_type[1:] + 'EventAttributes':
+            attributes,
+    }
+
+
+def activity_attempt(scheduled_id, timestamp, activity_id, name,
+                     schedule_to_start, start_to_close, state='Completed'):
+    activity_type = {'name': name, 'version': '1.0'}
+    started_id = scheduled_id + 1
+    started_at = timestamp + schedule_to_start
+
+    return [
+        raw_event(scheduled_id, timestamp, 'ActivityTaskScheduled',
+                  activityId=activity_id, activityType=activity_type),
+        raw_event(started_id, started_at, 'ActivityTaskStarted',
+                  scheduledEventId=scheduled_id),
+        raw_event(started_id + 1, started_at + start_to_close,
+                  'ActivityTask' + state,
+                  scheduledEventId=scheduled_id, startedEventId=started_id),
+    ]
+
+
+@unittest.skipIf(numpy is None, 'numpy is not installed')
+class TestHistoryColumns(unittest.TestCase):
+
+    def setUp(self):
+        events = [raw_event(1, 1000.0, 'WorkflowExecutionStarted')]
+        events += activity_attempt(2, 1001.0, 'resize-1', 'resize', 1, 10,
+                                   state='Failed')
+        events += activity_attempt(5, 1020.0, 'resize-1', 'resize', 3, 20)
+        events += activity_attempt(8, 1050.0, 'upload-1', 'upload', 2, 4)
+        self.history = History.from_event_list(events)
+
+    def test_to_columns(self):
+        columns = self.history.to_columns()
+
+        self.assertEqual(len(columns), 10)
+        self.assertEqual(columns.id.tolist(), range(1, 11))
+        self.assertEqual(columns.types[columns.type[2]], 'ActivityTask')
+        self.assertEqual(columns.states[columns.state[3]], 'failed')
+        self.assertEqual(columns.timestamp[3], 1012.0)
+        self.assertEqual(columns.scheduled_event_id[3], 2)
+        self.assertEqual(columns.started_event_id[3], 3)
+        self.assertEqual(columns.activity_ids[columns.activity_id[4]],
+                         'resize-1')
+        self.assertEqual(columns.activity_types[columns.activity_type[7]],
+                         ('upload', '1.0'))
+        self.assertEqual(columns.activity_type[8], -1)
+        self.assertEqual(columns.mask('ActivityTask', 'started').tolist(),
+                         [False, False, True, False, False, True, False,
+                          False, True, False])
+
+    def test_stats(self):
+        stats = self.history.stats(percentiles=(0, 100))
+
+        self.assertEqual(stats[('resize', '1.0')], {
+            'count': 2,
+            'retries': 1,
+            'schedule_to_start': {0: 1.0, 100: 3.0},
+            'start_to_close': {0: 10.0, 100: 20.0},
+            'schedule_to_close': {0: 11.0, 100: 23.0},
+        })
+        self.assertEqual(stats[('upload', '1.0')]['retries'], 0)
+        self.assertEqual(stats[('upload', '1.0')]['start_to_close'],
+                         {0: 4.0, 100: 4.0})
+
+    def test_stats_of_partial_history(self):
+        # Starts with the ActivityTaskFailed event, whose scheduled and
+        # started events are left out
+        stats = self.history[3:].stats(percentiles=(0, 100))
+
+        self.assertEqual(stats[('resize', '1.0')], {
+            'count': 1,
+            'retries': 0,
+            'schedule_to_start': {0: 3.0, 100: 3.0},
+            'start_to_close': {0: 20.0, 100: 20.0},
+            'schedule_to_close': {0: 23.0, 100: 23.0},
+        })
+        self.assertEqual(stats[('upload', '1.0')]['schedule_to_close'],
+                         {0: 6.0, 100: 6.0})
+
+    def test_stats_do_not_resolve_missing_events_to_others(self):
+        upload = {'name': 'upload', 'version': '1.0'}
+        resize = {'name': 'resize', 'version': '1.0'}
+        history = History.from_event_list([
+            raw_event(1, 1000.0, 'WorkflowExecutionStarted'),
+            raw_event(2, 1000.0, 'ActivityTaskScheduled',
+                      activityId='upload-1', activityType=upload),
+            raw_event(3, 1001.0, 'ActivityTaskScheduled',
+                      activityId='resize-1', activityType=resize),
+            raw_event(4, 1003.0, 'ActivityTaskStarted', scheduledEventId=2),
+            raw_event(5, 1004.0, 'ActivityTaskStarted', scheduledEventId=3),
+            raw_event(6, 1010.0, 'ActivityTaskCompleted',
+                      scheduledEventId=2, startedEventId=4),
+            raw_event(7, 1020.0, 'ActivityTaskCompleted',
+                      scheduledEventId=3, startedEventId=5),
+        ])
+
+        # The scheduled event of upload-1 is left out
+        stats = history[2:].stats(percentiles=(0, 100))
+
+        self.assertEqual(stats[('resize', '1.0')], {
+            'count': 1,
+            'retries': 0,
+            'schedule_to_start': {0: 3.0, 100: 3.0},
+            'start_to_close': {0: 16.0, 100: 16.0},
+            'schedule_to_close': {0: 19.0, 100: 19.0},
+        })
+
+    def test_positions_of_missing_events(self):
+        columns = self.history[3:].to_columns()
+        positions, found = columns.positions([2, 5, 11])
+
+        self.assertEqual(found.tolist(), [False, True, False])
+        self.assertEqual(columns.id[positions[1]], 5)
+
+    def test_stats_without_activities(self):
+        history = History.from_event_list([
+            raw_event(1, 1000.0, 'WorkflowExecutionStarted'),
+        ])
+
+        self.assertEqual(history.stats(), {})
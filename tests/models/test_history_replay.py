@@ -0,0 +1,152 @@
+# -*- coding:utf-8 -*-
+
+import collections
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from swf.models.decision import (ActivityTaskDecision,
+                                 WorkflowExecutionDecision)
+from swf.models.history import History
+from swf.models.history import replay
+
+from .test_history import raw_event
+
+
+def recorded_events():
+    return [
+        raw_event(1, 'WorkflowExecutionStarted'),
+        raw_event(2, 'DecisionTaskScheduled'),
+        raw_event(3, 'DecisionTaskStarted', scheduledEventId=2),
+        raw_event(4, 'DecisionTaskCompleted', scheduledEventId=2,
+                  startedEventId=3),
+        raw_event(5, 'ActivityTaskScheduled', activityId='a-1',
+                  decisionTaskCompletedEventId=4),
+        raw_event(6, 'ActivityTaskStarted', scheduledEventId=5),
+        raw_event(7, 'ActivityTaskCompleted', scheduledEventId=5,
+                  startedEventId=6),
+        raw_event(8, 'DecisionTaskScheduled'),
+        raw_event(9, 'DecisionTaskStarted', scheduledEventId=8),
+        raw_event(10, 'DecisionTaskCompleted', scheduledEventId=8,
+                  startedEventId=9),
+        raw_event(11, 'WorkflowExecutionCompleted',
+                  decisionTaskCompletedEventId=10),
+    ]
+
+
+ActivityType = collections.namedtuple('ActivityType', 'name version')
+
+
+def decide(history):
+    if history.filter(type='ActivityTask', state='completed'):
+        return [WorkflowExecutionDecision('complete')]
+    return [ActivityTaskDecision('schedule', activity_id='a-1',
+                                 activity_type=ActivityType('a', '1'))]
+
+
+class TestReplay(unittest.TestCase):
+
+    def setUp(self):
+        self.history = History.from_event_list(recorded_events())
+
+    def test_recorded_decisions(self):
+        self.assertEqual(replay.recorded_decisions(self.history.events), {
+            3: [('ScheduleActivityTask', 'a-1')],
+            9: [('CompleteWorkflowExecution', None)],
+        })
+
+    def test_replay_matches(self):
+        seen = []
+
+        def decider(history):
+            seen.append(history.last.id)
+            return decide(history)
+
+        report = replay.replay(decider, self.history)
+
+        self.assertEqual(seen, [3, 9])
+        self.assertTrue(report.matches)
+        self.assertEqual([r.started_event_id for r in report], [3, 9])
+        for decision_replay in report:
+            self.assertGreaterEqual(decision_replay.latency, 0)
+            self.assertGreater(decision_replay.allocations, 0)
+
+    def test_task_histories_share_events(self):
+        seen = []
+
+        def decider(history):
+            seen.append((len(history), list(history), history[-2:].events,
+                         history.compiled[-1].state))
+            return decide(history)
+
+        replay.replay(decider, self.history)
+
+        events = self.history.events
+        self.assertEqual(seen, [
+            (3, events[:3], events[1:3], 'started'),
+            (9, events[:9], events[7:9], 'started'),
+        ])
+
+    def test_events_prefix(self):
+        events = replay.EventsPrefix(range(10), 4)
+
+        self.assertEqual(list(events), [0, 1, 2, 3])
+        self.assertEqual(events[-1], 3)
+        self.assertEqual(events[1:], [1, 2, 3])
+        self.assertEqual(events[::-2], [3, 1])
+        self.assertEqual(events[2::-1], [2, 1, 0])
+        self.assertEqual(events[:-6:-1], [3, 2, 1, 0])
+        with self.assertRaises(IndexError):
+            events[4]
+        with self.assertRaises(IndexError):
+            events[-5]
+
+    def test_replay_mismatches(self):
+        report = replay.replay(lambda history: None, self.history)
+
+        self.assertFalse(report.matches)
+        self.assertEqual(len(report.mismatches), 2)
+        self.assertEqual(report.mismatches[0].expected,
+                         [('ScheduleActivityTask', 'a-1')])
+
+    def test_decision_task_in_progress_is_not_checked(self):
+        history = History(events=self.history.events[:9])
+        report = replay.replay(lambda history: [], history)
+
+        self.assertEqual([r.matches for r in report], [False, True])
+
+    def test_benchmark(self):
+        report = replay.benchmark(decide, [self.history, self.history],
+                                  repeat=3)
+
+        summary = report.summary(percentiles=(50, 100))
+        self.assertEqual(summary['decisions'], 4)
+        self.assertEqual(summary['mismatches'], 0)
+        self.assertEqual(sorted(summary['latency']), [50, 100])
+
+
+class TestReplayMain(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_main(self):
+        responses = os.path.join(self.directory, 'history.json')
+        with open(responses, 'w') as stream:
+            json.dump([{'events': recorded_events()[6:]},
+                       {'events': recorded_events()[:6]}], stream)
+
+        dumped = os.path.join(self.directory, 'history.bin')
+        History.from_event_list(recorded_events()).dump(dumped)
+
+        self.assertEqual(replay.main([
+            'tests.models.test_history_replay:decide',
+            responses,
+            dumped,
+            '--repeat', '1',
+        ]), 0)
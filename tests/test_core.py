@@ -0,0 +1,157 @@
+# -*- coding:utf-8 -*-
+
+import threading
+import unittest
+
+from boto.swf.exceptions import SWFDomainAlreadyExistsError
+
+from swf.core import (
+    ConnectionPool,
+    ConnectedSWFObject,
+    Instrumentation,
+    InstrumentedConnection,
+)
+from swf.local import LocalConnection, SWFSimulator
+
+
+class TestConnectionPool(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = ConnectionPool()
+
+    def tearDown(self):
+        self.pool.clear()
+
+    def test_get_reuses_connection_in_same_thread(self):
+        first = self.pool.get('us-east-1', 'key', 'secret')
+        second = self.pool.get('us-east-1', 'key', 'secret')
+
+        self.assertIs(first, second)
+
+    def test_get_keys_on_region_and_credentials(self):
+        connection = self.pool.get('us-east-1', 'key', 'secret')
+
+        self.assertIsNot(connection,
+                         self.pool.get('eu-west-1', 'key', 'secret'))
+        self.assertIsNot(connection,
+                         self.pool.get('us-east-1', 'other', 'secret'))
+
+    def test_get_checks_out_one_connection_per_thread(self):
+        connections = []
+
+        def checkout():
+            connections.append(self.pool.get('us-east-1', 'key', 'secret'))
+
+        thread = threading.Thread(target=checkout)
+        thread.start()
+        thread.join()
+
+        self.assertIsNot(connections[0],
+                         self.pool.get('us-east-1', 'key', 'secret'))
+
+    def test_get_with_invalid_region(self):
+        with self.assertRaises(ValueError):
+            self.pool.get('invalid-region')
+
+    def test_clear(self):
+        connection = self.pool.get('us-east-1', 'key', 'secret')
+        self.pool.clear()
+
+        self.assertIsNot(connection,
+                         self.pool.get('us-east-1', 'key', 'secret'))
+
+
+class TestConnectedSWFObject(unittest.TestCase):
+
+    def test_objects_share_connection(self):
+        credentials = {'aws_access_key_id': 'key',
+                       'aws_secret_access_key': 'secret'}
+
+        self.assertIs(ConnectedSWFObject(**credentials).connection,
+                      ConnectedSWFObject(**credentials).connection)
+
+    def test_explicit_connection(self):
+        connection = object()
+        obj = ConnectedSWFObject(connection=connection)
+
+        self.assertIs(obj.connection, connection)
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        self.instrumentation = Instrumentation()
+        self.calls = []
+        self.connection = InstrumentedConnection(
+            LocalConnection(SWFSimulator(poll_timeout=0)),
+            self.instrumentation)
+
+    def collect(self, call):
+        self.calls.append((call.action, call.page, call.error_code,
+                           call.has_next_page))
+
+    def test_response_size(self):
+        sizes = []
+        self.instrumentation.add(after=lambda call: sizes.append(
+            call.response_size))
+
+        self.connection.register_domain('domain', '1')
+        self.connection.describe_domain('domain')
+
+        self.assertEqual(sizes[0], 0)
+        self.assertEqual(sizes[1], self.connection.response_size)
+        self.assertGreater(sizes[1], 0)
+
+    def test_hooks(self):
+        before = []
+        self.instrumentation.add(before=lambda call: before.append(
+            (call.action, call.request_size, call.duration)),
+            after=self.collect)
+
+        self.connection.register_domain('domain', '1')
+        with self.assertRaises(SWFDomainAlreadyExistsError):
+            self.connection.register_domain('domain', '1')
+
+        self.assertEqual(len(before), 2)
+        self.assertEqual(before[0][0], 'RegisterDomain')
+        self.assertGreater(before[0][1], 0)
+        self.assertIsNone(before[0][2])
+        self.assertEqual(self.calls, [
+            ('RegisterDomain', 1, None, False),
+            ('RegisterDomain', 1, 'DomainAlreadyExistsFault', False),
+        ])
+
+    def test_pages(self):
+        self.instrumentation.add(after=self.collect)
+        for index in xrange(3):
+            self.connection.register_domain('domain-{}'.format(index), '1')
+
+        response = self.connection.list_domains('REGISTERED',
+                                                maximum_page_size=2)
+        self.connection.list_domains('REGISTERED', maximum_page_size=2,
+                                     next_page_token=response[
+                                         'nextPageToken'])
+
+        self.assertEqual(self.calls[-2:], [
+            ('ListDomains', 1, None, True),
+            ('ListDomains', 2, None, False),
+        ])
+
+    def test_failing_hook(self):
+        def fail(call):
+            raise RuntimeError(call.action)
+        self.instrumentation.add(before=fail, after=self.collect)
+
+        self.connection.register_domain('domain', '1')
+        self.assertEqual(len(self.calls), 1)
+
+        self.instrumentation.remove(fail)
+        self.assertEqual(self.instrumentation.before, [])
+
+    def test_pool(self):
+        pool = ConnectionPool(instrumentation=self.instrumentation)
+        connection = pool.get('us-east-1', 'key', 'secret')
+
+        self.assertIsInstance(connection, InstrumentedConnection)
+        self.assertEqual(connection.aws_access_key_id, 'key')
+        pool.clear()
@@ -0,0 +1,84 @@
+# -*- coding:utf-8 -*-
+
+import unittest
+
+from swf.core import Call
+from swf.metrics import Histogram, Metrics
+
+
+def call(action, duration=0.1, page=1, response=None, error_code=None):
+    call = Call(action, 10, page)
+    call.duration = duration
+    call.response = response
+    if error_code is None:
+        call.response_size = 2
+    call.error_code = error_code
+    return call
+
+
+class TestHistogram(unittest.TestCase):
+
+    def test_bounds_are_inclusive(self):
+        histogram = Histogram((1, 2))
+        histogram.observe(1)
+        histogram.observe(2)
+        histogram.observe(3)
+
+        self.assertEqual(histogram.counts, [1, 1, 1])
+
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.metrics = Metrics()
+
+    def test_collect(self):
+        self.metrics(call('RespondDecisionTaskCompleted', 0.02))
+        self.metrics(call('RespondDecisionTaskCompleted', 2.0,
+                          error_code='ThrottlingException'))
+
+        metrics = self.metrics.actions['RespondDecisionTaskCompleted']
+        self.assertEqual(metrics.durations.count, 2)
+        self.assertEqual(metrics.response_sizes.count, 1)
+        self.assertEqual(metrics.pages.count, 0)
+        self.assertEqual(metrics.errors, {'ThrottlingException': 1})
+
+    def test_unknown_response_size(self):
+        unknown = call('DescribeDomain', response={})
+        unknown.response_size = None
+        self.metrics(unknown)
+
+        metrics = self.metrics.actions['DescribeDomain']
+        self.assertEqual(metrics.durations.count, 1)
+        self.assertEqual(metrics.response_sizes.count, 0)
+
+    def test_pages(self):
+        self.metrics(call('PollForDecisionTask',
+                          response={'events': [], 'nextPageToken': 'next'}))
+        self.metrics(call('PollForDecisionTask', page=2,
+                          response={'events': []}))
+        self.metrics(call('ListDomains', response={'domainInfos': []}))
+
+        self.assertEqual(self.metrics.actions['PollForDecisionTask']
+                         .pages.sum, 2)
+        self.assertEqual(self.metrics.actions['ListDomains'].pages.sum, 1)
+
+    def test_exposition(self):
+        self.metrics(call('DescribeDomain', 0.3, response={}))
+        self.metrics(call('DescribeDomain', 0.05,
+                          error_code='UnknownResourceFault'))
+
+        lines = self.metrics.exposition().splitlines()
+
+        self.assertIn('# TYPE swf_call_duration_seconds histogram', lines)
+        self.assertIn('swf_call_duration_seconds_bucket'
+                      '{action="DescribeDomain",le="0.05"} 1', lines)
+        self.assertIn('swf_call_duration_seconds_bucket'
+                      '{action="DescribeDomain",le="+Inf"} 2', lines)
+        self.assertIn('swf_call_duration_seconds_count'
+                      '{action="DescribeDomain"} 2', lines)
+        self.assertIn('swf_response_bytes_sum{action="DescribeDomain"} 2',
+                      lines)
+        self.assertIn('swf_errors_total{action="DescribeDomain",'
+                      'code="UnknownResourceFault"} 1', lines)
+        self.assertNotIn('swf_pages_count{action="DescribeDomain"} 1', lines)
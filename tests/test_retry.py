@@ -0,0 +1,208 @@
+# -*- coding:utf-8 -*-
+
+import json
+import socket
+import threading
+import unittest
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from SocketServer import ThreadingMixIn
+
+import boto.swf.layer1
+from boto.exception import SWFResponseError
+from boto.regioninfo import RegionInfo
+from boto.swf.exceptions import SWFDomainAlreadyExistsError
+
+from swf.core import ConnectionPool
+from swf.retry import RetryingConnection, RetryPolicy, SingleAttemptLayer1
+
+
+def fault(status, name):
+    return SWFResponseError(
+        status, 'Error',
+        body={'__type': 'com.amazonaws.swf.base.model#' + name})
+
+
+class FlakyConnection(boto.swf.layer1.Layer1):
+    """Connection raising *errors* before answering requests"""
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.requests = []
+        self.region = RegionInfo(name='flaky', endpoint='flaky')
+
+    def make_request(self, action, body='', object_hook=None):
+        self.requests.append(action)
+        if self.errors:
+            raise self.errors.pop(0)
+        return {}
+
+
+class Clock(object):
+    """Clock moved forward by the sleeps"""
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestRetryPolicy(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = Clock()
+        self.policy = RetryPolicy(max_attempts=4, max_elapsed=10.0,
+                                  base=1.0, cap=5.0,
+                                  clock=self.clock, sleep=self.clock.sleep,
+                                  random=lambda: 1.0)
+
+    def connect(self, *errors):
+        return RetryingConnection(FlakyConnection(errors), self.policy)
+
+    def test_throttling(self):
+        connection = self.connect(fault(400, 'ThrottlingException'),
+                                  fault(400, 'ThrottlingException'))
+
+        connection.start_workflow_execution('domain', 'workflow-1',
+                                            'workflow', '1.0')
+        self.assertEqual(len(connection.wrapped.requests), 3)
+        self.assertEqual(self.clock.sleeps, [1.0, 3.0])
+        self.assertEqual(self.policy.retries['StartWorkflowExecution'], 2)
+        self.assertEqual(self.policy.retry_time['StartWorkflowExecution'],
+                         4.0)
+
+    def test_server_errors(self):
+        connection = self.connect(fault(500, 'InternalFailure'),
+                                  socket.error('reset'))
+        connection.respond_decision_task_completed('token')
+        self.assertEqual(len(connection.wrapped.requests), 3)
+
+        connection = self.connect(fault(500, 'InternalFailure'))
+        with self.assertRaises(SWFResponseError):
+            connection.signal_workflow_execution('domain', 'signal',
+                                                 'workflow-1')
+        self.assertEqual(len(connection.wrapped.requests), 1)
+
+    def test_client_errors(self):
+        connection = self.connect(SWFDomainAlreadyExistsError(
+            400, 'Error', body={'__type': 'DomainAlreadyExistsFault'}))
+
+        with self.assertRaises(SWFDomainAlreadyExistsError):
+            connection.describe_domain('domain')
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_max_attempts(self):
+        connection = self.connect(*[fault(400, 'ThrottlingException')] * 4)
+
+        with self.assertRaises(SWFResponseError) as context:
+            connection.describe_domain('domain')
+        self.assertEqual(context.exception.retries, 3)
+        self.assertEqual(context.exception.retry_time, 9.0)
+
+    def test_max_elapsed(self):
+        self.policy.max_elapsed = 5.0
+        connection = self.connect(*[fault(400, 'ThrottlingException')] * 4)
+
+        with self.assertRaises(SWFResponseError) as context:
+            connection.describe_domain('domain')
+        self.assertEqual(context.exception.retries, 2)
+        self.assertEqual(self.clock.sleeps, [1.0, 3.0])
+
+    def test_backoff(self):
+        self.policy._random = lambda: 0.5
+
+        self.assertEqual(self.policy.backoff(0.0), 1.0)
+        self.assertEqual(self.policy.backoff(1.0), 2.0)
+        self.assertEqual(self.policy.backoff(4.0), 5.0)
+
+    def test_pool(self):
+        pool = ConnectionPool(retry_policy=self.policy)
+        connection = pool.get('us-east-1', 'key', 'secret')
+        self.assertIsInstance(connection, RetryingConnection)
+        self.assertIsInstance(connection.wrapped, SingleAttemptLayer1)
+        pool.clear()
+
+
+class ScriptedHandler(BaseHTTPRequestHandler):
+    """Answers the scripted responses of the server, then empty ones"""
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.server.attempts += 1
+
+        status, data = (self.server.responses.pop(0) if
+                        self.server.responses else (200, {}))
+        body = json.dumps(data)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/x-amz-json-1.0')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ScriptedServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class TestHTTPAttempts(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ScriptedServer(('localhost', 0), ScriptedHandler)
+        self.server.attempts = 0
+        self.server.responses = []
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+        self.policy = RetryPolicy(sleep=lambda seconds: None)
+        self.pool = ConnectionPool(retry_policy=self.policy)
+        self.connection = self.pool.get(
+            'us-east-1', 'key', 'secret',
+            endpoint='http://localhost:{}'.format(self.server.server_port))
+
+        # Not through a proxy of the environment
+        connection = self.connection
+        while 'wrapped' in vars(connection):
+            connection = connection.wrapped
+        connection.proxy = None
+        connection.use_proxy = False
+
+    def tearDown(self):
+        self.pool.clear()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def respond(self, *responses):
+        self.server.responses.extend(responses)
+
+    def test_retried_by_the_policy_only(self):
+        self.respond((500, {'__type': 'InternalFailure'}),
+                     (400, {'__type': 'com.amazon.coral.availability#'
+                                      'ThrottlingException'}))
+
+        self.connection.describe_domain('domain')
+        self.assertEqual(self.server.attempts, 3)
+
+    def test_server_error_sent_once(self):
+        self.respond((500, {'__type': 'InternalFailure'}))
+
+        with self.assertRaises(SWFResponseError) as context:
+            self.connection.signal_workflow_execution('domain', 'signal',
+                                                      'workflow-1')
+        self.assertEqual(context.exception.status, 500)
+        self.assertEqual(self.server.attempts, 1)
+
+    def test_disabled_policy(self):
+        self.policy.max_elapsed = 0
+        self.respond(*[(503, {'__type': 'ServiceUnavailable'})] * 2)
+
+        with self.assertRaises(SWFResponseError):
+            self.connection.describe_domain('domain')
+        self.assertEqual(self.server.attempts, 1)
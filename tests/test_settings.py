@@ -7,6 +7,11 @@ AWS_ENV_KEYS = (
     "AWS_ACCESS_KEY_ID",
     "AWS_SECRET_ACCESS_KEY",
     "AWS_DEFAULT_REGION",
+    "SWF_ENDPOINT",
+    "SWF_RECORD",
+    "SWF_REPLAY",
+    "SWF_RATE_LIMITS",
+    "SWF_MAX_RETRY_TIME",
 )
 
 class TestSettings(unittest.TestCase):
@@ -47,3 +52,9 @@ class TestSettings(unittest.TestCase):
         self.assertEqual(from_env(), {
             "region": "eu-west-1",
         })
+
+    def test_get_endpoint_from_env(self):
+        os.environ["SWF_ENDPOINT"] = "http://localhost:8642"
+        self.assertEqual(from_env(), {
+            "endpoint": "http://localhost:8642",
+        })
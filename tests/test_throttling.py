@@ -0,0 +1,108 @@
+# -*- coding:utf-8 -*-
+
+import unittest
+
+from swf.core import ConnectionPool
+from swf.local import LocalConnection, SWFSimulator
+from swf.throttling import RateLimiter, ThrottledConnection, TokenBucket
+
+
+class Clock(object):
+    """Clock moved forward by the sleeps"""
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = Clock()
+
+    def test_burst(self):
+        bucket = TokenBucket(2, capacity=3, clock=self.clock)
+
+        self.assertEqual([bucket.reserve() for _ in xrange(3)],
+                         [0.0, 0.0, 0.0])
+        self.assertEqual(bucket.reserve(), 0.5)
+        self.assertEqual(bucket.reserve(), 1.0)
+        self.assertEqual(bucket.delayed, 2)
+        self.assertEqual(bucket.waited, 1.5)
+
+    def test_refill(self):
+        bucket = TokenBucket(1, clock=self.clock)
+        bucket.reserve()
+
+        self.clock.now += 10
+        self.assertEqual(bucket.reserve(), 0.0)
+        self.assertEqual(bucket.reserve(), 1.0)
+
+    def test_invalid_rate(self):
+        with self.assertRaises(ValueError):
+            TokenBucket(0)
+
+
+class TestRateLimiter(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = Clock()
+        self.limiter = RateLimiter(clock=self.clock, sleep=self.clock.sleep)
+
+    def test_unlimited(self):
+        self.assertFalse(self.limiter)
+        self.assertIsNone(self.limiter.bucket('StartWorkflowExecution'))
+        self.assertEqual(self.limiter.acquire('StartWorkflowExecution'), 0.0)
+
+    def test_limits_by_action(self):
+        self.limiter.configure('StartWorkflowExecution', 1)
+        self.limiter.configure('*', 10, capacity=2)
+
+        self.assertTrue(self.limiter)
+        self.assertEqual(self.limiter.bucket('StartWorkflowExecution').rate,
+                         1.0)
+        self.assertIsNot(self.limiter.bucket('CountOpenWorkflowExecutions'),
+                         self.limiter.bucket('CountClosedWorkflowExecutions'))
+
+        for _ in xrange(5):
+            self.limiter.acquire('StartWorkflowExecution')
+        self.assertEqual(self.clock.now, 4.0)
+
+    def test_remove_limit(self):
+        self.limiter.configure('StartWorkflowExecution', 1)
+        self.limiter.configure('StartWorkflowExecution', None)
+
+        self.assertFalse(self.limiter)
+
+    def test_connection(self):
+        self.limiter.configure('RegisterDomain', 1)
+        connection = ThrottledConnection(
+            LocalConnection(SWFSimulator(poll_timeout=0)), self.limiter)
+
+        connection.register_domain('domain-1', '1')
+        connection.register_domain('domain-2', '1')
+        self.assertEqual(self.clock.now, 1.0)
+        self.assertEqual(len(connection.list_domains('REGISTERED')
+                             ['domainInfos']), 2)
+
+    def test_pool(self):
+        pool = ConnectionPool(self.limiter)
+        connection = pool.get('us-east-1', 'key', 'secret')
+        self.assertIsInstance(connection, ThrottledConnection)
+        self.assertIs(connection.limiter, self.limiter)
+        pool.clear()
+
+    def test_limits_set_after_checkout(self):
+        pool = ConnectionPool(self.limiter)
+        connection = pool.get('us-east-1', 'key', 'secret')
+        connection.wrapped = LocalConnection(SWFSimulator(poll_timeout=0))
+
+        self.limiter.configure('RegisterDomain', 1)
+        connection.register_domain('domain-1', '1')
+        connection.register_domain('domain-2', '1')
+        self.assertEqual(self.clock.now, 1.0)
+        pool.clear()